@@ -0,0 +1,967 @@
+#!/usr/bin/env python3
+"""Performance benchmarks for the PDF engine
+
+Run all benchmarks:      python benchmarks.py
+Run a single benchmark:  python benchmarks.py thumbnails
+"""
+
+import os
+import sys
+import time
+from io import BytesIO
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Register a benchmark function under a short name"""
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+def make_sample_pdf(num_pages, title="Benchmark Document"):
+    """Build an in-memory A4 PDF with some text and shapes on every page"""
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+
+    for page in range(num_pages):
+        c.setFont("Helvetica-Bold", 24)
+        c.drawString(72, height - 96, f"{title} - Page {page + 1}")
+        c.setFont("Helvetica", 11)
+        y_position = height - 140
+        for line in range(40):
+            c.drawString(72, y_position, f"Line {line + 1}: TFN 123 456 789, ABN 65 762 770 637, ref {page:05d}")
+            y_position -= 16
+        c.rect(72, 60, width - 144, 20, fill=0)
+        c.showPage()
+
+    c.save()
+    return buffer.getvalue()
+
+
+def make_image_pdf(num_pages, size=200):
+    """Build a PDF with an incompressible image on every page, for I/O-heavy benchmarks"""
+    from PIL import Image
+    from reportlab.lib.utils import ImageReader
+
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    for page in range(num_pages):
+        noise = Image.frombytes("RGB", (size, size), os.urandom(size * size * 3))
+        c.drawImage(ImageReader(noise), 72, 400, width=size, height=size)
+        c.drawString(72, 360, f"Scanned page {page + 1}")
+        c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+
+def make_statement_pdf(index, num_pages=3, logo_size=240):
+    """A statement as produced by one reporting system: same logo and fonts, different text"""
+    import random
+    from PIL import Image
+    from reportlab.lib.utils import ImageReader
+
+    # Same seed every time, so every statement embeds an identical logo
+    rng = random.Random(42)
+    logo = Image.frombytes("RGB", (logo_size, logo_size), bytes(rng.getrandbits(8) for _ in range(logo_size * logo_size * 3)))
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+    for page in range(num_pages):
+        c.drawImage(ImageReader(logo), 72, height - 72 - logo_size / 4, width=logo_size / 4, height=logo_size / 4)
+        c.setFont("Helvetica-Bold", 16)
+        c.drawString(160, height - 100, f"Statement {index:04d} - page {page + 1}")
+        c.setFont("Helvetica", 10)
+        for line in range(30):
+            c.drawString(72, height - 180 - line * 14, f"Transaction {line + 1}: client {index}, amount {(index * 31 + line) % 997}.00")
+        c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+
+def make_payroll_text(num_pages, seed=7):
+    """Page texts like a payroll export: mostly figures, with the odd TFN, ABN, email or phone number"""
+    import random
+
+    rng = random.Random(seed)
+    pages = []
+    for page in range(num_pages):
+        lines = [f"Payroll summary - page {page + 1} of {num_pages}", f"Pay date: {rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2024"]
+        for line in range(40):
+            roll = rng.random()
+            amount = f"{rng.randint(10, 99999)}.{rng.randint(0, 99):02d}"
+            if roll < 0.03:
+                d = "".join(rng.choice("0123456789") for _ in range(9))
+                number = rng.choice([f"{d[:3]} {d[3:6]} {d[6:]}", d, f"{d[:3]}-{d[3:6]}-{d[6:]}"])
+                lines.append(rng.choice([f"Employee TFN: {number}", f"Tax file number {number}", f"Ref {number} amount {amount}"]))
+            elif roll < 0.05:
+                d = "".join(rng.choice("0123456789") for _ in range(11))
+                number = rng.choice([f"{d[:2]} {d[2:5]} {d[5:8]} {d[8:]}", d, f"{d[:2]}-{d[2:5]}-{d[5:8]}-{d[8:]}"])
+                lines.append(rng.choice([f"Employer ABN: {number}", f"Supplier {number}"]))
+            elif roll < 0.06:
+                lines.append(f"Contact: staff{rng.randint(1, 999)}@example.com.au")
+            elif roll < 0.07:
+                lines.append(f"Phone: 04{rng.randint(10000000, 99999999)}")
+            else:
+                lines.append(f"Line {line + 1}: Ordinary hours {rng.randint(1, 80)} at rate {amount}, "
+                             f"YTD gross {rng.randint(1000, 200000)}.00 code {rng.randint(100, 999)}")
+        pages.append("\n".join(lines))
+    return pages
+
+
+def run_isolated(func, *args):
+    """Run func(*args) in a fresh process and return (result, peak RSS in MB)"""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(_measure_peak_rss, func, *args).result()
+
+
+def _measure_peak_rss(func, *args):
+    import resource
+    result = func(*args)
+    # ru_maxrss is KB on Linux
+    return result, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+@benchmark("thumbnails")
+def bench_thumbnails():
+    """Preview rendering should scale linearly with page count"""
+    from pdf_tools.thumbnails import render_thumbnails
+
+    print("🧪 Thumbnail rendering (single document handle)")
+    print("=" * 50)
+    print(f"{'pages':>6} {'total s':>9} {'ms/page':>9} {'max ms':>8}")
+    for num_pages in (10, 50, 100, 200):
+        pdf_bytes = make_sample_pdf(num_pages)
+        _, stats = render_thumbnails(pdf_bytes, zoom=1.5)
+        print(f"{num_pages:>6} {stats['total_seconds']:>9.2f} {stats['mean_ms']:>9.1f} {stats['max_ms']:>8.1f}")
+    print()
+
+
+@benchmark("render-pool")
+def bench_render_pool():
+    """Compare preview rendering wall time across worker counts"""
+    from pdf_tools.thumbnails import render_pages_parallel
+
+    num_pages = 120
+    pdf_bytes = make_sample_pdf(num_pages)
+    print(f"🧪 Parallel preview rendering ({num_pages} pages, {os.cpu_count()} CPU(s) available)")
+    print("=" * 50)
+    print(f"{'workers':>7} {'wall s':>8} {'pages/s':>9} {'speedup':>8}")
+    baseline = None
+    for workers in (1, 2, 4, 8):
+        start = time.perf_counter()
+        rendered = sum(1 for _ in render_pages_parallel(pdf_bytes, zoom=1.5, workers=workers))
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{workers:>7} {elapsed:>8.2f} {rendered / elapsed:>9.1f} {baseline / elapsed:>7.2f}x")
+    print()
+
+
+@benchmark("lazy-grid")
+def bench_lazy_grid():
+    """Time to first grid window for a large document"""
+    from pdf_tools.thumbnails import LazyThumbnails
+
+    num_pages = 1000
+    pdf_bytes = make_sample_pdf(num_pages)
+    print(f"🧪 Lazy preview grid ({num_pages} pages, 24 per view)")
+    print("=" * 50)
+    start = time.perf_counter()
+    thumbnails = LazyThumbnails(pdf_bytes, zoom=1.5)
+    opened = time.perf_counter() - start
+    thumbnails.get_many(range(24))
+    first_window = time.perf_counter() - start
+    thumbnails.prefetch(range(24, 48))
+    thumbnails.close()
+    print(f"  Document opened in {opened * 1000:.0f} ms")
+    print(f"  First 24 previews ready after {first_window * 1000:.0f} ms")
+    print(f"  Previews held in memory: at most {thumbnails.max_cached}")
+    print()
+
+
+@benchmark("thumbnail-memory")
+def bench_thumbnail_memory():
+    """Memory per stored preview: raw RGB versus encoded bytes"""
+    from pdf_tools.thumbnails import ThumbnailRenderer, decode_thumbnail
+
+    pdf_bytes = make_sample_pdf(5)
+    print("🧪 Preview memory per A4 page at 1.5x zoom")
+    print("=" * 50)
+    print(f"{'encoding':<22} {'KB/page':>9} {'vs raw':>8}")
+    with ThumbnailRenderer(pdf_bytes, zoom=1.5, image_format="PNG") as renderer:
+        img = decode_thumbnail(renderer.render(0))
+    raw_size = img.width * img.height * 3
+    print(f"{'raw RGB ' + str(img.size):<22} {raw_size / 1024:>9.0f} {'1x':>8}")
+
+    for image_format, quality, max_dimension in (("JPEG", 75, None), ("JPEG", 75, 800), ("WEBP", 75, None), ("WEBP", 75, 800)):
+        with ThumbnailRenderer(pdf_bytes, zoom=1.5, image_format=image_format,
+                               quality=quality, max_dimension=max_dimension) as renderer:
+            sizes = [len(data) for _, data in renderer.iter_pages()]
+        mean = sum(sizes) / len(sizes)
+        label = f"{image_format} q{quality}" + (f" max {max_dimension}px" if max_dimension else "")
+        print(f"{label:<22} {mean / 1024:>9.0f} {raw_size / mean:>7.0f}x")
+    print()
+
+
+@benchmark("page-model")
+def bench_page_model():
+    """Per-rerun page lookups and edits for a 5,000-page document"""
+    from pdf_tools.page_model import PageModel
+
+    num_pages = 5000
+    print(f"🧪 Page Manager model ({num_pages} pages)")
+    print("=" * 50)
+
+    # Previous approach: list of dicts searched with next(...) per position
+    pdf_pages = [{'page_num': i + 1, 'original_index': i} for i in range(num_pages)]
+    page_order = list(range(num_pages))
+    deleted_pages = set(range(0, num_pages, 7))
+    start = time.perf_counter()
+    for original_idx in page_order:
+        page_info = next(p for p in pdf_pages if p['original_index'] == original_idx)
+        _ = page_info['page_num'], original_idx in deleted_pages
+    list_scan = time.perf_counter() - start
+
+    model = PageModel(num_pages)
+    for page in range(0, num_pages, 7):
+        model.delete(page)
+    start = time.perf_counter()
+    for _, original_idx, is_deleted in model.window(0, len(model)):
+        _ = original_idx + 1, is_deleted
+    model_scan = time.perf_counter() - start
+    print(f"  Full rerun lookup: next(...) scan {list_scan * 1000:.0f} ms, page model {model_scan * 1000:.1f} ms")
+
+    operations = [
+        ("1,000 swaps", lambda: [model.swap(i, i + 1) for i in range(1000)]),
+        ("1,000 deletes + restores", lambda: [(model.delete(i), model.restore(i)) for i in range(1, 1001)]),
+        ("delete range of 500", lambda: model.delete_range(1000, 1499)),
+        ("move page 4,999 -> 0", lambda: model.move(4999, 0)),
+        ("extract range of 100", lambda: model.extract_range(200, 299)),
+        ("reverse", model.reverse),
+    ]
+    for label, operation in operations:
+        start = time.perf_counter()
+        operation()
+        print(f"  {label:<26} {(time.perf_counter() - start) * 1000:>8.2f} ms")
+    print()
+
+
+@benchmark("page-ops")
+def bench_page_ops():
+    """Output cost stays one write however many edits were made"""
+    from pypdf import PdfReader
+    from pdf_tools.page_ops import PageEditLog, materialize
+
+    num_pages = 500
+    pdf_bytes = make_sample_pdf(num_pages)
+    print(f"🧪 Page Manager edit log ({num_pages} pages)")
+    print("=" * 50)
+    print(f"{'edits':>7} {'record ms':>10} {'undo ms':>9} {'write s':>9}")
+    for num_edits in (10, 1000, 10000):
+        log = PageEditLog(num_pages)
+        start = time.perf_counter()
+        for i in range(num_edits):
+            pos = i % (num_pages - 1)
+            log.apply({"op": "move", "from": pos, "to": pos + 1})
+            if i % 10 == 0:
+                log.apply({"op": "delete", "page": i % num_pages})
+        recorded = time.perf_counter() - start
+
+        start = time.perf_counter()
+        log.undo()
+        undone = time.perf_counter() - start
+
+        start = time.perf_counter()
+        materialize(PdfReader(BytesIO(pdf_bytes)), log.compact())
+        written = time.perf_counter() - start
+        print(f"{num_edits:>7} {recorded * 1000:>10.1f} {undone * 1000:>9.1f} {written:>9.2f}")
+    print()
+
+
+@benchmark("rotate")
+def bench_rotate():
+    """Rotating a whole document is a metadata edit, not a re-render"""
+    from pypdf import PdfReader
+    from pdf_tools.page_ops import PageEditLog, materialize
+    from pdf_tools.thumbnails import LazyThumbnails
+
+    num_pages = 500
+    pdf_bytes = make_sample_pdf(num_pages)
+    print(f"🧪 Rotate all pages ({num_pages} pages)")
+    print("=" * 50)
+
+    log = PageEditLog(num_pages)
+    start = time.perf_counter()
+    log.apply({"op": "rotate_range", "first": 0, "last": num_pages - 1, "degrees": 90})
+    print(f"  Record rotation:           {(time.perf_counter() - start) * 1000:>8.2f} ms")
+
+    start = time.perf_counter()
+    materialize(PdfReader(BytesIO(pdf_bytes)), log.compact())
+    print(f"  Write rotated PDF:         {(time.perf_counter() - start) * 1000:>8.0f} ms")
+
+    thumbnails = LazyThumbnails(pdf_bytes, zoom=1.5, image_format="JPEG", quality=75, max_dimension=800)
+    try:
+        thumbnails.get_many(range(24))
+        start = time.perf_counter()
+        for page in range(24):
+            thumbnails.get_transformed(page, rotation=90)
+        rotated = (time.perf_counter() - start) / 24
+        stats = thumbnails.timings
+        render_ms = sum(stats.values()) / len(stats) * 1000
+    finally:
+        thumbnails.close()
+    print(f"  Rotate cached preview:     {rotated * 1000:>8.1f} ms/page (render was {render_ms:.1f} ms/page)")
+    print()
+
+
+@benchmark("split")
+def bench_split():
+    """Split a 2,000-page document into 500 parts with bounded memory"""
+    import tempfile
+    import tracemalloc
+    from pypdf import PdfReader
+    from pdf_tools.page_ops import PageEditLog
+    from pdf_tools.split import ranges_every, write_split_zip
+
+    num_pages = 2000
+    pdf_bytes = make_sample_pdf(num_pages)
+    print(f"🧪 Split to ZIP ({num_pages} pages, {len(pdf_bytes) / 1024 / 1024:.1f} MB)")
+    print("=" * 50)
+    print(f"{'parts':>6} {'wall s':>8} {'zip MB':>8} {'peak MB':>8}")
+    for pages_per_part in (400, 40, 4):
+        reader = PdfReader(BytesIO(pdf_bytes))
+        plan = PageEditLog(num_pages).compact()
+        tracemalloc.start()
+        with tempfile.TemporaryFile() as output:
+            stats = write_split_zip(reader, plan, ranges_every(num_pages, pages_per_part), output)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{stats['parts']:>6} {stats['seconds']:>8.2f} {stats['zip_bytes'] / 1024 / 1024:>8.2f} {peak / 1024 / 1024:>8.1f}")
+    print()
+
+
+@benchmark("combiner-info")
+def bench_combiner_info():
+    """Per-rerun cost of the Combiner's file cards with 40 uploads"""
+    import PyPDF2
+    from pdf_tools.pdf_info import PdfInfoCache
+    from pdf_tools.thumbnail_cache import content_hash
+
+    uploads = [make_sample_pdf(20, title=f"Upload {i}") for i in range(40)]
+    print(f"🧪 Combiner file cards ({len(uploads)} uploads x 20 pages)")
+    print("=" * 50)
+
+    # Previous approach: a new reader and first-page text extraction per card per rerun
+    start = time.perf_counter()
+    for pdf_bytes in uploads:
+        reader = PyPDF2.PdfReader(BytesIO(pdf_bytes))
+        _ = len(reader.pages), reader.pages[0].extract_text()[:200]
+    reparse = time.perf_counter() - start
+
+    cache = PdfInfoCache()
+    start = time.perf_counter()
+    keys = [cache.submit(pdf_bytes) for pdf_bytes in uploads]
+    for key in keys:
+        cache.get(key)
+    first = time.perf_counter() - start
+
+    # Reruns look up keys remembered per upload
+    start = time.perf_counter()
+    for key in keys:
+        cache.get(key)
+    rerun = time.perf_counter() - start
+    hashing = time.perf_counter()
+    for pdf_bytes in uploads:
+        content_hash(pdf_bytes)
+    hashing = time.perf_counter() - hashing
+
+    print(f"  Re-parse every rerun:      {reparse * 1000:>8.1f} ms")
+    print(f"  First load (background):   {first * 1000:>8.1f} ms (hashing {hashing * 1000:.1f} ms)")
+    print(f"  Each rerun after that:     {rerun * 1000:>8.3f} ms, {cache.parses} parses in total")
+    print()
+
+
+def _load_uploads(paths):
+    """Inputs held in memory, as Streamlit holds uploaded files"""
+    uploads = []
+    for path in paths:
+        with open(path, "rb") as f:
+            uploads.append(BytesIO(f.read()))
+    return uploads
+
+
+def _merge_via_temp_file(paths):
+    """The Combiner's previous path: PyPDF2 writer, temp file, read back, re-parse to count"""
+    import tempfile
+    import PyPDF2
+
+    uploads = _load_uploads(paths)
+    start = time.perf_counter()
+    pdf_writer = PyPDF2.PdfWriter()
+    for upload in uploads:
+        pdf_reader = PyPDF2.PdfReader(upload)
+        for page_num in range(len(pdf_reader.pages)):
+            pdf_writer.add_page(pdf_reader.pages[page_num])
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
+        pdf_writer.write(tmp_file)
+        tmp_file_path = tmp_file.name
+    with open(tmp_file_path, "rb") as file:
+        pdf_data = file.read()
+    os.unlink(tmp_file_path)
+    total_pages = len(PyPDF2.PdfReader(BytesIO(pdf_data)).pages)
+    return time.perf_counter() - start, total_pages
+
+
+def _merge_single_pass(paths):
+    from pdf_tools.merge import merge_pdfs
+
+    uploads = _load_uploads(paths)
+    start = time.perf_counter()
+    output, stats = merge_pdfs([(upload, None) for upload in uploads])
+    pdf_data = output.read()  # what the download button receives
+    output.close()
+    return time.perf_counter() - start, stats["pages"]
+
+
+def _noop(paths):
+    import pypdf  # noqa: F401
+    import PyPDF2  # noqa: F401
+    _load_uploads(paths)
+    return 0.0, 0
+
+
+@benchmark("merge")
+def bench_merge():
+    """Peak RSS and wall time of the Combiner merge, before and after"""
+    import tempfile
+
+    num_files, pages_per_file = 10, 40
+    with tempfile.TemporaryDirectory() as work_dir:
+        paths = []
+        for i in range(num_files):
+            path = f"{work_dir}/input_{i}.pdf"
+            with open(path, "wb") as f:
+                f.write(make_image_pdf(pages_per_file))
+            paths.append(path)
+        input_mb = sum(os.path.getsize(p) for p in paths) / 1024 / 1024
+
+        print(f"🧪 Combiner merge ({num_files} files x {pages_per_file} image pages, {input_mb:.0f} MB in)")
+        print("=" * 50)
+        print(f"{'path':<28} {'wall s':>8} {'peak RSS MB':>12}")
+        for label, func in (("imports + uploads in memory", _noop),
+                            ("temp file + re-parse", _merge_via_temp_file),
+                            ("single pass, spooled", _merge_single_pass)):
+            (seconds, pages), peak = run_isolated(func, paths)
+            print(f"{label:<28} {seconds:>8.2f} {peak:>12.0f}")
+    print()
+
+
+@benchmark("merge-dedupe")
+def bench_merge_dedupe():
+    """Merged size, dedupe time and write time with and without resource deduplication"""
+    from pdf_tools.merge import merge_pdfs
+
+    num_files = 120
+    statements = [make_statement_pdf(i) for i in range(num_files)]
+    print(f"🧪 Deduplicating merge ({num_files} statements, {sum(map(len, statements)) / 1024 / 1024:.1f} MB in)")
+    print("=" * 50)
+    print(f"{'mode':<12} {'wall s':>7} {'dedupe s':>9} {'write s':>8} {'output MB':>10} {'removed':>8}")
+    for deduplicate in (False, True):
+        # Best of three, each with the default spooled output
+        runs = []
+        for _ in range(3):
+            output, stats = merge_pdfs([(BytesIO(data), None) for data in statements], deduplicate=deduplicate)
+            output.close()
+            runs.append(stats)
+        stats = min(runs, key=lambda run: run["seconds"])
+        print(f"{'deduplicate' if deduplicate else 'plain':<12} {stats['seconds']:>7.2f} "
+              f"{stats['dedupe_seconds']:>9.3f} {stats['write_seconds']:>8.3f} "
+              f"{stats['bytes'] / 1024 / 1024:>10.2f} {stats['duplicates_removed']:>8}")
+    print()
+
+
+@benchmark("preflight")
+def bench_preflight():
+    """Validate a batch of large inputs with different pool sizes"""
+    from pdf_tools.preflight import preflight_many
+
+    inputs = [(make_sample_pdf(300, title=f"Scan {i}"), None) for i in range(8)]
+    print(f"🧪 Combiner input preflight ({len(inputs)} files x 300 pages, {os.cpu_count()} CPU(s) available)")
+    print("=" * 50)
+    print(f"{'workers':>7} {'wall s':>8} {'speedup':>8}")
+    baseline = None
+    for workers in (1, 2, 4):
+        start = time.perf_counter()
+        results = preflight_many(inputs, workers=workers)
+        elapsed = time.perf_counter() - start
+        assert all(result["ok"] for result in results)
+        baseline = baseline or elapsed
+        print(f"{workers:>7} {elapsed:>8.2f} {baseline / elapsed:>7.2f}x")
+    print()
+
+
+@benchmark("encrypt-batch")
+def bench_encrypt_batch():
+    """Encrypt a month of payslips with different pool sizes"""
+    from pdf_tools.encrypt import encrypt_many, generate_secure_password
+
+    inputs = [(make_sample_pdf(2, title=f"Payslip {i}"), generate_secure_password()) for i in range(300)]
+    total_mb = sum(len(pdf_bytes) for pdf_bytes, _ in inputs) / 1024 / 1024
+    print(f"🧪 Batch encryption ({len(inputs)} payslips, {total_mb:.1f} MB, {os.cpu_count()} CPU(s) available)")
+    print("=" * 50)
+    print(f"{'workers':>7} {'wall s':>8} {'files/s':>8} {'ms/file':>8}")
+    for workers in (1, 2, 4):
+        start = time.perf_counter()
+        results = encrypt_many(inputs, workers=workers)
+        elapsed = time.perf_counter() - start
+        assert all(result["ok"] for result in results)
+        per_file = sum(result["seconds"] for result in results) / len(results) * 1000
+        print(f"{workers:>7} {elapsed:>8.2f} {len(inputs) / elapsed:>8.1f} {per_file:>8.1f}")
+    print()
+
+
+@benchmark("encrypt-algorithms")
+def bench_encrypt_algorithms():
+    """Encryption throughput per algorithm on text and image-heavy files"""
+    from pdf_tools.encrypt import ENCRYPTION_ALGORITHMS, crypto_backend, encrypt_pdf
+
+    documents = {
+        "text, 200 pages": make_sample_pdf(200),
+        "images, 20 pages": make_image_pdf(20, size=600),
+    }
+    backend, version = crypto_backend()
+    print(f"🧪 Encryption throughput (cipher backend: {backend} {version})")
+    print("=" * 50)
+    for label, pdf_bytes in documents.items():
+        size_mb = len(pdf_bytes) / 1024 / 1024
+        print(f"  {label} ({size_mb:.1f} MB)")
+        for algorithm in ENCRYPTION_ALGORITHMS:
+            timings = []
+            for _ in range(3):
+                start = time.perf_counter()
+                encrypt_pdf(BytesIO(pdf_bytes), "benchmark", algorithm)
+                timings.append(time.perf_counter() - start)
+            best = min(timings)
+            print(f"    {algorithm:<8} {best * 1000:>7.1f} ms {size_mb / best:>7.1f} MB/s")
+    print()
+
+
+@benchmark("encrypt-clone")
+def bench_encrypt_clone():
+    """Whole-document cloning against page-by-page copying on a 1,000-page file"""
+    from pypdf import PdfReader, PdfWriter
+    from pdf_tools.encrypt import encrypt_pdf
+
+    def page_by_page(pdf_bytes):
+        reader = PdfReader(BytesIO(pdf_bytes))
+        writer = PdfWriter()
+        for page in reader.pages:
+            writer.add_page(page)
+        writer.encrypt("benchmark", "benchmark", algorithm="AES-256")
+        writer.write(BytesIO())
+
+    pdf_bytes = make_sample_pdf(1000)
+    print(f"🧪 Encrypting a 1,000-page file ({len(pdf_bytes) / 1024 / 1024:.1f} MB, AES-256)")
+    print("=" * 50)
+    for label, func in (
+        ("Page by page", page_by_page),
+        ("Cloned", lambda data: encrypt_pdf(BytesIO(data), "benchmark")),
+    ):
+        timings = []
+        for _ in range(3):
+            start = time.perf_counter()
+            func(pdf_bytes)
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        print(f"  {label:<14} {best:>6.2f} s ({best / 1000 * 1000:.2f} ms/page)")
+    print()
+
+
+def _encrypt_zip_in_memory(paths, compression):
+    """The Encryptor's previous path: every encrypted file and the ZIP held as bytes"""
+    import zipfile
+    from pdf_tools.encrypt import encrypt_many
+
+    uploads = _load_uploads(paths)
+    start = time.perf_counter()
+    results = encrypt_many([(upload.getvalue(), "benchmark") for upload in uploads], workers=1)
+    zip_buffer = BytesIO()
+    with zipfile.ZipFile(zip_buffer, "w", compression) as zip_file:
+        for index, result in enumerate(results):
+            zip_file.writestr(f"{index}.pdf", result["data"])
+    zip_data = zip_buffer.getvalue()
+    return time.perf_counter() - start, len(zip_data)
+
+
+def _encrypt_zip_streamed(paths, compression):
+    import tempfile
+    from pdf_tools.encrypt import encrypt_many, write_zip
+
+    uploads = _load_uploads(paths)
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as output_dir:
+        results = encrypt_many([(upload.getvalue(), "benchmark") for upload in uploads], workers=1, output_dir=output_dir)
+        zip_buffer = write_zip([(f"{index}.pdf", result["path"]) for index, result in enumerate(results)],
+                               compression=compression)
+        zip_size = zip_buffer.seek(0, 2)
+        zip_buffer.close()
+    return time.perf_counter() - start, zip_size
+
+
+@benchmark("encrypt-zip")
+def bench_encrypt_zip():
+    """Peak RSS and wall time of an Encryptor batch and its ZIP, in memory versus streamed from disk"""
+    import tempfile
+    import zipfile
+
+    num_files, pages_per_file = 40, 20
+    with tempfile.TemporaryDirectory() as work_dir:
+        paths = []
+        for i in range(num_files):
+            path = f"{work_dir}/input_{i}.pdf"
+            with open(path, "wb") as f:
+                f.write(make_image_pdf(pages_per_file))
+            paths.append(path)
+        input_mb = sum(os.path.getsize(p) for p in paths) / 1024 / 1024
+
+        print(f"🧪 Encrypt and ZIP ({num_files} files x {pages_per_file} image pages, {input_mb:.0f} MB in)")
+        print("=" * 50)
+        print(f"{'path':<28} {'wall s':>8} {'peak RSS MB':>12} {'ZIP MB':>8}")
+        for label, func, compression in (
+            ("uploads in memory", _noop, None),
+            ("in memory, deflated", _encrypt_zip_in_memory, zipfile.ZIP_DEFLATED),
+            ("streamed, deflated", _encrypt_zip_streamed, zipfile.ZIP_DEFLATED),
+            ("streamed, stored", _encrypt_zip_streamed, zipfile.ZIP_STORED),
+        ):
+            args = (paths,) if compression is None else (paths, compression)
+            (seconds, size), peak = run_isolated(func, *args)
+            print(f"{label:<28} {seconds:>8.2f} {peak:>12.0f} {size / 1024 / 1024:>8.1f}")
+    print()
+
+
+def _detect_per_pattern(text, patterns):
+    """Redaction's previous detection: every pattern re-scans the whole page, ABNs always"""
+    import re
+    from pdf_tools.redact import ABN_CONTEXT, ABN_PATTERNS, EMAIL_PATTERN, PHONE_PATTERNS, TFN_CONTEXT, TFN_PATTERNS
+
+    def scan(pattern_list, item_type, context=None, digit_count=None):
+        found, seen = [], set()
+        for pattern in pattern_list:
+            for match in re.finditer(pattern.pattern, text):
+                digits = re.sub(r'\D', '', match.group())
+                if (digit_count is None or len(digits) == digit_count) and match.start() not in seen:
+                    found.append({'type': item_type, 'text': match.group(), 'start': match.start(), 'end': match.end()})
+                    seen.add(match.start())
+        if context:
+            for match in re.finditer(context.pattern, text):
+                if match.start() not in seen:
+                    found.append({'type': item_type + ' (with context)', 'text': match.group(),
+                                  'start': match.start(), 'end': match.end()})
+        return found
+
+    found = []
+    abns = scan(ABN_PATTERNS, 'ABN', ABN_CONTEXT, 11)
+    abn_positions = [(item['start'], item['end']) for item in abns]
+    if patterns.get('abn'):
+        found.extend(abns)
+    if patterns.get('tfn'):
+        for item in scan(TFN_PATTERNS, 'TFN', TFN_CONTEXT, 9):
+            if item['type'] == 'TFN':
+                if any(start <= item['start'] < end or start < item['end'] <= end for start, end in abn_positions):
+                    continue
+                if re.search(r'\d{2}[\s-]?$', text[max(0, item['start'] - 10):item['start']]):
+                    continue
+            found.append(item)
+    if patterns.get('email'):
+        found.extend(scan([EMAIL_PATTERN], 'Email'))
+    if patterns.get('phone'):
+        for pattern in PHONE_PATTERNS:
+            found.extend(scan([pattern], 'Phone'))
+    return found
+
+
+@benchmark("redact-detect")
+def bench_redact_detect():
+    """Redaction detection over 10,000 pages of text, per-pattern scans versus the compiled detector"""
+    from pdf_tools.redact import RedactionDetector
+
+    pages = make_payroll_text(10000)
+    print(f"🧪 Detecting sensitive data in 10,000 pages ({sum(map(len, pages)) / 1024 / 1024:.1f} MB of text)")
+    print("=" * 50)
+    for label, patterns in (("TFN only", {"tfn": True}),
+                            ("TFN, ABN, email, phone", {"tfn": True, "abn": True, "email": True, "phone": True})):
+        start = time.perf_counter()
+        before = sum(len(_detect_per_pattern(text, patterns)) for text in pages)
+        per_pattern = time.perf_counter() - start
+
+        detector = RedactionDetector(patterns)
+        start = time.perf_counter()
+        after = sum(len(detector.detect(text)) for text in pages)
+        compiled = time.perf_counter() - start
+
+        print(f"  {label}: {before} items")
+        print(f"    per-pattern scans: {per_pattern:>6.2f} s ({per_pattern * 100:.0f} µs/page)")
+        print(f"    compiled detector: {compiled:>6.2f} s ({compiled * 100:.0f} µs/page, {after} items, "
+              f"{per_pattern / compiled:.1f}x faster)")
+    print()
+
+
+def make_tfn_register_pdf(num_pages, per_page=60):
+    """A register listing a TFN on every line, the worst case for redaction"""
+    import random
+
+    rng = random.Random(11)
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+    c.setFont("Helvetica", 8)
+    for page in range(num_pages):
+        for line in range(per_page):
+            d = "".join(rng.choice("0123456789") for _ in range(9))
+            number = rng.choice([f"{d[:3]} {d[3:6]} {d[6:]}", d, f"{d[:3]}-{d[3:6]}-{d[6:]}"])
+            c.drawString(50, height - 50 - line * 12, f"Employee {page * per_page + line + 1:05d}  TFN: {number}  hours {rng.randint(1, 80)}")
+        c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+
+def _redact_with_search_for(pdf_bytes, items):
+    """Redaction's previous path: page.search_for per item and per fallback format"""
+    import fitz
+
+    def digit_formats(digits):
+        if len(digits) == 11:
+            return [f"{digits[:2]} {digits[2:5]} {digits[5:8]} {digits[8:]}", digits,
+                    f"{digits[:2]}-{digits[2:5]}-{digits[5:8]}-{digits[8:]}"]
+        if len(digits) == 9:
+            return [f"{digits[:3]} {digits[3:6]} {digits[6:]}", digits, f"{digits[:3]}-{digits[3:6]}-{digits[6:]}"]
+        return []
+
+    pdf_doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    for page_num in sorted({item['page'] for item in items}):
+        page = pdf_doc[page_num]
+        for item in (item for item in items if item['page'] == page_num):
+            text_instances = page.search_for(item['text'])
+            for formatted in digit_formats(item.get('digits', '')):
+                if text_instances:
+                    break
+                text_instances = page.search_for(formatted)
+            for inst in text_instances:
+                page.add_redact_annot(inst)
+        page.apply_redactions()
+    output = BytesIO()
+    pdf_doc.save(output)
+    return output
+
+
+@benchmark("redact-apply")
+def bench_redact_apply():
+    """Applying redactions on pages with 60 TFNs each, search_for per item versus detector offsets"""
+    from pdf_tools.redact import create_redacted_pdf, scan_pdf
+
+    pdf_bytes = make_tfn_register_pdf(20)
+    items = scan_pdf(BytesIO(pdf_bytes), {"tfn": True})
+    print(f"🧪 Redacting {len(items)} items on 20 pages of 60 TFNs")
+    print("=" * 50)
+    for label, func in (("search_for per item", _redact_with_search_for),
+                        ("detector offsets", lambda data, found: create_redacted_pdf(BytesIO(data), found))):
+        timings = []
+        for _ in range(3):
+            start = time.perf_counter()
+            func(pdf_bytes, items)
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        print(f"  {label:<22} {best:>6.2f} s ({best / 20 * 1000:.0f} ms/page)")
+    print()
+
+
+@benchmark("redact-files")
+def bench_redact_files():
+    """Scan and redact a batch of files, parsing each twice versus one shared analysis"""
+    from pdf_tools.redact import DocumentAnalysis, create_redacted_pdf, scan_pdf
+
+    files = [make_tfn_register_pdf(5, per_page=20) for _ in range(10)]
+    patterns = {"tfn": True}
+    print("🧪 Scan and redact 10 files (5 pages, 20 TFNs per page)")
+    print("=" * 50)
+
+    def parse_twice():
+        for pdf_bytes in files:
+            items = scan_pdf(BytesIO(pdf_bytes), patterns)
+            create_redacted_pdf(BytesIO(pdf_bytes), items)
+
+    def shared_analysis():
+        for pdf_bytes in files:
+            analysis = DocumentAnalysis(pdf_bytes)
+            analysis.redact(analysis.scan(patterns))
+
+    for label, func in (("scan, then redact bytes", parse_twice), ("shared analysis", shared_analysis)):
+        timings = []
+        for _ in range(3):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        print(f"  {label:<24} {best:>6.2f} s ({best / 10 * 1000:.0f} ms/file)")
+    print()
+
+
+@benchmark("merge-ranges")
+def bench_merge_ranges():
+    """Selected pages merged directly versus a full merge followed by a Page Manager pass"""
+    from pypdf import PdfReader
+    from pdf_tools.merge import merge_pdfs, select_pages
+    from pdf_tools.page_ops import materialize
+
+    inputs = [make_image_pdf(60) for _ in range(3)]
+    print("🧪 Page ranges per input (3 files x 60 image pages: 1-3 of A, all of B, last of C)")
+    print("=" * 50)
+
+    start = time.perf_counter()
+    combined, _ = merge_pdfs([(BytesIO(data), None) for data in inputs])
+    keep = list(range(3)) + list(range(60, 120)) + [179]
+    materialize(PdfReader(combined), [(page, 0, None) for page in keep])
+    two_pass = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _, stats = merge_pdfs([
+        (BytesIO(inputs[0]), select_pages("1-3", 60)),
+        (BytesIO(inputs[1]), select_pages("", 60)),
+        (BytesIO(inputs[2]), select_pages("last", 60)),
+    ])
+    direct = time.perf_counter() - start
+    print(f"  Full merge + Page Manager:  {two_pass:>6.2f} s")
+    print(f"  Merge plan with ranges:     {direct:>6.2f} s ({stats['pages']} pages)")
+    print()
+
+
+@benchmark("merge-outlines")
+def bench_merge_outlines():
+    """Outline merging overhead on a 1,500-page bundle"""
+    from pypdf import PdfReader, PdfWriter
+    from pypdf.generic import DictionaryObject, NameObject, TextStringObject
+    from pdf_tools.merge import merge_pdfs
+
+    num_files, pages_per_file = 30, 50
+    inputs = []
+    for i in range(num_files):
+        writer = PdfWriter(clone_from=PdfReader(BytesIO(make_sample_pdf(pages_per_file, title=f"Section {i}"))))
+        for chapter in range(0, pages_per_file, 5):
+            writer.add_outline_item(f"Chapter {chapter // 5 + 1}", chapter)
+        buffer = BytesIO()
+        writer.write(buffer)
+        inputs.append(buffer.getvalue())
+
+    print(f"🧪 Merged outlines ({num_files} files x {pages_per_file} pages, 10 bookmarks each)")
+    print("=" * 50)
+    runs = {False: [], True: []}
+    for _ in range(3):
+        for outlines in (False, True):
+            _, stats = merge_pdfs([(BytesIO(data), None) for data in inputs], outlines=outlines)
+            runs[outlines].append(stats)
+    plain = min(stats["seconds"] for stats in runs[False])
+    with_outlines = min(stats["seconds"] for stats in runs[True])
+    outline_part = min(stats["outline_seconds"] for stats in runs[True])
+    print(f"  Without outlines:   {plain:>6.2f} s")
+    print(f"  With outlines:      {with_outlines:>6.2f} s (outline work {outline_part:.3f} s, "
+          f"{outline_part / with_outlines * 100:.1f}% of merge)")
+
+    # Bookmarks that point at named destinations instead of page references
+    writer = PdfWriter(clone_from=PdfReader(BytesIO(make_sample_pdf(100))))
+    root = writer.get_outline_root()
+    for i in range(800):
+        writer.add_named_destination(f"mark{i}", i % 100)
+        writer.add_outline_item_dict(DictionaryObject({
+            NameObject("/Title"): TextStringObject(f"Mark {i}"),
+            NameObject("/Dest"): TextStringObject(f"mark{i}"),
+        }), root)
+    buffer = BytesIO()
+    writer.write(buffer)
+    _, stats = merge_pdfs([(BytesIO(buffer.getvalue()), None)], outlines=True)
+    print(f"  800 named bookmarks: {stats['seconds']:>5.2f} s (outline work {stats['outline_seconds']:.3f} s)")
+    print()
+
+
+@benchmark("optimize")
+def bench_optimize():
+    """Size and time of the optimize stage on stamped text pages and 300 dpi scans"""
+    from PIL import Image
+    from pypdf import PdfReader, PdfWriter
+    from reportlab.lib.utils import ImageReader
+    from pdf_tools.optimize import optimize_pdf
+
+    # pypdf rewrites a page's content uncompressed when an overlay is merged into it
+    stamp = PdfReader(BytesIO(make_sample_pdf(1, title="Approved")))
+    writer = PdfWriter()
+    for page in PdfReader(BytesIO(make_sample_pdf(100))).pages:
+        page.merge_page(stamp.pages[0])
+        writer.add_page(page)
+    stamped = BytesIO()
+    writer.write(stamped)
+
+    # A4 scans at 300 dpi, a gradient with sensor-like noise
+    gradient = Image.radial_gradient("L").resize((2480, 3508))
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    for _ in range(5):
+        scan = Image.blend(gradient, Image.effect_noise((2480, 3508), 12), 0.3).convert("RGB")
+        c.drawImage(ImageReader(scan), 0, 0, width=A4[0], height=A4[1])
+        c.showPage()
+    c.save()
+
+    print("🧪 Optimized output")
+    print("=" * 50)
+    for label, data, image_dpi in (
+        ("100 stamped pages", stamped.getvalue(), None),
+        ("5 scans, lossless", buffer.getvalue(), None),
+        ("5 scans at 150 dpi", buffer.getvalue(), 150),
+    ):
+        _, stats = optimize_pdf(data, image_dpi=image_dpi)
+        print(f"  {label + ':':<20} {stats['input_bytes'] / 1024 / 1024:>6.2f} MB -> "
+              f"{stats['output_bytes'] / 1024 / 1024:>6.2f} MB in {stats['seconds']:.2f} s")
+    print()
+
+
+@benchmark("linearize")
+def bench_linearize():
+    """Cost of the optional fast web view stage on a combined bundle"""
+    from pdf_tools.linearize import linearization_backend, linearize_pdf
+    from pdf_tools.merge import merge_pdfs
+
+    print("🧪 Linearized output (20 files x 25 image pages)")
+    print("=" * 50)
+    if linearization_backend() is None:
+        print("  No linearizer installed (needs pikepdf or PyMuPDF < 1.24), skipped")
+        print()
+        return
+    inputs = [make_image_pdf(25) for _ in range(20)]
+    combined, stats = merge_pdfs([(BytesIO(data), None) for data in inputs])
+    _, linear_stats = linearize_pdf(combined)
+    print(f"  Merge:              {stats['seconds']:>6.2f} s, {stats['bytes'] / 1024 / 1024:.1f} MB")
+    print(f"  Linearize ({linear_stats['backend']}): {linear_stats['seconds']:>6.2f} s, "
+          f"{linear_stats['output_bytes'] / 1024 / 1024:.1f} MB")
+    print()
+
+
+def main(names):
+    for name in names or BENCHMARKS:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark '{name}'. Available: {', '.join(BENCHMARKS)}")
+            return 1
+        start = time.perf_counter()
+        BENCHMARKS[name]()
+        print(f"({name} finished in {time.perf_counter() - start:.1f}s)\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,8 +1,10 @@
 import streamlit as st
-import PyPDF2
-import tempfile
 import os
-from io import BytesIO
+from pdf_tools.linearize import linearization_backend, linearize_pdf
+from pdf_tools.merge import merge_pdfs, select_pages
+from pdf_tools.optimize import IMAGE_DPI_CHOICES, PYMUPDF_AVAILABLE, describe_savings, optimize_pdf
+from pdf_tools.pdf_info import describe_page_sizes, get_pdf_info_cache
+from pdf_tools.preflight import merge_source, preflight_many
 
 st.set_page_config(page_title="PDF Combiner", page_icon="📄", layout="wide")
 
@@ -13,32 +15,18 @@ if not st.session_state.get("password_correct", False):
         st.switch_page("app.py")
     st.stop()
 
+def request_pdf_info(pdf_file):
+    """Start parsing an upload's metadata in the background, once per upload"""
+    # Uploads keep their file_id across reruns, so the bytes are hashed only once
+    info_keys = st.session_state.setdefault('pdf_info_keys', {})
+    if pdf_file.file_id not in info_keys:
+        info_keys[pdf_file.file_id] = get_pdf_info_cache().submit(pdf_file.getvalue())
+    return info_keys[pdf_file.file_id]
+
 def get_pdf_info(pdf_file):
-    """Extract information from PDF file"""
-    pdf_file.seek(0)
-    try:
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        num_pages = len(pdf_reader.pages)
-        
-        # Try to extract text from first page for preview
-        first_page_text = ""
-        if num_pages > 0:
-            first_page = pdf_reader.pages[0]
-            text = first_page.extract_text()
-            # Get first 200 characters for preview
-            first_page_text = text[:200] + "..." if len(text) > 200 else text
-            first_page_text = first_page_text.replace('\n', ' ').strip()
-        
-        pdf_file.seek(0)
-        return {
-            "pages": num_pages,
-            "preview_text": first_page_text if first_page_text else "No text content available"
-        }
-    except Exception as e:
-        return {
-            "pages": "Unknown",
-            "preview_text": f"Error reading PDF: {str(e)}"
-        }
+    """Cached page count, text preview, page sizes and encryption status"""
+    # Passing the bytes lets the shared cache re-parse a key other sessions evicted
+    return get_pdf_info_cache().get(request_pdf_info(pdf_file), pdf_bytes=pdf_file.getvalue())
 
 def create_pdf_card(file, index, position):
     """Create a card display for a PDF file"""
@@ -64,7 +52,10 @@ def create_pdf_card(file, index, position):
                         {file.name}
                     </p>
                     <p style="margin: 5px 0; color: #666; font-size: 0.9em;">
-                        📑 Pages: {info['pages']}
+                        📑 Pages: {info['pages']}{' · 🔒 Encrypted' if info['encrypted'] else ''}
+                    </p>
+                    <p style="margin: 5px 0; color: #666; font-size: 0.85em;">
+                        📐 {describe_page_sizes(info['page_sizes'])}
                     </p>
                     <p style="margin: 5px 0; color: #666; font-size: 0.85em;">
                         Size: {file.size / 1024:.1f} KB
@@ -94,6 +85,10 @@ uploaded_files = st.file_uploader(
 if uploaded_files:
     st.success(f"✅ {len(uploaded_files)} file(s) uploaded successfully!")
     
+    # Parse all new uploads concurrently while the cards are drawn
+    for file in uploaded_files:
+        request_pdf_info(file)
+    
     if len(uploaded_files) > 1:
         st.markdown("---")
         st.subheader("📋 Arrange Your PDFs")
@@ -107,8 +102,10 @@ if uploaded_files:
         num_cols = min(3, len(uploaded_files))  # Max 3 columns
         cols = st.columns(num_cols)
         
-        # Track the new order
+        # Track the new order and the pages chosen from each file
         new_order = []
+        page_selection = {}
+        selection_errors = []
         
         # Display files in grid layout
         for i, file_idx in enumerate(st.session_state.file_order):
@@ -116,7 +113,23 @@ if uploaded_files:
             with cols[col_idx]:
                 # Display file card
                 file = uploaded_files[file_idx]
-                create_pdf_card(file, file_idx, i)
+                info = create_pdf_card(file, file_idx, i)
+                
+                # Page selection, only these pages are read and written
+                page_expression = st.text_input(
+                    "Pages to include:",
+                    placeholder="All pages (e.g. 1-3, 5, last)",
+                    key=f"pages_{file.file_id}"
+                )
+                try:
+                    if page_expression.strip() and not isinstance(info['pages'], int):
+                        raise ValueError("Page count unknown, only whole files can be added")
+                    page_selection[file_idx] = select_pages(page_expression, info['pages'])
+                    if page_selection[file_idx] is not None:
+                        st.caption(f"✂️ {len(page_selection[file_idx])} of {info['pages']} pages selected")
+                except ValueError as e:
+                    st.error(f"❌ {str(e)}")
+                    selection_errors.append(file.name)
                 
                 # Order selector
                 new_position = st.selectbox(
@@ -147,56 +160,133 @@ if uploaded_files:
             with st.popover("📊 Current Order"):
                 st.markdown("**Files will be combined in this order:**")
                 for i, idx in enumerate(st.session_state.file_order):
-                    st.write(f"{i+1}. {uploaded_files[idx].name}")
+                    pages = page_selection.get(idx)
+                    selected = "all pages" if pages is None else f"{len(pages)} pages"
+                    st.write(f"{i+1}. {uploaded_files[idx].name} ({selected})")
         
         with col3:
-            if st.button("🔀 Combine PDFs", type="primary", use_container_width=True):
+            deduplicate = st.checkbox(
+                "🧬 Share identical fonts, images and colour profiles",
+                value=False,
+                help="Inputs from the same system often embed the same logo and fonts; "
+                     "each distinct resource is then written only once"
+            )
+            add_outlines = st.checkbox(
+                "📑 Bookmark each file and keep its own bookmarks",
+                value=False,
+                help="Adds one top-level bookmark per file with that file's bookmarks nested under it"
+            )
+            optimize_output = st.checkbox(
+                "🗜️ Optimize file size",
+                value=False,
+                disabled=not PYMUPDF_AVAILABLE,
+                help="Recompresses streams, packs objects and drops unused ones; optionally downsamples images"
+            )
+            image_dpi = st.selectbox(
+                "Images",
+                IMAGE_DPI_CHOICES,
+                format_func=lambda dpi: "Keep original resolution" if dpi is None else f"Downsample to {dpi} dpi",
+                disabled=not optimize_output
+            )
+            fast_web_view = st.checkbox(
+                "🌐 Fast web view (linearize)",
+                value=False,
+                disabled=linearization_backend() is None,
+                help="Lets browsers show the first page before the whole file has downloaded"
+                     if linearization_backend() else "Needs pikepdf installed on the server"
+            )
+            if selection_errors:
+                st.warning(f"⚠️ Fix the page selection for: {', '.join(selection_errors)}")
+            if st.button("🔀 Combine PDFs", type="primary", use_container_width=True, disabled=bool(selection_errors)):
                 try:
                     progress_bar = st.progress(0)
                     status_text = st.empty()
                     
                     with st.spinner("Combining PDFs..."):
-                        pdf_writer = PyPDF2.PdfWriter()
                         total_files = len(st.session_state.file_order)
+                        ordered_files = [uploaded_files[idx] for idx in st.session_state.file_order]
                         
-                        for i, idx in enumerate(st.session_state.file_order):
-                            status_text.text(f"Processing {uploaded_files[idx].name}...")
-                            progress_bar.progress((i + 1) / total_files)
-                            
-                            pdf_reader = PyPDF2.PdfReader(uploaded_files[idx])
-                            for page_num in range(len(pdf_reader.pages)):
-                                page = pdf_reader.pages[page_num]
-                                pdf_writer.add_page(page)
+                        # Inputs are parsed and validated concurrently before anything is written
+                        def show_validation(done, total, i):
+                            status_text.text(f"Validated {ordered_files[i].name} ({done}/{total})")
+                            progress_bar.progress(done / total * 0.5)
                         
-                        # Create temporary file
-                        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-                            pdf_writer.write(tmp_file)
-                            tmp_file_path = tmp_file.name
+                        checks = preflight_many(
+                            [
+                                (uploaded_files[idx].getvalue(), None, page_selection.get(idx))
+                                for idx in st.session_state.file_order
+                            ],
+                            progress=show_validation
+                        )
+                        failed = [(file, check) for file, check in zip(ordered_files, checks) if not check['ok']]
+                        if failed:
+                            progress_bar.empty()
+                            status_text.empty()
+                            for file, check in failed:
+                                st.error(f"❌ {file.name}: {check['error']}")
+                            st.info("Please remove or fix the files above and try again.")
+                            st.stop()
+                        for file, check in zip(ordered_files, checks):
+                            if check['repaired']:
+                                st.warning(f"🔧 {file.name} had a damaged cross-reference table and was repaired")
                         
-                        # Read the combined PDF
-                        with open(tmp_file_path, "rb") as file:
-                            pdf_data = file.read()
+                        def show_progress(i, total):
+                            status_text.text(f"Processing {ordered_files[i].name}...")
+                            progress_bar.progress(0.5 + (i + 1) / total * 0.5)
                         
-                        # Clean up
-                        os.unlink(tmp_file_path)
+                        # Written once into a buffer that only spills to disk for large results
+                        combined_pdf, merge_stats = merge_pdfs(
+                            [
+                                (merge_source(check, uploaded_files[idx]), page_selection.get(idx))
+                                for idx, check in zip(st.session_state.file_order, checks)
+                            ],
+                            progress=show_progress,
+                            deduplicate=deduplicate,
+                            outlines=add_outlines,
+                            titles=[os.path.splitext(file.name)[0] for file in ordered_files]
+                        )
                         
                         progress_bar.progress(1.0)
                         status_text.text("✅ PDFs combined successfully!")
                         
-                        # Count total pages in combined PDF
-                        combined_reader = PyPDF2.PdfReader(BytesIO(pdf_data))
-                        total_pages = len(combined_reader.pages)
+                        # Page count is known from the merge plan
+                        total_pages = merge_stats['pages']
                         
                         st.success(f"✅ Successfully combined {total_files} PDFs into 1 file with {total_pages} total pages!")
+                        st.caption(f"⏱️ {merge_stats['bytes'] / 1024 / 1024:.1f} MB written in {merge_stats['seconds']:.2f}s")
+                        if merge_stats['duplicates_removed']:
+                            st.info(
+                                f"🧬 {merge_stats['duplicates_removed']} shared resources written once, "
+                                f"saving {merge_stats['bytes_saved'] / 1024 / 1024:.2f} MB "
+                                f"(dedupe {merge_stats['dedupe_seconds']:.2f}s, write {merge_stats['write_seconds']:.2f}s)"
+                            )
+                        
+                        if optimize_output:
+                            status_text.text("Optimizing file size...")
+                            optimized_pdf, optimize_stats = optimize_pdf(combined_pdf, image_dpi=image_dpi)
+                            combined_pdf.close()
+                            combined_pdf = optimized_pdf
+                            st.caption(describe_savings(optimize_stats))
+                        
+                        if fast_web_view:
+                            status_text.text("Linearizing for fast web view...")
+                            linear_pdf, linear_stats = linearize_pdf(combined_pdf)
+                            combined_pdf.close()
+                            combined_pdf = linear_pdf
+                            st.caption(
+                                f"🌐 Linearized: {linear_stats['input_bytes'] / 1024 / 1024:.1f} MB → "
+                                f"{linear_stats['output_bytes'] / 1024 / 1024:.1f} MB in {linear_stats['seconds']:.2f}s"
+                            )
                         
                         # Download button
                         st.download_button(
                             label="📥 Download Combined PDF",
-                            data=pdf_data,
+                            data=combined_pdf.read(),
                             file_name="combined.pdf",
                             mime="application/pdf",
                             use_container_width=True
                         )
+                        combined_pdf.close()
                         
                 except Exception as e:
                     st.error(f"❌ An error occurred: {str(e)}")
@@ -221,8 +311,9 @@ else:
             1. **Drag & Drop** or **Browse** to upload PDF files
             2. **Preview** each PDF's information
             3. **Reorder** files using the position selectors
-            4. **Combine** all PDFs into one
-            5. **Download** your combined PDF
+            4. **Choose pages** per file if needed (e.g. `1-3`, `last`)
+            5. **Combine** all PDFs into one
+            6. **Download** your combined PDF
             """
         )
     
@@ -233,8 +324,11 @@ else:
             - 📥 Drag & drop file upload
             - 👁️ Preview PDF information
             - 🔄 Easy file reordering
+            - ✂️ Pick page ranges from each file
+            - 📑 Bookmarks for every file, with their own bookmarks kept
             - 📊 Page count display
             - 📈 Progress tracking
+            - 🧬 Smaller output when inputs share fonts and logos
             """
         )
     
@@ -1,11 +1,10 @@
 import streamlit as st
 import PyPDF2
+import shutil
 import tempfile
-import os
-import string
-import secrets
-from io import BytesIO
+import time
 import zipfile
+from pdf_tools.encrypt import ENCRYPTION_ALGORITHMS, crypto_backend, encrypt_many, generate_secure_password, write_zip
 
 st.set_page_config(page_title="PDF Encryptor", page_icon="🔒", layout="wide")
 
@@ -16,37 +15,6 @@ if not st.session_state.get("password_correct", False):
         st.switch_page("app.py")
     st.stop()
 
-def generate_secure_password(length=16):
-    """Generate a cryptographically secure random password"""
-    alphabet = string.ascii_letters + string.digits + string.punctuation
-    # Remove problematic characters for better compatibility
-    alphabet = alphabet.replace('"', '').replace("'", '').replace('\\', '')
-    password = ''.join(secrets.choice(alphabet) for _ in range(length))
-    return password
-
-def encrypt_pdf(pdf_file, password):
-    """Encrypt a PDF file with the given password"""
-    try:
-        pdf_file.seek(0)
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        pdf_writer = PyPDF2.PdfWriter()
-        
-        # Copy all pages to writer
-        for page_num in range(len(pdf_reader.pages)):
-            pdf_writer.add_page(pdf_reader.pages[page_num])
-        
-        # Encrypt the PDF
-        pdf_writer.encrypt(password, password, use_128bit=True)
-        
-        # Write to bytes
-        output_stream = BytesIO()
-        pdf_writer.write(output_stream)
-        output_stream.seek(0)
-        
-        return output_stream.getvalue()
-    except Exception as e:
-        return None, str(e)
-
 def get_pdf_info(pdf_file):
     """Extract basic information from PDF file"""
     pdf_file.seek(0)
@@ -58,6 +26,14 @@ def get_pdf_info(pdf_file):
     except Exception as e:
         return {"pages": 0, "error": str(e)}
 
+# Each download button keeps its own copy in memory, on top of the ZIP; past
+# this many encrypted bytes the files are only offered inside the ZIP
+INDIVIDUAL_DOWNLOAD_BYTES = 50 * 1024 * 1024
+
+def read_file(path):
+    with open(path, "rb") as f:
+        return f.read()
+
 # Main page
 st.title("🔒 PDF Encryptor")
 st.markdown("Protect your PDF files with strong password encryption. Each file will receive a unique, randomly generated password.")
@@ -79,6 +55,21 @@ with st.expander("⚙️ Password Settings", expanded=False):
             value=True,
             help="Include special characters like !@#$%"
         )
+    algorithm = st.selectbox(
+        "Encryption",
+        ENCRYPTION_ALGORITHMS,
+        format_func=lambda name: {
+            "AES-256": "AES-256 (recommended, Acrobat X and later)",
+            "AES-128": "AES-128 (Acrobat 7 and later)",
+            "RC4-128": "RC4-128 (legacy viewers only)",
+        }[name],
+        help="AES-256 is the strongest; older algorithms are only for very old PDF readers"
+    )
+    store_uncompressed = st.checkbox(
+        "Store PDFs uncompressed in the ZIP",
+        value=True,
+        help="Encrypted PDFs barely compress, so storing them makes the ZIP much faster to build"
+    )
 
 # File uploader
 uploaded_files = st.file_uploader(
@@ -130,152 +121,181 @@ if uploaded_files:
         passwords = {}
         errors = []
         
-        for i, file in enumerate(uploaded_files):
-            status_text.text(f"Encrypting {file.name}...")
-            progress_bar.progress((i + 1) / len(uploaded_files))
-            
-            # Generate unique password for this file
-            if include_symbols:
-                password = generate_secure_password(password_length)
-            else:
-                alphabet = string.ascii_letters + string.digits
-                password = ''.join(secrets.choice(alphabet) for _ in range(password_length))
-            
-            # Encrypt the PDF
-            encrypted_data = encrypt_pdf(file, password)
+        # Passwords are chosen up front so the list always matches the files
+        file_passwords = [generate_secure_password(password_length, include_symbols) for _ in uploaded_files]
+        
+        def show_progress(done, total, i):
+            status_text.text(f"Encrypted {uploaded_files[i].name} ({done}/{total})")
+            progress_bar.progress(done / total)
+        
+        # Files are encrypted in parallel worker processes for large batches and
+        # written to a temporary folder as they finish, not held in memory
+        output_dir = tempfile.mkdtemp(prefix="encrypted_pdfs_")
+        try:
+            start_time = time.perf_counter()
+            results = encrypt_many(
+                [(file.getvalue(), password) for file, password in zip(uploaded_files, file_passwords)],
+                progress=show_progress,
+                algorithm=algorithm,
+                output_dir=output_dir
+            )
+            elapsed = time.perf_counter() - start_time
             
-            if encrypted_data:
+            file_timings = []
+            for file, password, result in zip(uploaded_files, file_passwords, results):
+                if not result["ok"]:
+                    print(f"Could not encrypt {file.name}: {result['error']}")
+                    errors.append(file.name)
+                    continue
+                
                 encrypted_files.append({
                     "name": file.name.replace(".pdf", "_encrypted.pdf"),
-                    "data": encrypted_data,
+                    "path": result["path"],
+                    "bytes": result["bytes"],
                     "original_name": file.name
                 })
                 passwords[file.name] = password
-            else:
-                errors.append(file.name)
-        
-        progress_bar.progress(1.0)
-        status_text.text("✅ Encryption complete!")
-        
-        if encrypted_files:
-            st.success(f"🎉 Successfully encrypted {len(encrypted_files)} file(s)!")
+                file_timings.append((file.name, result["seconds"]))
             
-            # Display passwords
-            st.markdown("---")
-            st.subheader("🔑 Generated Passwords")
-            st.warning("⚠️ **IMPORTANT**: Save these passwords! You'll need them to open the encrypted PDFs.")
-            st.info("💡 **Tip**: Click on any password field below and press Ctrl+A (or Cmd+A on Mac) to select all, then Ctrl+C to copy.")
+            progress_bar.progress(1.0)
+            status_text.text("✅ Encryption complete!")
             
-            # Create a text summary of passwords
-            password_summary = "PDF ENCRYPTION PASSWORDS\n" + "="*50 + "\n\n"
-            for original_name, pwd in passwords.items():
-                password_summary += f"File: {original_name}\nPassword: {pwd}\n\n"
+            if encrypted_files:
+                st.success(f"🎉 Successfully encrypted {len(encrypted_files)} file(s)!")
+                total_mb = sum(file.size for file in uploaded_files) / 1024 / 1024
+                st.caption(
+                    f"⏱️ {len(uploaded_files)} files in {elapsed:.2f}s "
+                    f"({len(uploaded_files) / elapsed:.1f} files/s, {total_mb / elapsed:.1f} MB/s) · "
+                    f"{algorithm} via {crypto_backend()[0]}"
+                )
+                with st.expander("⏱️ Time per file"):
+                    for name, seconds in file_timings:
+                        st.text(f"{name}: {seconds * 1000:.0f} ms")
                 
-            # Display passwords in two formats for easy copying
-            
-            # Format 1: Individual password fields
-            st.markdown("##### 📋 Individual Passwords (click field and Ctrl+A then Ctrl+C to copy)")
-            password_container = st.container()
-            with password_container:
-                for idx, (original_name, pwd) in enumerate(passwords.items()):
-                    col1, col2 = st.columns([3, 2])
-                    with col1:
-                        st.markdown(f"**{original_name}**")
-                    with col2:
-                        # Create a text input with the password for easy copying
-                        st.text_input(
-                            "Password",
-                            value=pwd,
-                            key=f"pwd_display_{idx}",
-                            label_visibility="collapsed",
-                            help="Click to select all, then Ctrl+C (or Cmd+C) to copy"
-                        )
-            
-            # Format 2: All passwords in one text area for bulk copying
-            with st.expander("📄 All Passwords (for bulk copying)"):
-                all_passwords_text = ""
-                for original_name, pwd in passwords.items():
-                    all_passwords_text += f"{original_name}: {pwd}\n"
+                # Display passwords
+                st.markdown("---")
+                st.subheader("🔑 Generated Passwords")
+                st.warning("⚠️ **IMPORTANT**: Save these passwords! You'll need them to open the encrypted PDFs.")
+                st.info("💡 **Tip**: Click on any password field below and press Ctrl+A (or Cmd+A on Mac) to select all, then Ctrl+C to copy.")
                 
-                st.text_area(
-                    "All Passwords",
-                    value=all_passwords_text,
-                    height=min(300, len(passwords) * 30),
-                    label_visibility="collapsed",
-                    help="Select all text with Ctrl+A (or Cmd+A) then copy with Ctrl+C (or Cmd+C)"
-                )
-            
-            st.markdown("---")
-            
-            # Download options
-            st.subheader("📥 Download Options")
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                # Download passwords as text file
-                st.download_button(
-                    label="📝 Download Password List",
-                    data=password_summary,
-                    file_name="pdf_passwords.txt",
-                    mime="text/plain",
-                    use_container_width=True,
-                    help="Download a text file with all passwords"
-                )
-            
-            with col2:
-                # Create and download ZIP file if multiple files
-                if len(encrypted_files) > 1:
-                    # Create ZIP file in memory
-                    zip_buffer = BytesIO()
-                    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                        # Add encrypted PDFs
-                        for ef in encrypted_files:
-                            zip_file.writestr(ef["name"], ef["data"])
-                        # Add password file
-                        zip_file.writestr("passwords.txt", password_summary)
+                # Create a text summary of passwords
+                password_summary = "PDF ENCRYPTION PASSWORDS\n" + "="*50 + "\n\n"
+                for original_name, pwd in passwords.items():
+                    password_summary += f"File: {original_name}\nPassword: {pwd}\n\n"
                     
-                    zip_buffer.seek(0)
+                # Display passwords in two formats for easy copying
+                
+                # Format 1: Individual password fields
+                st.markdown("##### 📋 Individual Passwords (click field and Ctrl+A then Ctrl+C to copy)")
+                password_container = st.container()
+                with password_container:
+                    for idx, (original_name, pwd) in enumerate(passwords.items()):
+                        col1, col2 = st.columns([3, 2])
+                        with col1:
+                            st.markdown(f"**{original_name}**")
+                        with col2:
+                            # Create a text input with the password for easy copying
+                            st.text_input(
+                                "Password",
+                                value=pwd,
+                                key=f"pwd_display_{idx}",
+                                label_visibility="collapsed",
+                                help="Click to select all, then Ctrl+C (or Cmd+C) to copy"
+                            )
+                
+                # Format 2: All passwords in one text area for bulk copying
+                with st.expander("📄 All Passwords (for bulk copying)"):
+                    all_passwords_text = ""
+                    for original_name, pwd in passwords.items():
+                        all_passwords_text += f"{original_name}: {pwd}\n"
                     
+                    st.text_area(
+                        "All Passwords",
+                        value=all_passwords_text,
+                        height=min(300, len(passwords) * 30),
+                        label_visibility="collapsed",
+                        help="Select all text with Ctrl+A (or Cmd+A) then copy with Ctrl+C (or Cmd+C)"
+                    )
+                
+                st.markdown("---")
+                
+                # Download options
+                st.subheader("📥 Download Options")
+                
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    # Download passwords as text file
                     st.download_button(
-                        label="📦 Download All (ZIP)",
-                        data=zip_buffer.getvalue(),
-                        file_name="encrypted_pdfs.zip",
-                        mime="application/zip",
+                        label="📝 Download Password List",
+                        data=password_summary,
+                        file_name="pdf_passwords.txt",
+                        mime="text/plain",
                         use_container_width=True,
-                        help="Download all encrypted PDFs and passwords in a ZIP file"
+                        help="Download a text file with all passwords"
                     )
-                else:
-                    # Single file download
-                    st.download_button(
-                        label="📄 Download Encrypted PDF",
-                        data=encrypted_files[0]["data"],
-                        file_name=encrypted_files[0]["name"],
-                        mime="application/pdf",
-                        use_container_width=True
+                
+                with col2:
+                    # Create and download ZIP file if multiple files
+                    if len(encrypted_files) > 1:
+                        # The ZIP is streamed from the encrypted files on disk and
+                        # spills to a temporary file once it gets large
+                        zip_buffer = write_zip(
+                            [(ef["name"], ef["path"]) for ef in encrypted_files]
+                            + [("passwords.txt", password_summary.encode("utf-8"))],
+                            compression=zipfile.ZIP_STORED if store_uncompressed else zipfile.ZIP_DEFLATED
+                        )
+                        zip_data = zip_buffer.read()
+                        zip_buffer.close()
+                        
+                        st.download_button(
+                            label="📦 Download All (ZIP)",
+                            data=zip_data,
+                            file_name="encrypted_pdfs.zip",
+                            mime="application/zip",
+                            use_container_width=True,
+                            help="Download all encrypted PDFs and passwords in a ZIP file"
+                        )
+                    else:
+                        # Single file download
+                        st.download_button(
+                            label="📄 Download Encrypted PDF",
+                            data=read_file(encrypted_files[0]["path"]),
+                            file_name=encrypted_files[0]["name"],
+                            mime="application/pdf",
+                            use_container_width=True
+                        )
+                
+                # Individual file downloads
+                encrypted_bytes = sum(ef["bytes"] for ef in encrypted_files)
+                if len(encrypted_files) > 1 and encrypted_bytes > INDIVIDUAL_DOWNLOAD_BYTES:
+                    st.info(
+                        f"📦 The encrypted files add up to {encrypted_bytes / 1024 / 1024:.0f} MB, "
+                        f"so they are only offered in the ZIP above"
                     )
+                elif len(encrypted_files) > 1:
+                    st.markdown("---")
+                    st.subheader("📄 Individual Downloads")
+                    
+                    cols_per_row = 3
+                    for i in range(0, len(encrypted_files), cols_per_row):
+                        cols = st.columns(cols_per_row)
+                        for j in range(min(cols_per_row, len(encrypted_files) - i)):
+                            with cols[j]:
+                                ef = encrypted_files[i + j]
+                                st.download_button(
+                                    label=f"📥 {ef['original_name']}",
+                                    data=read_file(ef["path"]),
+                                    file_name=ef["name"],
+                                    mime="application/pdf",
+                                    key=f"dl_{i}_{j}"
+                                )
             
-            # Individual file downloads
-            if len(encrypted_files) > 1:
-                st.markdown("---")
-                st.subheader("📄 Individual Downloads")
-                
-                cols_per_row = 3
-                for i in range(0, len(encrypted_files), cols_per_row):
-                    cols = st.columns(cols_per_row)
-                    for j in range(min(cols_per_row, len(encrypted_files) - i)):
-                        with cols[j]:
-                            ef = encrypted_files[i + j]
-                            st.download_button(
-                                label=f"📥 {ef['original_name']}",
-                                data=ef["data"],
-                                file_name=ef["name"],
-                                mime="application/pdf",
-                                key=f"dl_{i}_{j}"
-                            )
-        
-        if errors:
-            st.error(f"❌ Failed to encrypt {len(errors)} file(s): {', '.join(errors)}")
+            if errors:
+                st.error(f"❌ Failed to encrypt {len(errors)} file(s): {', '.join(errors)}")
+        finally:
+            # Download buttons have their own copies by now; an error must not leave the files behind
+            shutil.rmtree(output_dir, ignore_errors=True)
 
 else:
     # Instructions
@@ -297,7 +317,7 @@ else:
         st.markdown("""
         ### 🛡️ Security Features:
         - 🎲 Cryptographically secure random passwords
-        - 🔐 128-bit AES encryption
+        - 🔐 AES-256 encryption
         - 🔑 Unique password for each file
         - 📋 Password list download
         - 📦 Bulk download as ZIP
@@ -1,24 +1,19 @@
 import streamlit as st
-import os
 from datetime import datetime
 from PIL import Image, ImageDraw, ImageFont
-import io
 import base64
-from pypdf import PdfReader, PdfWriter
-from reportlab.pdfgen import canvas
+from pypdf import PdfReader
 from reportlab.lib.pagesizes import letter
-import tempfile
 try:
     import pdf2image
     PDF2IMAGE_AVAILABLE = True
 except:
     PDF2IMAGE_AVAILABLE = False
 
-try:
-    import fitz  # PyMuPDF
-    PYMUPDF_AVAILABLE = True
-except:
-    PYMUPDF_AVAILABLE = False
+from pdf_tools.optimize import IMAGE_DPI_CHOICES, describe_savings, optimize_pdf
+from pdf_tools.signature import add_signature_to_pdf
+from pdf_tools.thumbnails import ThumbnailRenderer, PYMUPDF_AVAILABLE
+from pdf_tools.thumbnail_cache import get_thumbnail_cache
 from streamlit_drawable_canvas import st_canvas
 import numpy as np
 
@@ -44,87 +39,6 @@ if 'selected_page' not in st.session_state:
 if 'add_date' not in st.session_state:
     st.session_state.add_date = True
 
-def create_signature_overlay(signature_image, date_text, position, page_size, add_date=True, sig_width=150, sig_height=50):
-    """Create a PDF overlay with signature and optionally date"""
-    packet = io.BytesIO()
-    
-    # Create a new PDF with ReportLab
-    c = canvas.Canvas(packet, pagesize=page_size)
-    
-    # Save signature image to temp file
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.png') as tmp_file:
-        signature_image.save(tmp_file.name, 'PNG')
-        tmp_file_path = tmp_file.name
-    
-    try:
-        sig_x, sig_y = position
-        c.drawImage(tmp_file_path, sig_x, sig_y, width=sig_width, height=sig_height, preserveAspectRatio=True)
-        
-        # Add date below signature if requested
-        if add_date:
-            c.setFont("Helvetica", 10)
-            c.drawString(sig_x + sig_width * 0.3, sig_y - 10, date_text)
-    finally:
-        # Clean up temp file
-        os.unlink(tmp_file_path)
-    
-    c.save()
-    
-    # Move to the beginning of the BytesIO buffer
-    packet.seek(0)
-    return PdfReader(packet)
-
-def add_signature_to_pdf(pdf_file, signature_image, position, selected_page=1, add_date=True, sig_dimensions=(150, 50), password=None):
-    """Add signature and optionally date to specified page of PDF"""
-    # Read the existing PDF
-    reader = PdfReader(pdf_file)
-    
-    # Handle encrypted PDFs
-    if reader.is_encrypted and password:
-        if not reader.decrypt(password):
-            raise Exception("Failed to decrypt PDF with provided password")
-    
-    writer = PdfWriter()
-    
-    # Get current date in dd mm yyyy format
-    date_text = datetime.now().strftime("%d %m %Y")
-    
-    # Process each page
-    for page_num in range(len(reader.pages)):
-        page = reader.pages[page_num]
-        
-        # Add signature to the selected page (convert from 1-based to 0-based indexing)
-        if page_num == selected_page - 1:
-            # Get page dimensions
-            page_box = page.mediabox
-            page_width = float(page_box.width)
-            page_height = float(page_box.height)
-            
-            # Create overlay with signature and optionally date
-            overlay = create_signature_overlay(
-                signature_image, 
-                date_text, 
-                position,
-                (page_width, page_height),
-                add_date,
-                sig_dimensions[0],
-                sig_dimensions[1]
-            )
-            
-            # Merge the overlay with the page
-            overlay_page = overlay.pages[0]
-            page.merge_page(overlay_page)
-        
-        # Add the page to writer (signed or unsigned)
-        writer.add_page(page)
-    
-    # Write to bytes
-    output_bytes = io.BytesIO()
-    writer.write(output_bytes)
-    output_bytes.seek(0)
-    
-    return output_bytes
-
 def pdf_to_image(pdf_file, page_num=1, password=None):
     """Convert specified page of PDF to image for preview"""
     # Read the PDF bytes
@@ -134,33 +48,23 @@ def pdf_to_image(pdf_file, page_num=1, password=None):
     # Try PyMuPDF first (doesn't require poppler)
     if PYMUPDF_AVAILABLE:
         try:
-            # Open PDF with PyMuPDF
-            pdf_doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-            
-            # Handle password if needed
-            if pdf_doc.is_encrypted:
-                if password:
-                    if not pdf_doc.authenticate(password):
-                        st.error("🔒 Incorrect password for PDF")
-                        return None
-                else:
-                    st.error("🔒 PDF is encrypted. Please provide password above.")
-                    return None
-            
-            # Get the specified page (0-indexed in PyMuPDF)
-            page = pdf_doc[page_num - 1]
-            
-            # Render page to image
-            mat = fitz.Matrix(2, 2)  # 2x zoom for better quality
-            pix = page.get_pixmap(matrix=mat)
-            
-            # Convert to PIL Image
-            img_data = pix.pil_tobytes(format="PNG")
-            img = Image.open(io.BytesIO(img_data))
-            
-            pdf_doc.close()
-            return img
-            
+            # Render through the shared thumbnail cache so slider moves reuse the page
+            with ThumbnailRenderer(
+                pdf_bytes, password, zoom=2, cache=get_thumbnail_cache(), image_format="JPEG", quality=90
+            ) as renderer:
+                # Decoded here because the signature is pasted onto the preview
+                image = renderer.render_image(page_num - 1)
+            if image is not None:
+                return image
+            # The renderer logs the failure and returns None rather than raising
+            st.error(f"Error with PyMuPDF: could not render page {page_num}")
+            # Fall through to try pdf2image
+        except ValueError:
+            if password:
+                st.error("🔒 Incorrect password for PDF")
+            else:
+                st.error("🔒 PDF is encrypted. Please provide password above.")
+            return None
         except Exception as e:
             st.error(f"Error with PyMuPDF: {str(e)}")
             # Fall through to try pdf2image
@@ -298,6 +202,18 @@ with col1:
         value=st.session_state.add_date,
         help="Automatically add today's date below your signature"
     )
+    optimize_output = st.checkbox(
+        "🗜️ Optimize file size",
+        value=False,
+        disabled=not PYMUPDF_AVAILABLE,
+        help="Recompresses streams, packs objects and drops unused ones; optionally downsamples images"
+    )
+    image_dpi = st.selectbox(
+        "Images",
+        IMAGE_DPI_CHOICES,
+        format_func=lambda dpi: "Keep original resolution" if dpi is None else f"Downsample to {dpi} dpi",
+        disabled=not optimize_output
+    )
 
 with col2:
     # Check if we have a signature (either uploaded or drawn)
@@ -456,6 +372,9 @@ with col2:
                     
                     # Offer download
                     st.success("✅ PDF signed successfully!")
+                    if optimize_output:
+                        signed_pdf, optimize_stats = optimize_pdf(signed_pdf, image_dpi=image_dpi)
+                        st.caption(describe_savings(optimize_stats))
                     
                     # Get original filename
                     original_name = uploaded_pdf.name
@@ -463,7 +382,7 @@ with col2:
                     
                     st.download_button(
                         label="📥 Download Signed PDF",
-                        data=signed_pdf.getvalue(),
+                        data=signed_pdf.read(),
                         file_name=signed_name,
                         mime="application/pdf",
                         use_container_width=True
@@ -547,13 +466,16 @@ with col2:
                     )
                     
                     st.success("✅ PDF signed successfully!")
+                    if optimize_output:
+                        signed_pdf, optimize_stats = optimize_pdf(signed_pdf, image_dpi=image_dpi)
+                        st.caption(describe_savings(optimize_stats))
                     
                     original_name = uploaded_pdf.name
                     signed_name = original_name.replace('.pdf', '_signed.pdf')
                     
                     st.download_button(
                         label="📥 Download Signed PDF",
-                        data=signed_pdf.getvalue(),
+                        data=signed_pdf.read(),
                         file_name=signed_name,
                         mime="application/pdf",
                         use_container_width=True
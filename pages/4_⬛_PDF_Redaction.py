@@ -6,14 +6,10 @@ from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 import tempfile
 import os
-try:
-    import fitz  # PyMuPDF for text extraction and rendering
-    PYMUPDF_AVAILABLE = True
-except:
-    PYMUPDF_AVAILABLE = False
 from PIL import Image, ImageDraw
 import zipfile
 from datetime import datetime
+from pdf_tools.redact import get_analysis_cache
 
 st.set_page_config(page_title="PDF Redaction", page_icon="⬛", layout="wide")
 
@@ -44,289 +40,34 @@ if 'detected_items' not in st.session_state:
 if 'manual_redactions' not in st.session_state:
     st.session_state.manual_redactions = []
 
-def detect_tfn(text, abn_positions=None):
-    """Detect potential TFN patterns in text, excluding those that are part of ABNs"""
-    patterns = []
-    
-    # TFN patterns: 9 digits in various formats
-    # Use negative lookbehind and lookahead to avoid matching parts of longer numbers
-    tfn_patterns = [
-        r'(?<!\d)\d{3}[\s-]?\d{3}[\s-]?\d{3}(?!\d)',  # XXX XXX XXX or XXX-XXX-XXX (not part of longer number)
-        r'(?<!\d)\d{9}(?!\d)',  # XXXXXXXXX (not part of longer number)
-    ]
-    
-    # Also look for context clues
-    context_patterns = [
-        r'(?i)(?:tfn|tax\s*file\s*number|tax\s*file\s*no)[:\s]*(\d{3}[\s-]?\d{3}[\s-]?\d{3}|\d{9})',
-    ]
-    
-    found_items = []
-    seen_positions = set()  # Track positions to avoid duplicates
-    
-    for pattern in tfn_patterns:
-        matches = re.finditer(pattern, text)
-        for match in matches:
-            # Validate it looks like a TFN (basic validation)
-            digits = re.sub(r'\D', '', match.group())
-            if len(digits) == 9 and match.start() not in seen_positions:
-                # Check if this TFN is part of an ABN (overlaps with ABN positions)
-                is_part_of_abn = False
-                if abn_positions:
-                    for abn_start, abn_end in abn_positions:
-                        # Check if TFN position overlaps with ABN position
-                        if (match.start() >= abn_start and match.start() < abn_end) or \
-                           (match.end() > abn_start and match.end() <= abn_end):
-                            is_part_of_abn = True
-                            break
-                
-                if not is_part_of_abn:
-                    # Additional check: Look for 2 more digits before this position
-                    # to catch ABNs with different spacing
-                    before_text = text[max(0, match.start()-10):match.start()]
-                    if re.search(r'\d{2}[\s-]?$', before_text):
-                        # Likely part of an ABN, skip it
-                        continue
-                    
-                    found_items.append({
-                        'type': 'TFN',
-                        'text': match.group(),
-                        'start': match.start(),
-                        'end': match.end(),
-                        'digits': digits  # Store normalized digits for better matching
-                    })
-                    seen_positions.add(match.start())
-    
-    for pattern in context_patterns:
-        matches = re.finditer(pattern, text)
-        for match in matches:
-            if match.start() not in seen_positions:
-                digits = re.sub(r'\D', '', match.group())
-                # Only add if it's actually 9 digits (not 11)
-                if len(digits) == 9:
-                    found_items.append({
-                        'type': 'TFN (with context)',
-                        'text': match.group(),
-                        'start': match.start(),
-                        'end': match.end(),
-                        'digits': digits
-                    })
-                    seen_positions.add(match.start())
-    
-    return found_items
-
-def detect_abn(text):
-    """Detect potential ABN patterns in text"""
-    patterns = []
-    
-    # ABN patterns: 11 digits in various formats
-    # More flexible patterns to catch different spacing
-    abn_patterns = [
-        r'\b\d{2}\s+\d{3}\s+\d{3}\s+\d{3}\b',  # XX XXX XXX XXX (with spaces)
-        r'\b\d{2}[\s-]?\d{3}[\s-]?\d{3}[\s-]?\d{3}\b',  # XX XXX XXX XXX or XX-XXX-XXX-XXX
-        r'\b\d{11}\b',  # XXXXXXXXXXX
-    ]
-    
-    context_patterns = [
-        r'(?i)(?:abn|australian\s*business\s*number|a\.b\.n\.)[:\s]*(\d{2}[\s-]?\d{3}[\s-]?\d{3}[\s-]?\d{3}|\d{11})',
-    ]
-    
-    found_items = []
-    seen_positions = set()  # Track positions to avoid duplicates
-    
-    for pattern in abn_patterns:
-        matches = re.finditer(pattern, text)
-        for match in matches:
-            digits = re.sub(r'\D', '', match.group())
-            if len(digits) == 11:
-                # Check if we've already found an ABN at this position
-                if match.start() not in seen_positions:
-                    found_items.append({
-                        'type': 'ABN',
-                        'text': match.group(),
-                        'start': match.start(),
-                        'end': match.end(),
-                        'digits': digits  # Store normalized digits for better matching
-                    })
-                    seen_positions.add(match.start())
-    
-    for pattern in context_patterns:
-        matches = re.finditer(pattern, text)
-        for match in matches:
-            if match.start() not in seen_positions:
-                found_items.append({
-                    'type': 'ABN (with context)',
-                    'text': match.group(),
-                    'start': match.start(),
-                    'end': match.end(),
-                    'digits': re.sub(r'\D', '', match.group())
-                })
-                seen_positions.add(match.start())
-    
-    return found_items
+def analysis_for(pdf_file):
+    """The shared parsed document for one upload, hashed once per upload"""
+    analysis_keys = st.session_state.setdefault('redaction_keys', {})
+    analysis = get_analysis_cache().get(pdf_file.getvalue(), analysis_keys.get(pdf_file.file_id))
+    analysis_keys[pdf_file.file_id] = analysis.key
+    return analysis
 
-def detect_email(text):
-    """Detect email addresses in text"""
-    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-    matches = re.finditer(email_pattern, text)
-    
-    found_items = []
-    for match in matches:
-        found_items.append({
-            'type': 'Email',
-            'text': match.group(),
-            'start': match.start(),
-            'end': match.end()
-        })
-    
-    return found_items
-
-def detect_phone(text):
-    """Detect Australian phone numbers in text"""
-    phone_patterns = [
-        r'(?:\+61|0)[2-9]\d{8}',  # Australian mobile/landline
-        r'\(0[2-9]\)\s*\d{4}[\s-]?\d{4}',  # (0X) XXXX XXXX
-        r'0[2-9][\s-]?\d{4}[\s-]?\d{4}',  # 0X XXXX XXXX
-    ]
-    
-    found_items = []
-    for pattern in phone_patterns:
-        matches = re.finditer(pattern, text)
-        for match in matches:
-            found_items.append({
-                'type': 'Phone',
-                'text': match.group(),
-                'start': match.start(),
-                'end': match.end()
-            })
-    
-    return found_items
+def forget_removed_uploads(files):
+    """Close the parsed documents of uploads that were removed from the uploader"""
+    analysis_keys = st.session_state.setdefault('redaction_keys', {})
+    current = {pdf_file.file_id for pdf_file in files}
+    for file_id in [file_id for file_id in analysis_keys if file_id not in current]:
+        get_analysis_cache().discard(analysis_keys.pop(file_id))
 
-def detect_custom_pattern(text, pattern_str):
-    """Detect custom regex pattern in text"""
+def redact_file(pdf_file, redaction_items):
+    """Create a redacted copy of one upload, reporting failures in the UI"""
+    analysis = None
     try:
-        pattern = re.compile(pattern_str, re.IGNORECASE)
-        matches = pattern.finditer(text)
-        
-        found_items = []
-        for match in matches:
-            found_items.append({
-                'type': 'Custom',
-                'text': match.group(),
-                'start': match.start(),
-                'end': match.end()
-            })
-        return found_items
-    except re.error:
-        return []
-
-def extract_text_from_pdf(pdf_file):
-    """Extract text from PDF using PyMuPDF"""
-    if not PYMUPDF_AVAILABLE:
-        st.error("PyMuPDF is required for text extraction")
-        return []
-    
-    pdf_bytes = pdf_file.read()
-    pdf_file.seek(0)
-    
-    try:
-        pdf_doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-        
-        pages_text = []
-        for page_num in range(len(pdf_doc)):
-            page = pdf_doc[page_num]
-            text = page.get_text()
-            pages_text.append(text)
-        
-        pdf_doc.close()
-        return pages_text
-    except Exception as e:
-        st.error(f"Error extracting text: {str(e)}")
-        return []
-
-def create_redacted_pdf(pdf_file, redaction_items, pages_to_redact=None):
-    """Create a redacted version of the PDF"""
-    if not PYMUPDF_AVAILABLE:
-        st.error("PyMuPDF is required for redaction")
-        return None
-    
-    pdf_bytes = pdf_file.read()
-    pdf_file.seek(0)
-    
-    try:
-        # Open PDF with PyMuPDF
-        pdf_doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-        
-        # Group redaction items by page
-        redactions_by_page = {}
-        for item in redaction_items:
-            page_num = item.get('page', 0)
-            if pages_to_redact is None or page_num in pages_to_redact:
-                if page_num not in redactions_by_page:
-                    redactions_by_page[page_num] = []
-                redactions_by_page[page_num].append(item)
-        
-        # Apply redactions
-        for page_num, items in redactions_by_page.items():
-            if page_num < len(pdf_doc):
-                page = pdf_doc[page_num]
-                
-                for item in items:
-                    # Search for text and get its location
-                    text_instances = page.search_for(item['text'])
-                    
-                    # If exact match doesn't work, try searching for normalized digits
-                    if not text_instances and 'digits' in item:
-                        # For ABN/TFN, try to find the digits in various formats
-                        digits = item['digits']
-                        
-                        # Try different ABN formats if it's 11 digits
-                        if len(digits) == 11:
-                            # Try XX XXX XXX XXX format
-                            formatted = f"{digits[:2]} {digits[2:5]} {digits[5:8]} {digits[8:]}"
-                            text_instances = page.search_for(formatted)
-                            
-                            if not text_instances:
-                                # Try XXXXXXXXXXX format
-                                text_instances = page.search_for(digits)
-                            
-                            if not text_instances:
-                                # Try XX-XXX-XXX-XXX format
-                                formatted = f"{digits[:2]}-{digits[2:5]}-{digits[5:8]}-{digits[8:]}"
-                                text_instances = page.search_for(formatted)
-                        
-                        # Try different TFN formats if it's 9 digits
-                        elif len(digits) == 9:
-                            # Try XXX XXX XXX format
-                            formatted = f"{digits[:3]} {digits[3:6]} {digits[6:]}"
-                            text_instances = page.search_for(formatted)
-                            
-                            if not text_instances:
-                                # Try XXXXXXXXX format
-                                text_instances = page.search_for(digits)
-                            
-                            if not text_instances:
-                                # Try XXX-XXX-XXX format
-                                formatted = f"{digits[:3]}-{digits[3:6]}-{digits[6:]}"
-                                text_instances = page.search_for(formatted)
-                    
-                    # Add redaction annotation for each instance
-                    for inst in text_instances:
-                        page.add_redact_annot(inst)
-                
-                # Apply the redactions (this makes them permanent)
-                page.apply_redactions()
-        
-        # Save to bytes
-        output = io.BytesIO()
-        pdf_doc.save(output)
-        pdf_doc.close()
-        
-        output.seek(0)
-        return output
-        
+        # Reuses the document and text layout parsed when the upload was scanned
+        analysis = analysis_for(pdf_file)
+        return analysis.redact(redaction_items)
     except Exception as e:
         st.error(f"Error creating redacted PDF: {str(e)}")
         return None
+    finally:
+        # The unredacted document and its text are not kept once redaction is done
+        if analysis is not None:
+            get_analysis_cache().discard(analysis.key)
 
 # Create two columns
 col1, col2 = st.columns([1, 1])
@@ -339,6 +80,7 @@ with col1:
         accept_multiple_files=True,
         help="Upload one or more PDF files for redaction"
     )
+    forget_removed_uploads(uploaded_file or [])
     
     if uploaded_file:
         # Handle multiple files
@@ -394,76 +136,15 @@ with col1:
                 
                 for file_idx, pdf_file in enumerate(files):
                     pdf_file.seek(0)
-                    pages_text = extract_text_from_pdf(pdf_file)
-                    
-                    file_detections = []
-                    for page_num, text in enumerate(pages_text):
-                        page_detections = []
-                        
-                        # Detect ABNs first to get their positions
-                        abn_positions = []
-                        if st.session_state.redaction_patterns['abn']:
-                            abns = detect_abn(text)
-                            for item in abns:
-                                item['page'] = page_num
-                                item['file'] = pdf_file.name
-                                item['file_idx'] = file_idx
-                                abn_positions.append((item['start'], item['end']))
-                            page_detections.extend(abns)
-                        else:
-                            # Even if not detecting ABNs for redaction, we need to know their positions
-                            # to avoid false TFN matches
-                            temp_abns = detect_abn(text)
-                            abn_positions = [(item['start'], item['end']) for item in temp_abns]
-                        
-                        # Now detect TFNs, passing ABN positions to avoid false matches
-                        if st.session_state.redaction_patterns['tfn']:
-                            tfns = detect_tfn(text, abn_positions)
-                            for item in tfns:
-                                item['page'] = page_num
-                                item['file'] = pdf_file.name
-                                item['file_idx'] = file_idx
-                            page_detections.extend(tfns)
-                        
-                        if st.session_state.redaction_patterns['email']:
-                            emails = detect_email(text)
-                            for item in emails:
-                                item['page'] = page_num
-                                item['file'] = pdf_file.name
-                                item['file_idx'] = file_idx
-                            page_detections.extend(emails)
-                        
-                        if st.session_state.redaction_patterns['phone']:
-                            phones = detect_phone(text)
-                            for item in phones:
-                                item['page'] = page_num
-                                item['file'] = pdf_file.name
-                                item['file_idx'] = file_idx
-                            page_detections.extend(phones)
-                        
-                        if st.session_state.redaction_patterns['custom'] and custom_pattern:
-                            custom_items = detect_custom_pattern(text, custom_pattern)
-                            for item in custom_items:
-                                item['page'] = page_num
-                                item['file'] = pdf_file.name
-                                item['file_idx'] = file_idx
-                            page_detections.extend(custom_items)
-                        
-                        file_detections.extend(page_detections)
-                    
-                    # Deduplicate detections for this file
-                    # Group by page, type, and normalized text to remove duplicates
-                    seen = set()
-                    unique_detections = []
-                    for item in file_detections:
-                        # Normalize the text (remove spaces/dashes for comparison)
-                        normalized = re.sub(r'[\s\-]', '', item['text'])
-                        key = (item['page'], item['type'].split(' ')[0], normalized)  # Use base type for grouping
-                        if key not in seen:
-                            seen.add(key)
-                            unique_detections.append(item)
-                    
-                    all_detections.extend(unique_detections)
+                    try:
+                        all_detections.extend(analysis_for(pdf_file).scan(
+                            st.session_state.redaction_patterns,
+                            custom_pattern,
+                            pdf_file.name,
+                            file_idx
+                        ))
+                    except Exception as e:
+                        st.error(f"Error extracting text: {str(e)}")
                 
                 st.session_state.detected_items = all_detections
                 
@@ -552,7 +233,7 @@ with col2:
                         file_items = [item for item in st.session_state.detected_items 
                                     if item['file'] == pdf_file.name]
                         
-                        redacted_pdf = create_redacted_pdf(pdf_file, file_items)
+                        redacted_pdf = redact_file(pdf_file, file_items)
                         
                         if redacted_pdf:
                             st.success("✅ Redaction complete!")
@@ -604,7 +285,7 @@ with col2:
                                             if item['file'] == pdf_file.name]
                                 
                                 if file_items:
-                                    redacted_pdf = create_redacted_pdf(pdf_file, file_items)
+                                    redacted_pdf = redact_file(pdf_file, file_items)
                                     
                                     if redacted_pdf:
                                         # Add redacted PDF to ZIP
@@ -1,17 +1,18 @@
 import streamlit as st
 import io
-from pypdf import PdfReader, PdfWriter
-try:
-    import fitz  # PyMuPDF for page preview
-    PYMUPDF_AVAILABLE = True
-except:
-    PYMUPDF_AVAILABLE = False
-from PIL import Image
-import tempfile
-import os
+from pypdf import PdfReader
+from pdf_tools.thumbnails import LazyThumbnails, PYMUPDF_AVAILABLE, THUMBNAIL_FORMATS, summarize_timings
+from pdf_tools.thumbnail_cache import get_thumbnail_cache
+from pdf_tools.linearize import linearization_backend, linearize_pdf
+from pdf_tools.optimize import IMAGE_DPI_CHOICES, describe_savings, optimize_pdf
+from pdf_tools.page_ops import PageEditLog, create_modified_pdf
+from pdf_tools.split import create_split_zip, default_base_name
 
 st.set_page_config(page_title="PDF Page Manager", page_icon="📑", layout="wide")
 
+# Split options shown in the UI and the engine mode each one uses
+SPLIT_MODE_LABELS = {"Page ranges": "ranges", "Every N pages": "every", "At bookmarks": "bookmarks"}
+
 # Check if user is authenticated
 if not st.session_state.get("password_correct", False):
     st.error("🔒 Please login from the Home page first")
@@ -20,110 +21,71 @@ if not st.session_state.get("password_correct", False):
     st.stop()
 
 st.title("📑 PDF Page Manager")
-st.markdown("Reorder, delete, or extract pages from your PDF with visual preview")
+st.markdown("Reorder, rotate, crop, delete, or extract pages from your PDF with visual preview")
 
 # Initialize session state
-if 'page_order' not in st.session_state:
-    st.session_state.page_order = []
-if 'deleted_pages' not in st.session_state:
-    st.session_state.deleted_pages = set()
-if 'pdf_pages' not in st.session_state:
-    st.session_state.pdf_pages = []
+if 'page_log' not in st.session_state:
+    st.session_state.page_log = None
 if 'current_file_name' not in st.session_state:
     st.session_state.current_file_name = None
+if 'thumbnails' not in st.session_state:
+    st.session_state.thumbnails = None
+if 'grid_page' not in st.session_state:
+    st.session_state.grid_page = 1
+if 'grid_page_size' not in st.session_state:
+    st.session_state.grid_page_size = 24
+if 'preview_settings' not in st.session_state:
+    st.session_state.preview_settings = {
+        'image_format': 'JPEG',
+        'quality': 75,
+        'max_dimension': 800
+    }
 
-def pdf_page_to_image(pdf_file, page_num, password=None):
-    """Convert a specific PDF page to image for preview"""
-    if not PYMUPDF_AVAILABLE:
-        return None
-    
-    try:
-        # Read the PDF bytes fresh each time
-        pdf_file.seek(0)
-        pdf_bytes = pdf_file.read()
-        pdf_file.seek(0)
-        
-        # Open with PyMuPDF
-        pdf_doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-        
-        # Handle password if needed
-        if pdf_doc.is_encrypted:
-            if password:
-                if not pdf_doc.authenticate(password):
-                    return None
-            else:
-                return None
-        
-        # Check page number is valid
-        if page_num >= len(pdf_doc):
-            pdf_doc.close()
-            return None
-        
-        # Get the page (0-indexed)
-        page = pdf_doc[page_num]
-        
-        # Render page to image with reasonable resolution
-        mat = fitz.Matrix(1.5, 1.5)  # 1.5x zoom for better quality but not too large
-        pix = page.get_pixmap(matrix=mat)
-        
-        # Convert to PIL Image
-        img_data = pix.pil_tobytes(format="PNG")
-        img = Image.open(io.BytesIO(img_data))
-        
-        pdf_doc.close()
-        return img
-        
-    except Exception as e:
-        # Don't show error for each page, just return None
-        print(f"Could not convert page {page_num + 1}: {str(e)}")
-        return None
-
-def extract_pages_info(pdf_file, password=None):
-    """Extract information about each page"""
+def load_page_log(pdf_file, password=None):
+    """Start an empty edit log for a PDF and set up on-demand previews"""
     pdf_file.seek(0)
-    reader = PdfReader(pdf_file)
-    
-    # Handle encrypted PDFs
-    if reader.is_encrypted and password:
-        if not reader.decrypt(password):
-            st.error("Failed to decrypt PDF with provided password")
-            return []
-    
-    pages_info = []
-    
-    for i in range(len(reader.pages)):
-        page_info = {
-            'page_num': i + 1,  # 1-indexed for display
-            'original_index': i,  # 0-indexed for processing
-            'preview': pdf_page_to_image(pdf_file, i, password)  # Pass file object directly
-        }
-        pages_info.append(page_info)
-    
-    return pages_info
-
-def create_modified_pdf(pdf_file, page_order, deleted_pages, password=None):
-    """Create a new PDF with reordered pages and deleted pages removed"""
+    pdf_bytes = pdf_file.read()
     pdf_file.seek(0)
-    reader = PdfReader(pdf_file)
-    
-    # Handle encrypted PDFs
-    if reader.is_encrypted and password:
-        if not reader.decrypt(password):
-            raise Exception("Failed to decrypt PDF with provided password")
     
-    writer = PdfWriter()
+    # Previews are rendered lazily per grid page, so only open the document here
+    open_thumbnails(pdf_bytes, password)
     
-    # Add pages in the new order, skipping deleted ones
-    for page_idx in page_order:
-        if page_idx not in deleted_pages:
-            writer.add_page(reader.pages[page_idx])
-    
-    # Write to bytes
-    output_bytes = io.BytesIO()
-    writer.write(output_bytes)
-    output_bytes.seek(0)
+    if st.session_state.thumbnails is not None:
+        num_pages = len(st.session_state.thumbnails)
+    else:
+        reader = PdfReader(io.BytesIO(pdf_bytes))
+        
+        # Handle encrypted PDFs
+        if reader.is_encrypted and password:
+            if not reader.decrypt(password):
+                st.error("Failed to decrypt PDF with provided password")
+                return None
+        num_pages = len(reader.pages)
     
-    return output_bytes
+    return PageEditLog(num_pages)
+
+def open_thumbnails(pdf_bytes, password=None):
+    """Open the on-demand preview renderer with the current preview settings"""
+    close_thumbnails()
+    if not PYMUPDF_AVAILABLE:
+        return
+    try:
+        st.session_state.thumbnails = LazyThumbnails(
+            pdf_bytes,
+            password,
+            zoom=1.5,
+            cache=get_thumbnail_cache(),
+            **st.session_state.preview_settings
+        )
+    except Exception as e:
+        # Previews are optional, pages can still be managed without them
+        print(f"Could not open PDF for previews: {str(e)}")
+
+def close_thumbnails():
+    """Release the preview document of the previously loaded file"""
+    if st.session_state.thumbnails is not None:
+        st.session_state.thumbnails.close()
+        st.session_state.thumbnails = None
 
 # Main UI
 col1, col2 = st.columns([1, 2])
@@ -137,14 +99,36 @@ with col1:
         help="Upload a PDF to reorder or delete pages"
     )
     
+    with st.expander("⚙️ Preview Settings", expanded=False):
+        # Previews are kept as compressed images and only decoded by the browser
+        settings = st.session_state.preview_settings
+        new_settings = {
+            'image_format': st.selectbox(
+                "Preview format",
+                options=[f for f in THUMBNAIL_FORMATS if f != "PNG"],
+                index=0 if settings['image_format'] == 'JPEG' else 1
+            ),
+            'quality': st.slider("Preview quality", min_value=30, max_value=95, value=settings['quality']),
+            'max_dimension': st.select_slider(
+                "Max preview size (px)",
+                options=[400, 600, 800, 1200, 1600],
+                value=settings['max_dimension']
+            )
+        }
+        if new_settings != settings:
+            st.session_state.preview_settings = new_settings
+            # Re-open previews with the new encoding, keeping any page edits
+            st.session_state.thumbnails_stale = True
+    
     pdf_password = None
+    model = None
     if uploaded_file:
         # Check if it's a new file
         if st.session_state.current_file_name != uploaded_file.name:
             st.session_state.current_file_name = uploaded_file.name
-            st.session_state.page_order = []
-            st.session_state.deleted_pages = set()
-            st.session_state.pdf_pages = []
+            st.session_state.page_log = None
+            st.session_state.grid_page = 1
+            close_thumbnails()
         
         # Check if PDF is encrypted
         try:
@@ -163,17 +147,33 @@ with col1:
             st.error(f"Error reading PDF: {str(e)}")
     
     if uploaded_file and (not reader.is_encrypted or pdf_password):
-        # Extract pages info if not already done
-        if not st.session_state.pdf_pages:
+        # Build the page model if not already done
+        if st.session_state.page_log is None:
             with st.spinner("Loading PDF pages..."):
-                pages_info = extract_pages_info(uploaded_file, pdf_password)
-                st.session_state.pdf_pages = pages_info
-                st.session_state.page_order = [p['original_index'] for p in pages_info]
+                st.session_state.page_log = load_page_log(uploaded_file, pdf_password)
+        elif st.session_state.get('thumbnails_stale'):
+            open_thumbnails(uploaded_file.getvalue(), pdf_password)
+        st.session_state.thumbnails_stale = False
         
-        st.success(f"✅ Loaded {len(st.session_state.pdf_pages)} pages")
+        if st.session_state.page_log is not None:
+            edit_log = st.session_state.page_log
+            model = edit_log.model
+    
+    if model is not None:
+        st.success(f"✅ Loaded {model.num_pages} pages")
+        if st.session_state.thumbnails is not None:
+            stats = summarize_timings(st.session_state.thumbnails.timings)
+            cache_stats = get_thumbnail_cache().stats()
+            st.caption(
+                f"⏱️ Rendered {stats['pages']} previews so far "
+                f"({stats['mean_ms']:.0f} ms/page, slowest {stats['max_ms']:.0f} ms) · "
+                f"cache: {cache_stats['hits'] + cache_stats['disk_hits']} hits, "
+                f"{cache_stats['misses']} misses · "
+                f"previews in memory: {st.session_state.thumbnails.memory_bytes() / 1024:.0f} KB"
+            )
         
         # Check if previews are available
-        has_preview = any(p['preview'] is not None for p in st.session_state.pdf_pages)
+        has_preview = st.session_state.thumbnails is not None
         if not has_preview:
             st.info("ℹ️ Visual previews not available, but you can still manage pages")
         
@@ -186,14 +186,24 @@ with col1:
         
         with col_a:
             if st.button("🔄 Reset Order", use_container_width=True):
-                st.session_state.page_order = [p['original_index'] for p in st.session_state.pdf_pages]
-                st.session_state.deleted_pages = set()
+                edit_log.apply({"op": "reset"})
                 st.rerun()
         
         with col_b:
             if st.button("🔀 Reverse Order", use_container_width=True):
-                current_order = [p for p in st.session_state.page_order if p not in st.session_state.deleted_pages]
-                st.session_state.page_order = list(reversed(current_order))
+                edit_log.apply({"op": "reverse"})
+                st.rerun()
+        
+        col_undo, col_redo = st.columns(2)
+        
+        with col_undo:
+            if st.button("↩️ Undo", use_container_width=True, disabled=not edit_log.can_undo):
+                edit_log.undo()
+                st.rerun()
+        
+        with col_redo:
+            if st.button("↪️ Redo", use_container_width=True, disabled=not edit_log.can_redo):
+                edit_log.redo()
                 st.rerun()
         
         # Page range operations
@@ -206,20 +216,19 @@ with col1:
                 delete_start = st.number_input(
                     "From page",
                     min_value=1,
-                    max_value=len(st.session_state.pdf_pages),
+                    max_value=model.num_pages,
                     value=1
                 )
             with col_end:
                 delete_end = st.number_input(
                     "To page",
                     min_value=delete_start,
-                    max_value=len(st.session_state.pdf_pages),
+                    max_value=model.num_pages,
                     value=delete_start
                 )
             
             if st.button("Delete Range", type="secondary"):
-                for i in range(delete_start - 1, delete_end):
-                    st.session_state.deleted_pages.add(st.session_state.pdf_pages[i]['original_index'])
+                edit_log.apply({"op": "delete_range", "first": delete_start - 1, "last": delete_end - 1})
                 st.success(f"Marked pages {delete_start}-{delete_end} for deletion")
                 st.rerun()
         
@@ -230,7 +239,7 @@ with col1:
                 extract_start = st.number_input(
                     "From page",
                     min_value=1,
-                    max_value=len(st.session_state.pdf_pages),
+                    max_value=model.num_pages,
                     value=1,
                     key="extract_start"
                 )
@@ -238,43 +247,154 @@ with col1:
                 extract_end = st.number_input(
                     "To page",
                     min_value=extract_start,
-                    max_value=len(st.session_state.pdf_pages),
-                    value=len(st.session_state.pdf_pages),
+                    max_value=model.num_pages,
+                    value=model.num_pages,
                     key="extract_end"
                 )
             
             if st.button("Extract Range Only", type="secondary"):
-                # Keep only the selected range
-                new_order = []
-                for i in range(extract_start - 1, extract_end):
-                    new_order.append(st.session_state.pdf_pages[i]['original_index'])
-                st.session_state.page_order = new_order
-                # Mark all others as deleted
-                st.session_state.deleted_pages = set()
-                for p in st.session_state.pdf_pages:
-                    if p['original_index'] not in new_order:
-                        st.session_state.deleted_pages.add(p['original_index'])
+                # Keep only the selected range, all others are marked deleted
+                edit_log.apply({"op": "extract_range", "first": extract_start - 1, "last": extract_end - 1})
                 st.success(f"Extracted pages {extract_start}-{extract_end}")
                 st.rerun()
         
+        # Split into many files
+        with st.expander("📦 Split Into Multiple PDFs"):
+            split_mode = st.radio(
+                "Split by",
+                options=list(SPLIT_MODE_LABELS),
+                horizontal=True
+            )
+            if split_mode == "Page ranges":
+                split_value = st.text_input(
+                    "Ranges (one part each)",
+                    placeholder="e.g. 1-3, 4-10, 11-last",
+                    help="Page numbers refer to the document as it will be saved"
+                )
+            elif split_mode == "Every N pages":
+                split_value = st.number_input("Pages per part", min_value=1, max_value=model.num_pages, value=1)
+            else:
+                split_value = None
+                st.caption("A new part starts at each top-level bookmark")
+            
+            if st.button("Split to ZIP", type="secondary"):
+                if model.active_count == 0:
+                    st.warning("No pages to split (all pages deleted)")
+                elif split_mode == "Page ranges" and not split_value:
+                    st.warning("Please enter at least one page range")
+                else:
+                    with st.spinner("Splitting PDF..."):
+                        try:
+                            zip_file, split_stats = create_split_zip(
+                                uploaded_file, edit_log, SPLIT_MODE_LABELS[split_mode], split_value, pdf_password
+                            )
+                            st.success(
+                                f"✅ {split_stats['parts']} parts, {split_stats['pages']} pages in "
+                                f"{split_stats['seconds']:.1f}s ({split_stats['zip_bytes'] / 1024:.0f} KB zipped)"
+                            )
+                            st.download_button(
+                                label="📥 Download Parts (ZIP)",
+                                data=zip_file.read(),
+                                file_name=f"{default_base_name(uploaded_file.name)}_split.zip",
+                                mime="application/zip",
+                                use_container_width=True
+                            )
+                            zip_file.close()
+                        except ValueError as e:
+                            st.error(f"❌ {str(e)}")
+                        except Exception as e:
+                            st.error(f"Error splitting PDF: {str(e)}")
+        
+        # Rotate/crop range
+        with st.expander("🔄 Rotate / Crop Page Range"):
+            col_start, col_end = st.columns(2)
+            with col_start:
+                edit_start = st.number_input(
+                    "From page",
+                    min_value=1,
+                    max_value=model.num_pages,
+                    value=1,
+                    key="edit_start"
+                )
+            with col_end:
+                edit_end = st.number_input(
+                    "To page",
+                    min_value=edit_start,
+                    max_value=model.num_pages,
+                    value=model.num_pages,
+                    key="edit_end"
+                )
+            
+            degrees = st.radio(
+                "Rotate clockwise",
+                options=[90, 180, 270],
+                format_func=lambda d: f"{d}°",
+                horizontal=True
+            )
+            if st.button("Rotate Range", type="secondary"):
+                # Only the page's /Rotate entry changes, nothing is re-rendered
+                edit_log.apply({"op": "rotate_range", "first": edit_start - 1, "last": edit_end - 1, "degrees": degrees})
+                st.rerun()
+            
+            st.markdown("**Crop margins (% of page as shown before rotation)**")
+            col_left, col_top, col_right, col_bottom = st.columns(4)
+            with col_left:
+                crop_left = st.number_input("Left", min_value=0, max_value=45, value=0, key="crop_left")
+            with col_top:
+                crop_top = st.number_input("Top", min_value=0, max_value=45, value=0, key="crop_top")
+            with col_right:
+                crop_right = st.number_input("Right", min_value=0, max_value=45, value=0, key="crop_right")
+            with col_bottom:
+                crop_bottom = st.number_input("Bottom", min_value=0, max_value=45, value=0, key="crop_bottom")
+            
+            if st.button("Apply Crop", type="secondary"):
+                # Sets /CropBox on save; zero margins remove the crop
+                edit_log.apply({
+                    "op": "crop_range",
+                    "first": edit_start - 1,
+                    "last": edit_end - 1,
+                    "margins": [crop_left / 100, crop_top / 100, crop_right / 100, crop_bottom / 100]
+                })
+                st.rerun()
+        
         # Statistics
         st.subheader("📊 Statistics")
-        active_pages = len([p for p in st.session_state.page_order if p not in st.session_state.deleted_pages])
-        st.info(f"Active pages: {active_pages} / {len(st.session_state.pdf_pages)}")
-        if st.session_state.deleted_pages:
-            st.warning(f"Pages marked for deletion: {len(st.session_state.deleted_pages)}")
+        active_pages = model.active_count
+        st.info(f"Active pages: {active_pages} / {model.num_pages}")
+        if model.deleted_count:
+            st.warning(f"Pages marked for deletion: {model.deleted_count}")
+        if len(edit_log):
+            st.caption(f"📝 {len(edit_log)} edits recorded, written in one pass on save")
         
         # Process button
         st.header("💾 Save Changes")
         if active_pages > 0:
+            optimize_output = st.checkbox(
+                "🗜️ Optimize file size",
+                value=False,
+                disabled=not PYMUPDF_AVAILABLE,
+                help="Recompresses streams, packs objects and drops unused ones; optionally downsamples images"
+            )
+            image_dpi = st.selectbox(
+                "Images",
+                IMAGE_DPI_CHOICES,
+                format_func=lambda dpi: "Keep original resolution" if dpi is None else f"Downsample to {dpi} dpi",
+                disabled=not optimize_output
+            )
+            fast_web_view = st.checkbox(
+                "🌐 Fast web view (linearize)",
+                value=False,
+                disabled=linearization_backend() is None,
+                help="Lets browsers show the first page before the whole file has downloaded"
+                     if linearization_backend() else "Needs pikepdf installed on the server"
+            )
             if st.button("🎯 Create Modified PDF", type="primary", use_container_width=True):
                 with st.spinner("Creating modified PDF..."):
                     try:
                         uploaded_file.seek(0)
                         modified_pdf = create_modified_pdf(
                             uploaded_file,
-                            st.session_state.page_order,
-                            st.session_state.deleted_pages,
+                            edit_log,
                             pdf_password
                         )
                         
@@ -283,9 +403,18 @@ with col1:
                         modified_name = original_name.replace('.pdf', '_modified.pdf')
                         
                         st.success("✅ PDF modified successfully!")
+                        if optimize_output:
+                            modified_pdf, optimize_stats = optimize_pdf(modified_pdf, image_dpi=image_dpi)
+                            st.caption(describe_savings(optimize_stats))
+                        if fast_web_view:
+                            modified_pdf, linear_stats = linearize_pdf(modified_pdf)
+                            st.caption(
+                                f"🌐 Linearized: {linear_stats['input_bytes'] / 1024 / 1024:.1f} MB → "
+                                f"{linear_stats['output_bytes'] / 1024 / 1024:.1f} MB in {linear_stats['seconds']:.2f}s"
+                            )
                         st.download_button(
                             label="📥 Download Modified PDF",
-                            data=modified_pdf.getvalue(),
+                            data=modified_pdf.read(),
                             file_name=modified_name,
                             mime="application/pdf",
                             use_container_width=True
@@ -296,7 +425,9 @@ with col1:
             st.warning("No pages to save (all pages deleted)")
 
 with col2:
-    if uploaded_file and st.session_state.pdf_pages:
+    if uploaded_file and st.session_state.page_log is not None:
+        edit_log = st.session_state.page_log
+        model = edit_log.model
         st.header("📄 Page Preview & Management")
         
         # Tabs for different views
@@ -306,65 +437,107 @@ with col2:
             # Grid view with previews
             st.markdown("**Drag pages to reorder, click to delete/restore**")
             
-            # Display pages in a grid
+            # Only the current grid page is rendered, the next one is prefetched
             cols_per_row = 3
-            active_pages = [p for p in st.session_state.page_order if p not in st.session_state.deleted_pages]
+            total_positions = len(model)
+            
+            col_size, col_page, col_info = st.columns([1, 1, 2])
+            with col_size:
+                st.session_state.grid_page_size = st.selectbox(
+                    "Pages per view",
+                    options=[12, 24, 48],
+                    index=[12, 24, 48].index(st.session_state.grid_page_size)
+                )
+            page_size = st.session_state.grid_page_size
+            num_grid_pages = max(1, (total_positions + page_size - 1) // page_size)
+            st.session_state.grid_page = min(st.session_state.grid_page, num_grid_pages)
+            with col_page:
+                st.session_state.grid_page = st.number_input(
+                    "View",
+                    min_value=1,
+                    max_value=num_grid_pages,
+                    value=st.session_state.grid_page
+                )
             
-            for row_start in range(0, len(st.session_state.page_order), cols_per_row):
+            window_start = (st.session_state.grid_page - 1) * page_size
+            window_end = min(window_start + page_size, total_positions)
+            with col_info:
+                st.caption(f"Showing positions {window_start + 1}-{window_end} of {total_positions}")
+            
+            window = model.window(window_start, window_end)
+            previews = {}
+            thumbnails = st.session_state.thumbnails
+            if thumbnails is not None:
+                # Rotated/cropped pages reuse the cached render, transformed in place
+                previews = {
+                    original_idx: thumbnails.get_transformed(
+                        original_idx, model.rotation(original_idx), model.crop(original_idx)
+                    )
+                    for _, original_idx, is_deleted in window if not is_deleted
+                }
+                thumbnails.prefetch(model.order[window_end:window_end + page_size])
+            
+            for row_start in range(0, len(window), cols_per_row):
                 cols = st.columns(cols_per_row)
-                for col_idx, col in enumerate(cols):
-                    page_idx = row_start + col_idx
-                    if page_idx < len(st.session_state.page_order):
-                        original_idx = st.session_state.page_order[page_idx]
-                        page_info = next(p for p in st.session_state.pdf_pages if p['original_index'] == original_idx)
+                for col, (page_idx, original_idx, is_deleted) in zip(cols, window[row_start:row_start + cols_per_row]):
+                    page_num = original_idx + 1  # 1-indexed for display
+                    preview = previews.get(original_idx)
+                    
+                    with col:
+                        # Container for each page
+                        if is_deleted:
+                            st.markdown(f"~~Page {page_num}~~ **DELETED**")
+                        elif model.rotation(original_idx) or model.crop(original_idx):
+                            edits = []
+                            if model.rotation(original_idx):
+                                edits.append(f"↻ {model.rotation(original_idx)}°")
+                            if model.crop(original_idx):
+                                edits.append("✂️ cropped")
+                            st.markdown(f"**Page {page_num}** · {' · '.join(edits)}")
+                        else:
+                            st.markdown(f"**Page {page_num}**")
+                        
+                        # Show preview if available
+                        if preview and not is_deleted:
+                            st.image(preview, use_container_width=True)
+                        elif is_deleted:
+                            st.info("🗑️ Marked for deletion")
+                        else:
+                            # Show page info even without preview
+                            st.info(f"📄 Page {page_num}\n(Preview not available)")
+                        
+                        # Control buttons
+                        col_up, col_down, col_rot, col_del = st.columns(4)
                         
-                        with col:
-                            # Check if page is deleted
-                            is_deleted = original_idx in st.session_state.deleted_pages
-                            
-                            # Container for each page
+                        with col_up:
+                            if page_idx > 0 and not is_deleted:
+                                if st.button("⬆️", key=f"up_{original_idx}", use_container_width=True):
+                                    # Swap with previous
+                                    edit_log.apply({"op": "move", "from": page_idx, "to": page_idx - 1})
+                                    st.rerun()
+                        
+                        with col_down:
+                            if page_idx < len(model) - 1 and not is_deleted:
+                                if st.button("⬇️", key=f"down_{original_idx}", use_container_width=True):
+                                    # Swap with next
+                                    edit_log.apply({"op": "move", "from": page_idx, "to": page_idx + 1})
+                                    st.rerun()
+                        
+                        with col_rot:
+                            if not is_deleted:
+                                if st.button("↻", key=f"rot_{original_idx}", use_container_width=True):
+                                    edit_log.apply({"op": "rotate", "page": original_idx, "degrees": 90})
+                                    st.rerun()
+                        
+                        with col_del:
                             if is_deleted:
-                                st.markdown(f"~~Page {page_info['page_num']}~~ **DELETED**")
-                            else:
-                                st.markdown(f"**Page {page_info['page_num']}**")
-                            
-                            # Show preview if available
-                            if page_info['preview'] and not is_deleted:
-                                st.image(page_info['preview'], use_container_width=True)
-                            elif is_deleted:
-                                st.info("🗑️ Marked for deletion")
+                                if st.button("♻️", key=f"restore_{original_idx}", use_container_width=True):
+                                    edit_log.apply({"op": "restore", "page": original_idx})
+                                    st.rerun()
                             else:
-                                # Show page info even without preview
-                                st.info(f"📄 Page {page_info['page_num']}\n(Preview not available)")
-                            
-                            # Control buttons
-                            col_up, col_down, col_del = st.columns(3)
-                            
-                            with col_up:
-                                if page_idx > 0 and not is_deleted:
-                                    if st.button("⬆️", key=f"up_{original_idx}", use_container_width=True):
-                                        # Swap with previous
-                                        st.session_state.page_order[page_idx], st.session_state.page_order[page_idx-1] = \
-                                            st.session_state.page_order[page_idx-1], st.session_state.page_order[page_idx]
-                                        st.rerun()
-                            
-                            with col_down:
-                                if page_idx < len(st.session_state.page_order) - 1 and not is_deleted:
-                                    if st.button("⬇️", key=f"down_{original_idx}", use_container_width=True):
-                                        # Swap with next
-                                        st.session_state.page_order[page_idx], st.session_state.page_order[page_idx+1] = \
-                                            st.session_state.page_order[page_idx+1], st.session_state.page_order[page_idx]
-                                        st.rerun()
-                            
-                            with col_del:
-                                if is_deleted:
-                                    if st.button("♻️", key=f"restore_{original_idx}", use_container_width=True):
-                                        st.session_state.deleted_pages.remove(original_idx)
-                                        st.rerun()
-                                else:
-                                    if st.button("🗑️", key=f"del_{original_idx}", use_container_width=True):
-                                        st.session_state.deleted_pages.add(original_idx)
-                                        st.rerun()
+                                if st.button("🗑️", key=f"del_{original_idx}", use_container_width=True):
+                                    edit_log.apply({"op": "delete", "page": original_idx})
+                                    st.rerun()
         
         with tab2:
             # List view for precise ordering
@@ -372,9 +545,8 @@ with col2:
             
             # Create a list of pages with order inputs
             new_order = {}
-            for i, original_idx in enumerate(st.session_state.page_order):
-                page_info = next(p for p in st.session_state.pdf_pages if p['original_index'] == original_idx)
-                is_deleted = original_idx in st.session_state.deleted_pages
+            for i, original_idx, is_deleted in model.window(0, len(model)):
+                page_num = original_idx + 1  # 1-indexed for display
                 
                 col1, col2, col3, col4 = st.columns([1, 2, 2, 1])
                 
@@ -383,7 +555,7 @@ with col2:
                         new_pos = st.number_input(
                             "Position",
                             min_value=1,
-                            max_value=len(st.session_state.page_order),
+                            max_value=len(model),
                             value=i + 1,
                             key=f"pos_{original_idx}"
                         )
@@ -393,9 +565,9 @@ with col2:
                 
                 with col2:
                     if is_deleted:
-                        st.write(f"~~Page {page_info['page_num']}~~")
+                        st.write(f"~~Page {page_num}~~")
                     else:
-                        st.write(f"Page {page_info['page_num']}")
+                        st.write(f"Page {page_num}")
                 
                 with col3:
                     if is_deleted:
@@ -406,22 +578,23 @@ with col2:
                 with col4:
                     if is_deleted:
                         if st.button("Restore", key=f"restore_list_{original_idx}"):
-                            st.session_state.deleted_pages.remove(original_idx)
+                            edit_log.apply({"op": "restore", "page": original_idx})
                             st.rerun()
                     else:
                         if st.button("Delete", key=f"del_list_{original_idx}"):
-                            st.session_state.deleted_pages.add(original_idx)
+                            edit_log.apply({"op": "delete", "page": original_idx})
                             st.rerun()
             
             # Apply new order button
             if st.button("Apply New Order", type="secondary"):
                 # Sort pages by their new positions
                 sorted_pages = sorted(new_order.items(), key=lambda x: x[1])
-                st.session_state.page_order = [page_idx for page_idx, _ in sorted_pages]
-                # Add deleted pages at the end (they won't be included in output anyway)
-                for p in st.session_state.deleted_pages:
-                    if p not in st.session_state.page_order:
-                        st.session_state.page_order.append(p)
+                # Keep deleted pages at the end (they won't be included in output anyway)
+                edit_log.apply({
+                    "op": "set_order",
+                    "order": [page_idx for page_idx, _ in sorted_pages] +
+                             [page_idx for page_idx in model if model.is_deleted(page_idx)]
+                })
                 st.success("✅ New order applied!")
                 st.rerun()
     
@@ -439,9 +612,12 @@ with st.expander("📖 How to Use", expanded=False):
     **Features:**
     - 📄 **Visual Preview**: See each page before making changes
     - 🔄 **Reorder Pages**: Move pages up/down or set specific positions
+    - ↻ **Rotate & Crop**: Fix sideways scans and trim margins without re-encoding
     - 🗑️ **Delete Pages**: Remove unwanted pages
     - ✂️ **Extract Range**: Keep only specific page ranges
+    - 📦 **Split**: Save page ranges, every N pages or each bookmark as separate PDFs in one ZIP
     - ♻️ **Restore Pages**: Undo deletions before saving
+    - ↩️ **Undo/Redo**: Step back and forth through every edit
     
     **How to Use:**
     1. **Upload** your PDF file
@@ -453,8 +629,9 @@ with st.expander("📖 How to Use", expanded=False):
     4. **Delete** pages by:
        - Clicking 🗑️ on individual pages
        - Using Delete Range for multiple pages
-    5. **Extract** specific ranges with Extract Range
-    6. **Save** your modified PDF
+    5. **Rotate** pages with ↻ or Rotate / Crop Page Range, and crop margins there
+    6. **Extract** specific ranges with Extract Range, or **Split** into many files
+    7. **Save** your modified PDF
     
     **Tips:**
     - 💡 Grid View is best for visual preview
@@ -464,7 +641,9 @@ with st.expander("📖 How to Use", expanded=False):
     
     **Common Use Cases:**
     - Remove blank pages from scanned documents
+    - Straighten sideways scans
     - Extract specific sections from reports
+    - Split a statement bundle into one PDF per client
     - Reorder pages in merged documents
     - Remove confidential pages before sharing
     """)
@@ -0,0 +1 @@
+"""Shared PDF processing engine used by the Streamlit tool pages"""
@@ -0,0 +1,7 @@
+"""Allow `python -m pdf_tools`"""
+
+import sys
+
+from pdf_tools.cli import main
+
+sys.exit(main())
@@ -0,0 +1,14 @@
+"""Output buffers shared by every tool that writes a finished file"""
+
+import os
+import tempfile
+
+
+def spool_threshold():
+    """Bytes kept in memory before an output moves to disk (PDF_SPOOL_MB)"""
+    return int(os.environ.get("PDF_SPOOL_MB", "16")) * 1024 * 1024
+
+
+def new_output_buffer(max_size=None):
+    """Output buffer that stays in memory for small results and spills to disk past max_size"""
+    return tempfile.SpooledTemporaryFile(max_size=spool_threshold() if max_size is None else max_size)
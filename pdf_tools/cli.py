@@ -0,0 +1,360 @@
+"""Command line entry point for batch jobs: python -m pdf_tools <command> ...
+
+Inputs are PDF files, directories (every *.pdf in them, sorted) or JSON
+manifests. A manifest is a list whose entries are either a path or an
+object with an "input" path plus per-file settings that override the
+command line, e.g. {"input": "a.pdf", "pages": "1-3", "password": "x"}.
+Relative paths in a manifest are resolved against the manifest's folder.
+
+Per-file commands run in a process pool sized by --workers; `previews`
+instead splits each file's pages across the pool (PDF_RENDER_WORKERS when
+--workers is not given). A JSON summary of per-file timings is printed, or
+written to --summary.
+"""
+
+import argparse
+import csv
+import json
+import os
+import shutil
+import sys
+import time
+from io import BytesIO
+
+from PIL import Image
+from pypdf import PdfReader
+
+from pdf_tools.encrypt import DEFAULT_ALGORITHM, ENCRYPTION_ALGORITHMS, encrypt_pdf, generate_secure_password
+from pdf_tools.merge import merge_pdfs, select_pages
+from pdf_tools.page_ops import PageEditLog, open_reader, replay_to_pdf
+from pdf_tools.preflight import merge_source, preflight_many
+from pdf_tools.redact import DocumentAnalysis
+from pdf_tools.signature import add_signature_to_pdf
+from pdf_tools.split import create_split_zip
+from pdf_tools.thumbnails import THUMBNAIL_FORMATS, default_render_workers, render_pages_parallel
+from pdf_tools.workers import run_pool
+
+# Output file name suffix per command
+OUTPUT_SUFFIXES = {
+    "encrypt": "_encrypted.pdf",
+    "redact": "_REDACTED.pdf",
+    "sign": "_signed.pdf",
+    "pages": "_modified.pdf",
+    "split": "_split.zip",
+    "previews": "_previews",
+}
+
+# File extension per preview image format
+IMAGE_EXTENSIONS = {"JPEG": ".jpg", "WEBP": ".webp", "PNG": ".png"}
+
+
+def load_jobs(inputs):
+    """Expand files, directories and manifests into a list of job dicts"""
+    jobs = []
+    for path in inputs:
+        if os.path.isdir(path):
+            names = sorted(name for name in os.listdir(path) if name.lower().endswith(".pdf"))
+            jobs.extend({"input": os.path.join(path, name)} for name in names)
+        elif path.lower().endswith(".json"):
+            base = os.path.dirname(os.path.abspath(path))
+            with open(path, encoding="utf-8") as f:
+                entries = json.load(f)
+            for entry in entries:
+                job = {"input": entry} if isinstance(entry, str) else dict(entry)
+                job["input"] = os.path.join(base, job["input"])
+                jobs.append(job)
+        else:
+            jobs.append({"input": path})
+    return jobs
+
+
+def write_output(data, path):
+    """Write bytes or a readable buffer to `path`"""
+    with open(path, "wb") as f:
+        if isinstance(data, (bytes, bytearray)):
+            f.write(data)
+        else:
+            data.seek(0)
+            shutil.copyfileobj(data, f)
+
+
+def output_path(job, command, output_dir):
+    """Where a per-file command writes its result"""
+    if job.get("output"):
+        return os.path.join(output_dir, job["output"])
+    stem = os.path.splitext(os.path.basename(job["input"]))[0]
+    return os.path.join(output_dir, stem + OUTPUT_SUFFIXES[command])
+
+
+def run_job(command, job, output_dir):
+    """Process one input file; returns a result dict for the summary"""
+    start = time.perf_counter()
+    result = {"input": job["input"], "output": None, "ok": False, "error": None}
+    try:
+        with open(job["input"], "rb") as f:
+            pdf_file = BytesIO(f.read())
+        pdf_file.name = os.path.basename(job["input"])
+        target = output_path(job, command, output_dir)
+
+        if command == "encrypt":
+            data = encrypt_pdf(pdf_file, job["password"], job["algorithm"])
+        elif command == "redact":
+            patterns = {name: True for name in job["patterns"]}
+            # One parse serves both the scan and the redaction
+            analysis = DocumentAnalysis(pdf_file.getvalue())
+            try:
+                items = analysis.scan(patterns, job.get("custom_pattern"), pdf_file.name)
+                data = analysis.redact(items)
+            finally:
+                # A long batch must not keep failed documents open
+                analysis.close()
+            result["items"] = len(items)
+        elif command == "sign":
+            data = add_signature_to_pdf(
+                pdf_file,
+                Image.open(job["signature"]),
+                (job["x"], job["y"]),
+                job["page"],
+                job["add_date"],
+                (job["width"], job["height"]),
+                job.get("password")
+            )
+        elif command == "pages":
+            data = replay_to_pdf(pdf_file, job["ops"], job.get("password"))
+        elif command == "split":
+            num_pages = len(open_reader(pdf_file, job.get("password")).pages)
+            data, stats = create_split_zip(
+                pdf_file, PageEditLog(num_pages, job.get("ops")), job["mode"], job.get("value"), job.get("password")
+            )
+            result["parts"] = stats["parts"]
+        else:
+            raise ValueError(f"Unknown command '{command}'")
+
+        write_output(data, target)
+        result["output"] = target
+        result["ok"] = True
+    except Exception as e:
+        result["error"] = str(e) or type(e).__name__
+    result["seconds"] = round(time.perf_counter() - start, 4)
+    return result
+
+
+def run_jobs(command, jobs, output_dir, workers=1, progress=None):
+    """Run per-file jobs, in a spawned process pool when workers > 1
+
+    Results come back in job order; `progress(done, total, index)` is
+    called as each file finishes.
+    """
+    items = [(command, job, output_dir) for job in jobs]
+    return run_pool(run_job, items, workers, progress)
+
+
+def render_previews(job, output_dir, workers):
+    """Render every page of one input into a folder of images, pages split across the pool"""
+    start = time.perf_counter()
+    result = {"input": job["input"], "output": None, "ok": False, "error": None}
+    try:
+        with open(job["input"], "rb") as f:
+            pdf_bytes = f.read()
+        target = output_path(job, "previews", output_dir)
+        os.makedirs(target, exist_ok=True)
+        extension = IMAGE_EXTENSIONS[job["format"]]
+
+        failed = []
+        result["pages"] = 0
+        rendered = render_pages_parallel(
+            pdf_bytes, job.get("password"), job["zoom"], workers, image_format=job["format"]
+        )
+        for page_num, data in rendered:
+            if data is None:
+                failed.append(page_num + 1)
+                continue
+            write_output(data, os.path.join(target, f"page_{page_num + 1:04d}{extension}"))
+            result["pages"] += 1
+        if failed:
+            raise ValueError(f"Could not render page(s) {', '.join(map(str, failed))}")
+        result["output"] = target
+        result["ok"] = True
+    except Exception as e:
+        result["error"] = str(e) or type(e).__name__
+    result["seconds"] = round(time.perf_counter() - start, 4)
+    return result
+
+
+def combine(jobs, output, workers=1, deduplicate=False, outlines=False):
+    """Merge all inputs into one file; returns the summary results"""
+    sources = []
+    for job in jobs:
+        with open(job["input"], "rb") as f:
+            sources.append(f.read())
+
+    inputs = []
+    for job, pdf_bytes in zip(jobs, sources):
+        num_pages = None
+        if job.get("pages"):
+            num_pages = len(PdfReader(BytesIO(pdf_bytes)).pages)
+        inputs.append((pdf_bytes, job.get("password"), select_pages(job.get("pages", ""), num_pages)))
+
+    start = time.perf_counter()
+    checks = preflight_many(inputs, workers=workers)
+    preflight_seconds = time.perf_counter() - start
+    results = [
+        {"input": job["input"], "ok": check["ok"], "error": check["error"], "pages": check["pages"],
+         "seconds": round(check["seconds"], 4)}
+        for job, check in zip(jobs, checks)
+    ]
+    if not all(check["ok"] for check in checks):
+        return results, None
+
+    merged, stats = merge_pdfs(
+        [
+            (merge_source(check, BytesIO(pdf_bytes)), page_indices)
+            for (pdf_bytes, _, page_indices), check in zip(inputs, checks)
+        ],
+        deduplicate=deduplicate,
+        outlines=outlines,
+        titles=[os.path.splitext(os.path.basename(job["input"]))[0] for job in jobs]
+    )
+    write_output(merged, output)
+    merged.close()
+    stats["preflight_seconds"] = round(preflight_seconds, 4)
+    stats["output"] = output
+    return results, stats
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m pdf_tools", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_command(name, help_text):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("inputs", nargs="+", help="PDF files, directories or JSON manifests")
+        command.add_argument("-w", "--workers", type=int, default=1, help="Parallel worker processes")
+        command.add_argument("--summary", help="Write the JSON summary here instead of stdout")
+        return command
+
+    command = add_command("combine", "Merge inputs into one PDF")
+    command.add_argument("-o", "--output", required=True, help="Combined PDF path")
+    command.add_argument("--deduplicate", action="store_true", help="Write shared fonts and images once")
+    command.add_argument("--outlines", action="store_true", help="Bookmark each file and keep its bookmarks")
+
+    command = add_command("encrypt", "Encrypt each input with its own random password")
+    command.add_argument("-o", "--output-dir", required=True)
+    command.add_argument("--password-length", type=int, default=16)
+    command.add_argument("--no-symbols", action="store_true", help="Letters and digits only")
+    command.add_argument("--algorithm", choices=ENCRYPTION_ALGORITHMS, default=DEFAULT_ALGORITHM)
+
+    command = add_command("redact", "Detect and redact sensitive data in each input")
+    command.add_argument("-o", "--output-dir", required=True)
+    command.add_argument("--patterns", default="tfn", help="Comma separated: tfn, abn, email, phone, custom")
+    command.add_argument("--custom-pattern", help="Regex used by the custom pattern")
+
+    command = add_command("sign", "Stamp a signature image on one page of each input")
+    command.add_argument("-o", "--output-dir", required=True)
+    command.add_argument("--signature", required=True, help="Signature image file")
+    command.add_argument("--page", type=int, default=1, help="1-based page to sign")
+    command.add_argument("--x", type=float, default=400, help="Points from the left edge")
+    command.add_argument("--y", type=float, default=100, help="Points from the bottom edge")
+    command.add_argument("--width", type=float, default=150)
+    command.add_argument("--height", type=float, default=50)
+    command.add_argument("--no-date", action="store_true", help="Do not add today's date")
+
+    command = add_command("pages", "Replay a Page Manager edit log on each input")
+    command.add_argument("-o", "--output-dir", required=True)
+    command.add_argument("--ops", help="JSON file with the list of page operations")
+
+    command = add_command("split", "Split each input into parts in a ZIP")
+    command.add_argument("-o", "--output-dir", required=True)
+    mode = command.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--ranges", help="Page ranges, one part each, e.g. '1-3, 4-last'")
+    mode.add_argument("--every", type=int, help="Pages per part")
+    mode.add_argument("--bookmarks", action="store_true", help="A part per top-level bookmark")
+
+    command = add_command("previews", "Render every page of each input to images")
+    command.add_argument("-o", "--output-dir", required=True)
+    command.add_argument("--zoom", type=float, default=1.5, help="Scale from PDF points to pixels")
+    command.add_argument("--format", choices=THUMBNAIL_FORMATS, default="JPEG")
+    # Pages of one file are split across the pool, sized by PDF_RENDER_WORKERS by default
+    command.set_defaults(workers=None)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    jobs = load_jobs(args.inputs)
+    if args.workers is None:
+        args.workers = default_render_workers()
+    start = time.perf_counter()
+    summary = {"command": args.command, "workers": args.workers, "files": len(jobs)}
+
+    if args.command == "combine":
+        results, stats = combine(jobs, args.output, args.workers, args.deduplicate, args.outlines)
+        summary["merge"] = stats
+    elif args.command == "previews":
+        os.makedirs(args.output_dir, exist_ok=True)
+        for job in jobs:
+            job.setdefault("zoom", args.zoom)
+            job.setdefault("format", args.format)
+        results = [render_previews(job, args.output_dir, args.workers) for job in jobs]
+    else:
+        os.makedirs(args.output_dir, exist_ok=True)
+        passwords = {}
+        for job in jobs:
+            if args.command == "encrypt":
+                job.setdefault("password", generate_secure_password(args.password_length, not args.no_symbols))
+                passwords[job["input"]] = job["password"]
+                job.setdefault("algorithm", args.algorithm)
+            elif args.command == "redact":
+                job.setdefault("patterns", [name.strip() for name in args.patterns.split(",") if name.strip()])
+                job.setdefault("custom_pattern", args.custom_pattern)
+            elif args.command == "sign":
+                for key in ("signature", "page", "x", "y", "width", "height"):
+                    job.setdefault(key, getattr(args, key))
+                job.setdefault("add_date", not args.no_date)
+            elif args.command == "pages" and "ops" not in job:
+                if not args.ops:
+                    raise SystemExit(f"No page operations given for {job['input']}")
+                with open(args.ops, encoding="utf-8") as f:
+                    job["ops"] = json.load(f)
+            elif args.command == "split":
+                if args.ranges:
+                    job.setdefault("mode", "ranges")
+                    job.setdefault("value", args.ranges)
+                elif args.every is not None:
+                    job.setdefault("mode", "every")
+                    job.setdefault("value", args.every)
+                else:
+                    job.setdefault("mode", "bookmarks")
+        results = run_jobs(args.command, jobs, args.output_dir, args.workers)
+
+        if passwords:
+            # Passwords go next to the outputs, never into the summary, and only the owner may read them
+            password_path = os.path.join(args.output_dir, "passwords.csv")
+            if os.path.exists(password_path):
+                os.remove(password_path)  # an older file would keep its old permissions
+            fd = os.open(password_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with open(fd, "w", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["file", "password"])
+                for result in results:
+                    if result["ok"]:
+                        writer.writerow([os.path.basename(result["output"]), passwords[result["input"]]])
+
+    seconds = time.perf_counter() - start
+    summary["succeeded"] = sum(1 for result in results if result["ok"])
+    summary["failed"] = len(results) - summary["succeeded"]
+    summary["seconds"] = round(seconds, 4)
+    summary["files_per_second"] = round(len(results) / seconds, 2) if seconds else None
+    summary["results"] = results
+
+    text = json.dumps(summary, indent=2)
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
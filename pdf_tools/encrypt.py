@@ -0,0 +1,128 @@
+"""Password protection for PDF files"""
+
+import os
+import secrets
+import string
+import time
+import zipfile
+from io import BytesIO
+
+from pypdf import PdfReader, PdfWriter
+
+from pdf_tools.buffers import new_output_buffer
+from pdf_tools.workers import POOL_MIN_BYTES, default_workers, run_pool
+
+# Algorithms offered to users, strongest first; AES-256 is PDF 2.0 revision 6
+ENCRYPTION_ALGORITHMS = ("AES-256", "AES-128", "RC4-128")
+DEFAULT_ALGORITHM = "AES-256"
+
+
+def crypto_backend():
+    """Name and version of the cipher library pypdf uses, e.g. ('pycryptodome', '3.20.0')
+
+    AES needs pycryptodome or cryptography; without either pypdf only has
+    a slow pure-Python RC4.
+    """
+    try:
+        from pypdf._crypt_providers import crypt_provider
+    except ImportError:
+        return ("unknown", "")
+    return crypt_provider
+
+
+def generate_secure_password(length=16, include_symbols=True):
+    """Generate a cryptographically secure random password"""
+    alphabet = string.ascii_letters + string.digits
+    if include_symbols:
+        alphabet += string.punctuation
+        # Remove problematic characters for better compatibility
+        alphabet = alphabet.replace('"', '').replace("'", '').replace('\\', '')
+    return ''.join(secrets.choice(alphabet) for _ in range(length))
+
+
+def encrypt_pdf(pdf_file, password, algorithm=DEFAULT_ALGORITHM):
+    """Encrypt a PDF file with the given password and return the bytes"""
+    if algorithm not in ENCRYPTION_ALGORITHMS:
+        raise ValueError(f"Unsupported encryption algorithm '{algorithm}'")
+    if algorithm.startswith("AES") and crypto_backend()[0] == "local_crypt_fallback":
+        raise RuntimeError("AES encryption needs pycryptodome installed")
+
+    pdf_file.seek(0)
+    # Cloning keeps outlines, named destinations and form fields, and
+    # copies objects as they are instead of remapping them page by page
+    pdf_writer = PdfWriter(clone_from=PdfReader(pdf_file))
+
+    # Same password opens and owns the file
+    pdf_writer.encrypt(password, password, algorithm=algorithm)
+
+    output_stream = BytesIO()
+    pdf_writer.write(output_stream)
+    return output_stream.getvalue()
+
+
+def encrypt_one(pdf_bytes, password, algorithm=DEFAULT_ALGORITHM, output_path=None):
+    """Encrypt one file's bytes, reporting failure instead of raising
+
+    With `output_path` the result is written there and only its path and
+    size are returned, so nothing large travels back from a worker.
+    """
+    start = time.perf_counter()
+    result = {"ok": False, "data": None, "path": None, "bytes": 0, "error": None}
+    try:
+        data = encrypt_pdf(BytesIO(pdf_bytes), password, algorithm)
+        result["bytes"] = len(data)
+        if output_path is None:
+            result["data"] = data
+        else:
+            with open(output_path, "wb") as f:
+                f.write(data)
+            result["path"] = output_path
+        result["ok"] = True
+    except Exception as e:
+        result["error"] = str(e) or type(e).__name__
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def _output_path(output_dir, index):
+    return None if output_dir is None else os.path.join(output_dir, f"{index:05d}.pdf")
+
+
+def encrypt_many(inputs, workers=None, progress=None, algorithm=DEFAULT_ALGORITHM, output_dir=None):
+    """Encrypt (pdf_bytes, password) inputs in a bounded process pool
+
+    Passwords are chosen by the caller, so the list it shows always
+    matches the files. Results come back in input order; `progress(done,
+    total, index)` is called as each file finishes. A single worker, or
+    a small batch when no worker count is given (PDF_ENCRYPT_WORKERS sets
+    the default), runs in-process. With `output_dir`, each file is written
+    there as it finishes instead of being returned in memory.
+    """
+    items = [
+        (pdf_bytes, password, algorithm, _output_path(output_dir, index))
+        for index, (pdf_bytes, password) in enumerate(inputs)
+    ]
+    return run_pool(
+        encrypt_one, items, workers or default_workers("PDF_ENCRYPT_WORKERS"), progress,
+        min_bytes=POOL_MIN_BYTES if workers is None else 0
+    )
+
+
+def write_zip(entries, output=None, compression=zipfile.ZIP_STORED):
+    """Write (name, source) entries into a ZIP; a source is a file path or bytes
+
+    Paths are copied into the archive in chunks, so a batch written to
+    disk by `encrypt_many` never has to be in memory at once. Encrypted
+    streams do not compress, so entries are stored by default. Returns
+    the output rewound to the start.
+    """
+    if output is None:
+        output = new_output_buffer()
+    with zipfile.ZipFile(output, "w", compression) as zip_file:
+        for name, source in entries:
+            if isinstance(source, (bytes, bytearray)):
+                zip_file.writestr(name, source)
+            else:
+                zip_file.write(source, name)
+    output.seek(0)
+    return output
@@ -0,0 +1,87 @@
+"""Linearized ("fast web view") output for finished PDFs"""
+
+import time
+from io import BytesIO
+try:
+    import pikepdf  # qpdf bindings, the most reliable linearizer
+    PIKEPDF_AVAILABLE = True
+except ImportError:
+    PIKEPDF_AVAILABLE = False
+try:
+    import fitz  # PyMuPDF, linearizes on releases before 1.24
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    PYMUPDF_AVAILABLE = False
+
+from pdf_tools.buffers import new_output_buffer
+
+_backend = []
+
+
+def _pymupdf_can_linearize():
+    """Newer MuPDF releases dropped linearization and raise on save"""
+    doc = fitz.open()
+    try:
+        doc.new_page()
+        doc.save(BytesIO(), linear=True)
+        return True
+    except Exception:
+        return False
+    finally:
+        doc.close()
+
+
+def linearization_backend():
+    """Name of the library used to linearize, or None if none can"""
+    if not _backend:
+        if PIKEPDF_AVAILABLE:
+            _backend.append("pikepdf")
+        elif PYMUPDF_AVAILABLE and _pymupdf_can_linearize():
+            _backend.append("pymupdf")
+        else:
+            _backend.append(None)
+    return _backend[0]
+
+
+def is_linearized(pdf_bytes):
+    """True if the file starts with a linearization dictionary"""
+    # The spec requires it within the first 1024 bytes
+    return b"/Linearized" in pdf_bytes[:1024]
+
+
+def linearize_pdf(source, output=None):
+    """Rewrite a PDF so the first page can be shown before the download ends
+
+    `source` is bytes or a readable file. Returns (output, stats) with the
+    output rewound to the start; raises RuntimeError if no linearizer is
+    installed.
+    """
+    backend = linearization_backend()
+    if backend is None:
+        raise RuntimeError("Linearization needs pikepdf (or PyMuPDF older than 1.24)")
+
+    if not isinstance(source, (bytes, bytearray)):
+        source.seek(0)
+        source = source.read()
+    if output is None:
+        output = new_output_buffer()
+
+    start = time.perf_counter()
+    if backend == "pikepdf":
+        with pikepdf.open(BytesIO(source)) as pdf:
+            pdf.save(output, linearize=True)
+    else:
+        doc = fitz.open(stream=source, filetype="pdf")
+        try:
+            output.write(doc.tobytes(linear=True, garbage=1))
+        finally:
+            doc.close()
+
+    output_bytes = output.tell()
+    output.seek(0)
+    return output, {
+        "backend": backend,
+        "input_bytes": len(source),
+        "output_bytes": output_bytes,
+        "seconds": time.perf_counter() - start,
+    }
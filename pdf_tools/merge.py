@@ -0,0 +1,321 @@
+"""Merge several PDFs into one output written in a single pass"""
+
+import functools
+import hashlib
+import os
+import time
+from collections import defaultdict
+from io import BytesIO
+
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import (
+    ArrayObject,
+    DictionaryObject,
+    IndirectObject,
+    NameObject,
+    NullObject,
+    NumberObject,
+    StreamObject,
+    TextStringObject,
+)
+
+from pdf_tools.buffers import new_output_buffer
+from pdf_tools.page_ranges import pages_in_ranges, parse_page_ranges
+
+# Dictionaries that are pure resources and safe to share between pages
+_SHARED_DICT_TYPES = ("/Font", "/FontDescriptor", "/ExtGState", "/Encoding")
+# Colour space arrays such as [/ICCBased 12 0 R]
+_SHARED_ARRAY_HEADS = ("/ICCBased", "/Indexed", "/Separation", "/DeviceN", "/Pattern")
+
+
+def select_pages(expression, num_pages):
+    """Page indices chosen by a range expression such as "1-3, last"; blank means all
+
+    Returns None for every page, which lets the merge skip building a list.
+    """
+    if not expression or not expression.strip():
+        return None
+    return pages_in_ranges(parse_page_ranges(expression, num_pages))
+
+
+def _serialize(obj):
+    buffer = BytesIO()
+    obj.write_to_stream(buffer)
+    return buffer.getvalue()
+
+
+@functools.cache
+def _is_stream_type(cls):
+    # pypdf classes use a Protocol metaclass, which makes isinstance slow
+    return issubclass(cls, StreamObject)
+
+
+def _is_shared_resource(obj):
+    if isinstance(obj, dict):
+        return obj.get("/Type") in _SHARED_DICT_TYPES
+    if isinstance(obj, list):
+        return len(obj) > 0 and obj[0] in _SHARED_ARRAY_HEADS
+    return False
+
+
+def _index_objects(writer):
+    """Dedupe candidates and every reference to an object, in one walk
+
+    Returns streams grouped by (raw length, filter), the numbers of shared
+    resource dictionaries and arrays, and object number -> list of
+    (container, key) pairs that hold a reference to it.
+    """
+    streams = defaultdict(list)
+    shared = []
+    references = defaultdict(list)
+    for index, obj in enumerate(writer._objects):
+        if not isinstance(obj, (dict, list)):
+            continue
+        if _is_stream_type(type(obj)):
+            # Raw (still encoded) data, so nothing is decompressed here
+            streams[(len(obj._data), str(obj.get("/Filter")))].append(index + 1)
+        elif _is_shared_resource(obj):
+            shared.append(index + 1)
+
+        stack = [obj]
+        while stack:
+            container = stack.pop()
+            items = container.items() if isinstance(container, dict) else enumerate(container)
+            for key, value in items:
+                if type(value) is IndirectObject:
+                    if value.pdf is writer:
+                        references[value.idnum].append((container, key))
+                elif isinstance(value, (dict, list)):
+                    stack.append(value)
+    return streams, shared, references
+
+
+def _find_duplicates(writer, candidates):
+    """Map each duplicate's object number to the first identical object"""
+    canonical = {}  # digest -> object number
+    remap = {}
+    saved = 0
+    for idnum in candidates:
+        data = _serialize(writer._objects[idnum - 1])
+        digest = hashlib.sha256(data).digest()
+        if digest in canonical:
+            remap[idnum] = canonical[digest]
+            saved += len(data)
+        else:
+            canonical[digest] = idnum
+    return remap, saved
+
+
+def _remap_references(writer, remap, references):
+    """Point every reference to a duplicate at its canonical object"""
+    for duplicate, idnum in remap.items():
+        target = IndirectObject(idnum, 0, writer)
+        holders = references.pop(duplicate, [])
+        for container, key in holders:
+            container[key] = target
+        references[idnum].extend(holders)
+        # Keep the slot so object numbers in the xref table stay aligned
+        writer._objects[duplicate - 1] = NullObject()
+
+
+def deduplicate_resources(writer):
+    """Write identical fonts, images and colour profiles once
+
+    Streams (font programs, image XObjects, ICC profiles, forms) are only
+    hashed when another stream has the same raw length and filter; then
+    font, font descriptor and graphics-state dictionaries and colour space
+    arrays are hashed, repeatedly, since they only match once the objects
+    they reference share a number. Every reference is indexed in one walk
+    up front, so remapping only touches references to duplicates, which
+    become null objects. Returns (objects removed, bytes saved).
+    """
+    streams, shared, references = _index_objects(writer)
+    candidates = [idnum for group in streams.values() if len(group) > 1 for idnum in group]
+    remap, saved = _find_duplicates(writer, candidates)
+    removed = len(remap)
+    _remap_references(writer, remap, references)
+
+    while True:
+        remap, dict_saved = _find_duplicates(writer, shared)
+        if not remap:
+            return removed, saved
+        _remap_references(writer, remap, references)
+        shared = [idnum for idnum in shared if idnum not in remap]
+        removed += len(remap)
+        saved += dict_saved
+
+
+def source_title(pdf_file, index):
+    """Outline title for an input: its file name without extension"""
+    name = os.path.basename(getattr(pdf_file, "name", "") or "")
+    return os.path.splitext(name)[0] or f"Document {index + 1}"
+
+
+def _named_destination_pages(reader):
+    """Source page index of every named destination in `reader`
+
+    Built once per input: each read of `reader.named_destinations` walks
+    the whole name tree again.
+    """
+    pages = {}
+    for name, dest in reader.named_destinations.items():
+        page = reader.get_destination_page_number(dest)
+        if page >= 0:
+            pages[name] = page
+    return pages
+
+
+def _destination_page(item, page_numbers, named_pages):
+    """Source page index an outline item points at, or None
+
+    `named_pages` returns the dict from _named_destination_pages; it is
+    only called when an entry actually uses a named destination.
+    """
+    # Raw dictionary access, so references stay unresolved until needed
+    dest = item.get("/Dest")
+    if dest is None:
+        action = item.get("/A")
+        action = action.get_object() if action is not None else None
+        if not isinstance(action, DictionaryObject) or action.get("/S") != "/GoTo":
+            return None
+        dest = action.get("/D")
+    dest = dest.get_object() if dest is not None else None
+    if isinstance(dest, DictionaryObject):
+        dest = dest.get("/D")
+        dest = dest.get_object() if dest is not None else None
+    if isinstance(dest, ArrayObject) and dest:
+        target = list.__getitem__(dest, 0)
+        if isinstance(target, IndirectObject):
+            return page_numbers.get(target.idnum)
+        return None
+    if dest is not None:
+        return named_pages().get(str(dest))
+    return None
+
+
+def _append_outline_item(writer, parent, title, page_ref, is_root=False):
+    """Link a new bookmark to `page_ref` as the last child of `parent`
+
+    Builds the outline dictionaries directly; PdfWriter.add_outline_item
+    creates and validates a Destination per call, which dominates the cost
+    of merging large outlines. Entries are written closed, so each one's
+    /Count is minus its number of children.
+    """
+    item = DictionaryObject({
+        NameObject("/Title"): TextStringObject(title),
+        NameObject("/Dest"): ArrayObject([page_ref, NameObject("/Fit")]),
+        NameObject("/Parent"): parent.indirect_reference,
+    })
+    ref = writer._add_object(item)
+    last = parent.get("/Last")
+    if last is None:
+        parent[NameObject("/First")] = ref
+    else:
+        last.get_object()[NameObject("/Next")] = ref
+        item[NameObject("/Prev")] = last
+    parent[NameObject("/Last")] = ref
+    parent[NameObject("/Count")] = NumberObject(parent.get("/Count", 0) + (1 if is_root else -1))
+    return item
+
+
+def _copy_outline(writer, first, page_numbers, named_pages, page_refs, parent, seen):
+    """Re-create a source's outline under `parent`, pointing at the merged pages
+
+    Walks the raw /First and /Next chain rather than `reader.outline`, which
+    would build a Destination object per entry only for us to discard it.
+    """
+    node = first
+    while node is not None:
+        item = node.get_object()
+        if id(item) in seen:
+            break  # malformed outline with a cycle
+        seen.add(id(item))
+
+        page_ref = page_refs.get(_destination_page(item, page_numbers, named_pages))
+        if page_ref is None:
+            # Entry points at a page that was not merged; its children move up a level
+            own = parent
+        else:
+            own = _append_outline_item(writer, parent, str(item.get("/Title", "")), page_ref)
+        child = item.get("/First")
+        if child is not None:
+            _copy_outline(writer, child, page_numbers, named_pages, page_refs, own, seen)
+        node = item.get("/Next")
+
+
+def merge_pdfs(sources, output=None, progress=None, deduplicate=False, outlines=False, titles=None):
+    """Append the selected pages of each source to one document and write it once
+
+    `sources` is a list of (pdf_file, page_indices) where page_indices is
+    None for every page; pdf_file may also be an already parsed PdfReader. The result is written straight into `output`
+    (a new spooled buffer by default), rewound and returned together with
+    stats; the page count comes from the plan rather than re-reading the
+    result. `progress(index, total)` is called as each source is added.
+    With `deduplicate`, resources repeated across inputs are written once;
+    the stats time that step and the write separately.
+
+    With `outlines`, every input gets a top-level bookmark (from `titles`
+    or its file name) holding its own bookmarks, remapped to the merged
+    page numbers while the reader is still open.
+    """
+    start = time.perf_counter()
+    writer = PdfWriter()
+    total_pages = 0
+    outline_root = None
+    outline_seconds = 0.0
+
+    for index, (pdf_file, page_indices) in enumerate(sources):
+        if progress:
+            progress(index, len(sources))
+        reader = pdf_file if isinstance(pdf_file, PdfReader) else PdfReader(pdf_file)
+        if page_indices is None:
+            page_indices = range(len(reader.pages))
+        page_refs = {}  # source page index -> merged page reference
+        for page_idx in page_indices:
+            merged_page = writer.add_page(reader.pages[page_idx])
+            page_refs.setdefault(page_idx, merged_page.indirect_reference)
+            total_pages += 1
+
+        if outlines and page_refs:
+            outline_start = time.perf_counter()
+            if outline_root is None:
+                outline_root = writer.get_outline_root()
+            title = titles[index] if titles else source_title(pdf_file, index)
+            parent = _append_outline_item(writer, outline_root, title, page_refs[page_indices[0]], is_root=True)
+            try:
+                source_outlines = reader.trailer["/Root"].get("/Outlines")
+                first = source_outlines.get_object().get("/First") if source_outlines is not None else None
+                if first is not None:
+                    page_numbers = {
+                        page.indirect_reference.idnum: page_idx
+                        for page_idx, page in enumerate(reader.pages)
+                    }
+                    named_pages = functools.cache(functools.partial(_named_destination_pages, reader))
+                    _copy_outline(writer, first, page_numbers, named_pages, page_refs, parent, set())
+            except Exception as e:
+                # A damaged outline should not stop the merge
+                print(f"Could not copy bookmarks from {title}: {str(e)}")
+            outline_seconds += time.perf_counter() - outline_start
+
+    dedupe_start = time.perf_counter()
+    removed, saved = deduplicate_resources(writer) if deduplicate else (0, 0)
+    write_start = time.perf_counter()
+
+    if output is None:
+        output = new_output_buffer()
+    writer.write(output)
+    output_size = output.tell()
+    output.seek(0)
+    write_seconds = time.perf_counter() - write_start
+
+    return output, {
+        "files": len(sources),
+        "pages": total_pages,
+        "bytes": output_size,
+        "duplicates_removed": removed,
+        "bytes_saved": saved,
+        "outline_seconds": outline_seconds,
+        "dedupe_seconds": write_start - dedupe_start,
+        "write_seconds": write_seconds,
+        "seconds": time.perf_counter() - start,
+    }
@@ -0,0 +1,76 @@
+"""Optional size optimization pass for finished PDFs"""
+
+import time
+try:
+    import fitz  # PyMuPDF rewrites streams and images
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    PYMUPDF_AVAILABLE = False
+
+from pdf_tools.buffers import new_output_buffer
+
+# Target resolutions offered for image downsampling; None keeps images as they are
+IMAGE_DPI_CHOICES = (None, 300, 150, 96)
+
+# Images only slightly above the target are left alone, re-encoding them saves little
+DPI_THRESHOLD_FACTOR = 1.3
+
+
+def optimize_pdf(source, image_dpi=None, image_quality=75, output=None):
+    """Recompress streams, pack objects into object streams and drop unused objects
+
+    `source` is bytes or a readable file. With `image_dpi`, images above
+    that resolution are downsampled to it and images are re-encoded as
+    JPEG at `image_quality`. If the result is not smaller the input is
+    returned unchanged. Returns (output, stats) with the output rewound
+    to the start.
+    """
+    if not PYMUPDF_AVAILABLE:
+        raise RuntimeError("PDF optimization needs PyMuPDF")
+
+    if not isinstance(source, (bytes, bytearray)):
+        source.seek(0)
+        source = source.read()
+    if output is None:
+        output = new_output_buffer()
+
+    start = time.perf_counter()
+    doc = fitz.open(stream=source, filetype="pdf")
+    try:
+        if image_dpi:
+            doc.rewrite_images(
+                dpi_threshold=int(image_dpi * DPI_THRESHOLD_FACTOR),
+                dpi_target=image_dpi,
+                quality=image_quality
+            )
+        # garbage=3 also merges duplicate objects
+        optimized = doc.tobytes(
+            garbage=3,
+            deflate=True,
+            deflate_images=True,
+            deflate_fonts=True,
+            use_objstms=1
+        )
+    finally:
+        doc.close()
+
+    kept_original = len(optimized) >= len(source)
+    output.write(source if kept_original else optimized)
+    output_bytes = output.tell()
+    output.seek(0)
+    return output, {
+        "input_bytes": len(source),
+        "output_bytes": output_bytes,
+        "kept_original": kept_original,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def describe_savings(stats):
+    """One-line before/after summary for the UI"""
+    before = stats["input_bytes"] / 1024 / 1024
+    after = stats["output_bytes"] / 1024 / 1024
+    if stats["kept_original"]:
+        return f"🗜️ Already compact at {before:.2f} MB, left unchanged ({stats['seconds']:.2f}s)"
+    saved = (1 - stats["output_bytes"] / stats["input_bytes"]) * 100
+    return f"🗜️ Optimized: {before:.2f} MB → {after:.2f} MB ({saved:.0f}% smaller) in {stats['seconds']:.2f}s"
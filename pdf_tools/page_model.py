@@ -0,0 +1,172 @@
+"""Compact page ordering model for the Page Manager"""
+
+from array import array
+
+
+class PageModel:
+    """Display order and deletion flags for the pages of one document
+
+    Pages are identified by their original 0-based index. `order` lists them
+    in display order and a reverse index maps each page back to its position,
+    so lookups, swaps, deletes and restores are O(1) and range operations
+    only touch the pages in the range. Deletion is a flag per page, which
+    lets a deleted page keep its place in the order until it is restored.
+    Rotation is kept per page as a multiple of 90 degrees and crops as
+    margins, so neither touches page content until the output is written.
+    """
+
+    __slots__ = ("num_pages", "order", "_position", "_deleted", "_deleted_count", "_rotation", "_crop")
+
+    def __init__(self, num_pages):
+        self.num_pages = num_pages
+        self.reset()
+
+    def __len__(self):
+        return len(self.order)
+
+    def __iter__(self):
+        return iter(self.order)
+
+    def reset(self):
+        """Original order with nothing deleted"""
+        self.order = array("i", range(self.num_pages))
+        self._position = array("i", range(self.num_pages))
+        self._deleted = bytearray(self.num_pages)
+        self._deleted_count = 0
+        self._rotation = array("h", bytes(2 * self.num_pages))
+        self._crop = {}  # page -> (left, top, right, bottom) margins
+
+    def _reindex(self, start=0, end=None):
+        """Refresh the reverse index for positions start..end after a change"""
+        order = self.order
+        position = self._position
+        for pos in range(start, len(order) if end is None else end):
+            position[order[pos]] = pos
+
+    # Lookups
+
+    def page_at(self, pos):
+        """Original index of the page shown at `pos`"""
+        return self.order[pos]
+
+    def position_of(self, page):
+        """Display position of a page, or -1 if it is not in the order"""
+        return self._position[page]
+
+    def is_deleted(self, page):
+        return bool(self._deleted[page])
+
+    def rotation(self, page):
+        """Extra clockwise rotation applied to a page, in degrees"""
+        return self._rotation[page]
+
+    def crop(self, page):
+        """Crop margins as fractions (left, top, right, bottom) of the page
+        as originally displayed, or None when the page is not cropped"""
+        return self._crop.get(page)
+
+    @property
+    def deleted_count(self):
+        return self._deleted_count
+
+    @property
+    def active_count(self):
+        """Pages in the order that will be written"""
+        if self._deleted_count == 0:
+            return len(self.order)
+        deleted = self._deleted
+        return sum(1 for page in self.order if not deleted[page])
+
+    def deleted_pages(self):
+        """Set of deleted original indices"""
+        return {page for page in range(self.num_pages) if self._deleted[page]}
+
+    def active_order(self):
+        """Original indices in output order, deleted pages skipped"""
+        deleted = self._deleted
+        return [page for page in self.order if not deleted[page]]
+
+    def window(self, start, end):
+        """(position, original index, deleted) for positions start..end"""
+        end = min(end, len(self.order))
+        return [(pos, self.order[pos], bool(self._deleted[self.order[pos]])) for pos in range(start, end)]
+
+    # Edits
+
+    def rotate(self, page, degrees):
+        """Rotate a page clockwise by a multiple of 90 degrees"""
+        if degrees % 90:
+            raise ValueError("Rotation must be a multiple of 90 degrees")
+        self._rotation[page] = (self._rotation[page] + degrees) % 360
+
+    def rotate_range(self, first, last, degrees):
+        """Rotate original pages first..last (inclusive)"""
+        if degrees % 90:
+            raise ValueError("Rotation must be a multiple of 90 degrees")
+        rotation = self._rotation
+        for page in range(first, last + 1):
+            rotation[page] = (rotation[page] + degrees) % 360
+
+    def crop_range(self, first, last, margins):
+        """Set crop margins for original pages first..last; zero margins clear the crop"""
+        margins = tuple(float(m) for m in margins)
+        if len(margins) != 4 or any(m < 0 for m in margins) or \
+                margins[0] + margins[2] >= 1 or margins[1] + margins[3] >= 1:
+            raise ValueError("Crop margins must leave part of the page visible")
+        for page in range(first, last + 1):
+            if any(margins):
+                self._crop[page] = margins
+            else:
+                self._crop.pop(page, None)
+
+    def delete(self, page):
+        if not self._deleted[page]:
+            self._deleted[page] = 1
+            self._deleted_count += 1
+
+    def restore(self, page):
+        if self._deleted[page]:
+            self._deleted[page] = 0
+            self._deleted_count -= 1
+
+    def delete_range(self, first, last):
+        """Delete original pages first..last (inclusive)"""
+        for page in range(first, last + 1):
+            self.delete(page)
+
+    def extract_range(self, first, last):
+        """Keep only original pages first..last, in original order"""
+        self.order = array("i", range(first, last + 1))
+        self._position = array("i", [-1]) * self.num_pages
+        self._reindex()
+        # Everything outside the range is deleted
+        self._deleted = bytearray(b"\x01") * self.num_pages
+        self._deleted[first:last + 1] = bytes(last - first + 1)
+        self._deleted_count = self.num_pages - (last - first + 1)
+
+    def swap(self, pos_a, pos_b):
+        """Exchange the pages at two positions"""
+        order = self.order
+        order[pos_a], order[pos_b] = order[pos_b], order[pos_a]
+        self._position[order[pos_a]] = pos_a
+        self._position[order[pos_b]] = pos_b
+
+    def move(self, from_pos, to_pos):
+        """Move the page at from_pos to to_pos, shifting the pages between"""
+        if from_pos == to_pos:
+            return
+        page = self.order.pop(from_pos)
+        self.order.insert(to_pos, page)
+        self._reindex(min(from_pos, to_pos), max(from_pos, to_pos) + 1)
+
+    def reverse(self):
+        """Reverse the active pages, dropping deleted ones from the order"""
+        active = self.active_order()
+        active.reverse()
+        self.set_order(active)
+
+    def set_order(self, order):
+        """Replace the display order with the given original indices"""
+        self.order = array("i", order)
+        self._position = array("i", [-1]) * self.num_pages
+        self._reindex()
@@ -0,0 +1,198 @@
+"""Operation log for Page Manager edits with undo/redo and single-pass output"""
+
+import io
+import json
+
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import RectangleObject
+
+from pdf_tools.page_model import PageModel
+
+# Operation name -> required fields. Positions are 0-based display positions,
+# pages are 0-based original page indices.
+OPERATIONS = {
+    "move": ("from", "to"),
+    "delete": ("page",),
+    "restore": ("page",),
+    "delete_range": ("first", "last"),
+    "extract_range": ("first", "last"),
+    "reverse": (),
+    "rotate": ("page", "degrees"),
+    "rotate_range": ("first", "last", "degrees"),
+    "crop_range": ("first", "last", "margins"),
+    "set_order": ("order",),
+    "reset": (),
+}
+
+
+def validate_op(op):
+    """Check an operation dict names a known operation with its fields"""
+    name = op.get("op")
+    if name not in OPERATIONS:
+        raise ValueError(f"Unknown page operation: {name!r}")
+    missing = [field for field in OPERATIONS[name] if field not in op]
+    if missing:
+        raise ValueError(f"Page operation {name!r} is missing {', '.join(missing)}")
+    return op
+
+
+def apply_op(model, op):
+    """Apply one operation to a PageModel"""
+    name = op["op"]
+    if name == "move":
+        if abs(op["from"] - op["to"]) == 1:
+            model.swap(op["from"], op["to"])
+        else:
+            model.move(op["from"], op["to"])
+    elif name == "delete":
+        model.delete(op["page"])
+    elif name == "restore":
+        model.restore(op["page"])
+    elif name == "delete_range":
+        model.delete_range(op["first"], op["last"])
+    elif name == "extract_range":
+        model.extract_range(op["first"], op["last"])
+    elif name == "reverse":
+        model.reverse()
+    elif name == "rotate":
+        model.rotate(op["page"], op["degrees"])
+    elif name == "rotate_range":
+        model.rotate_range(op["first"], op["last"], op["degrees"])
+    elif name == "crop_range":
+        model.crop_range(op["first"], op["last"], op["margins"])
+    elif name == "set_order":
+        model.set_order(op["order"])
+    elif name == "reset":
+        model.reset()
+
+
+class PageEditLog:
+    """Record Page Manager edits as operations instead of mutating state directly
+
+    Every edit is appended to `ops` and applied to `model`, which always
+    reflects the operations up to the undo cursor. Undo and redo move the
+    cursor and rebuild the model by replaying the log, which is cheap since
+    each operation only touches the pages it names. However many edits are
+    made, `compact` reduces them to a single output plan that
+    `materialize` writes in one pass.
+    """
+
+    def __init__(self, num_pages, ops=None):
+        self.num_pages = num_pages
+        self.ops = []
+        self.cursor = 0  # number of ops currently applied
+        self.model = PageModel(num_pages)
+        for op in ops or []:
+            self.apply(op)
+
+    def __len__(self):
+        return self.cursor
+
+    def apply(self, op):
+        """Record and apply an operation, discarding any redo history"""
+        validate_op(op)
+        apply_op(self.model, op)
+        del self.ops[self.cursor:]
+        self.ops.append(op)
+        self.cursor += 1
+
+    @property
+    def can_undo(self):
+        return self.cursor > 0
+
+    @property
+    def can_redo(self):
+        return self.cursor < len(self.ops)
+
+    def _replay(self):
+        self.model = PageModel(self.num_pages)
+        for op in self.ops[:self.cursor]:
+            apply_op(self.model, op)
+
+    def undo(self):
+        if self.can_undo:
+            self.cursor -= 1
+            self._replay()
+
+    def redo(self):
+        if self.can_redo:
+            apply_op(self.model, self.ops[self.cursor])
+            self.cursor += 1
+
+    def compact(self):
+        """Final output as a list of (original page index, extra rotation, crop margins)"""
+        model = self.model
+        return [(page, model.rotation(page), model.crop(page)) for page in model.active_order()]
+
+    def to_json(self):
+        """Serialise the applied operations for later or headless replay"""
+        return json.dumps({"num_pages": self.num_pages, "ops": self.ops[:self.cursor]})
+
+    @classmethod
+    def from_json(cls, data):
+        """Rebuild a log (and its final page model) from to_json output"""
+        payload = json.loads(data)
+        return cls(payload["num_pages"], payload["ops"])
+
+
+def apply_crop(page, margins):
+    """Shrink a page's /CropBox by margins given relative to its displayed orientation"""
+    # Margins follow the page as shown, so undo any /Rotate it already has
+    # to get (left, top, right, bottom) in unrotated PDF space
+    shift = (page.rotation % 360) // 90
+    left, top, right, bottom = (margins[(i + shift) % 4] for i in range(4))
+
+    box = page.cropbox
+    width, height = float(box.width), float(box.height)
+    x0, y0 = float(box.left), float(box.bottom)
+    page.cropbox = RectangleObject([
+        x0 + left * width,
+        y0 + bottom * height,
+        x0 + (1 - right) * width,
+        y0 + (1 - top) * height,
+    ])
+
+
+def materialize(reader, plan):
+    """Write the pages of a compacted plan from an open PdfReader in one pass
+
+    Rotation and crop only change /Rotate and /CropBox in the page
+    dictionary; content streams are copied without being decoded.
+    """
+    writer = PdfWriter()
+    for page_idx, rotation, crop in plan:
+        page = writer.add_page(reader.pages[page_idx])
+        if crop:
+            apply_crop(page, crop)
+        if rotation:
+            page.rotate(rotation)
+
+    output_bytes = io.BytesIO()
+    writer.write(output_bytes)
+    output_bytes.seek(0)
+    return output_bytes
+
+
+def open_reader(pdf_file, password=None):
+    """PdfReader for an upload or file, decrypted when a password is given"""
+    pdf_file.seek(0)
+    reader = PdfReader(pdf_file)
+
+    # Handle encrypted PDFs
+    if reader.is_encrypted and password:
+        if not reader.decrypt(password):
+            raise Exception("Failed to decrypt PDF with provided password")
+    return reader
+
+
+def create_modified_pdf(pdf_file, edit_log, password=None):
+    """Create a new PDF from the compacted edit log in a single pass"""
+    # However many edits were made, the output is written once
+    return materialize(open_reader(pdf_file, password), edit_log.compact())
+
+
+def replay_to_pdf(pdf_file, ops, password=None):
+    """Apply a list of operations to a PDF file headlessly and return the result"""
+    reader = open_reader(pdf_file, password)
+    log = PageEditLog(len(reader.pages), ops)
+    return materialize(reader, log.compact())
@@ -0,0 +1,58 @@
+"""Parse page-range expressions such as "1-3, 5, 8-last" """
+
+import re
+
+_RANGE_RE = re.compile(r"^(\d+|last|end)?\s*(-)?\s*(\d+|last|end)?$")
+
+
+def _page_number(token, num_pages):
+    if token in ("last", "end"):
+        return num_pages
+    return int(token)
+
+
+def parse_page_ranges(expression, num_pages):
+    """Turn a 1-based page-range expression into 0-based inclusive (first, last) tuples
+
+    Parts are separated by commas or semicolons and each is a page ("5"),
+    a range ("1-3"), an open range ("8-" to the end, "-3" from the start)
+    or uses "last"/"end" for the final page. A range written backwards
+    ("5-3") selects those pages in reverse. Ranges keep the order they
+    were written in. Raises ValueError for anything outside 1..num_pages.
+    """
+    ranges = []
+    for part in re.split(r"[,;]", expression.lower()):
+        part = part.strip()
+        if not part:
+            continue
+        match = _RANGE_RE.match(part)
+        if not match or not (match.group(1) or match.group(3)):
+            raise ValueError(f"Invalid page range '{part}'")
+
+        start, dash, end = match.groups()
+        first = _page_number(start, num_pages) if start else 1
+        if dash:
+            last = _page_number(end, num_pages) if end else num_pages
+        elif end:
+            # Two numbers without a dash, e.g. "3 4"
+            raise ValueError(f"Invalid page range '{part}'")
+        else:
+            last = first
+
+        for page in (first, last):
+            if page < 1 or page > num_pages:
+                raise ValueError(f"Page {page} is out of range (1-{num_pages})")
+        ranges.append((first - 1, last - 1))
+
+    if not ranges:
+        raise ValueError("No pages selected")
+    return ranges
+
+
+def pages_in_ranges(ranges):
+    """0-based page indices covered by (first, last) ranges, in range order"""
+    pages = []
+    for first, last in ranges:
+        step = 1 if last >= first else -1
+        pages.extend(range(first, last + step, step))
+    return pages
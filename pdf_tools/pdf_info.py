@@ -0,0 +1,140 @@
+"""Per-upload PDF metadata, parsed once in the background and cached by content"""
+
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from pypdf import PdfReader
+
+from pdf_tools.thumbnail_cache import content_hash
+
+PREVIEW_CHARS = 200
+
+
+def read_pdf_info(pdf_bytes):
+    """Page count, first-page text preview, page sizes and encryption status"""
+    try:
+        reader = PdfReader(BytesIO(pdf_bytes))
+        encrypted = reader.is_encrypted
+        # Files with only an owner password open with an empty user password
+        if encrypted and not reader.decrypt(""):
+            return {
+                "pages": "Unknown",
+                "preview_text": "Encrypted PDF - password required",
+                "page_sizes": [],
+                "encrypted": True,
+            }
+
+        num_pages = len(reader.pages)
+        page_sizes = [
+            (round(float(page.mediabox.width)), round(float(page.mediabox.height)))
+            for page in reader.pages
+        ]
+
+        # Try to extract text from first page for preview
+        first_page_text = ""
+        if num_pages > 0:
+            text = reader.pages[0].extract_text() or ""
+            # Get first 200 characters for preview
+            first_page_text = text[:PREVIEW_CHARS] + "..." if len(text) > PREVIEW_CHARS else text
+            first_page_text = first_page_text.replace('\n', ' ').strip()
+
+        return {
+            "pages": num_pages,
+            "preview_text": first_page_text if first_page_text else "No text content available",
+            "page_sizes": page_sizes,
+            "encrypted": encrypted,
+        }
+    except Exception as e:
+        return {
+            "pages": "Unknown",
+            "preview_text": f"Error reading PDF: {str(e)}",
+            "page_sizes": [],
+            "encrypted": False,
+        }
+
+
+def describe_page_sizes(page_sizes):
+    """Short label such as '210 × 297 mm' or 'Mixed (3 sizes)'"""
+    unique = set(page_sizes)
+    if not unique:
+        return "Unknown"
+    if len(unique) > 1:
+        return f"Mixed ({len(unique)} sizes)"
+    width, height = page_sizes[0]
+    return f"{width * 25.4 / 72:.0f} × {height * 25.4 / 72:.0f} mm"
+
+
+class PdfInfoCache:
+    """Metadata for uploaded PDFs, keyed by content hash
+
+    `submit` starts parsing on a background thread and returns the key
+    straight away, so all uploads are parsed concurrently while the page
+    is drawn. `get` waits for that one result. The same bytes are never
+    parsed twice, however many reruns or sessions ask for them.
+    """
+
+    def __init__(self, max_entries=512, workers=2):
+        self.max_entries = max_entries
+        self.parses = 0
+        self._entries = OrderedDict()  # content hash -> Future of info dict
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pdf-info")
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def _parse(self, pdf_bytes):
+        with self._lock:
+            self.parses += 1
+        return read_pdf_info(pdf_bytes)
+
+    def submit(self, pdf_bytes, key=None):
+        """Queue metadata extraction for pdf_bytes and return its cache key"""
+        key = key or content_hash(pdf_bytes)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return key
+            self._entries[key] = self._executor.submit(self._parse, pdf_bytes)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return key
+
+    def get(self, key, timeout=None, pdf_bytes=None):
+        """Metadata for a submitted key, waiting for it if still being parsed
+
+        The cache is shared, so other uploads may have evicted the key since
+        it was submitted; with `pdf_bytes` it is then parsed again rather
+        than returning None.
+        """
+        with self._lock:
+            future = self._entries.get(key)
+        if future is None:
+            if pdf_bytes is None:
+                return None
+            self.submit(pdf_bytes, key)
+            with self._lock:
+                future = self._entries.get(key)
+            if future is None:  # evicted again straight away by a tiny cache
+                return read_pdf_info(pdf_bytes)
+        return future.result(timeout)
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_pdf_info_cache():
+    """Process-wide metadata cache; PDF_INFO_WORKERS sets the parse threads"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = PdfInfoCache(workers=int(os.environ.get("PDF_INFO_WORKERS", "2")))
+        return _default_cache
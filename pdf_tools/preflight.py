@@ -0,0 +1,89 @@
+"""Validate and parse merge inputs concurrently before they are stitched together"""
+
+import time
+from io import BytesIO
+
+from pypdf import PdfReader, PdfWriter
+
+from pdf_tools.workers import POOL_MIN_BYTES, default_workers, pool_size, run_pool
+
+
+def preflight_pdf(pdf_bytes, password=None, page_indices=None, keep_reader=False):
+    """Parse one input and report whether it can be merged
+
+    Loads the page tree and every page in `page_indices` (all pages when
+    None), tries the given (or empty) password on encrypted files and
+    repairs broken xref tables. Content streams are left alone: the merge
+    copies them without decoding, so checking them would be wasted work.
+
+    With `keep_reader` (only useful in the caller's own process) the
+    parsed, decrypted reader is returned as `reader` for merge_pdfs to
+    use directly. Otherwise, when the file needed repair or decryption,
+    `pdf_bytes` in the result holds a clean copy so the writer never has
+    to repeat that work; it is None when the original upload can be used.
+    """
+    start = time.perf_counter()
+    result = {"ok": False, "pages": 0, "encrypted": False, "repaired": False, "error": None,
+              "pdf_bytes": None, "reader": None}
+    try:
+        try:
+            reader = PdfReader(BytesIO(pdf_bytes), strict=True)
+            reader.trailer  # noqa: B018 - forces the xref to be read
+        except Exception:
+            # Fall back to pypdf's lenient parser, which rebuilds the xref
+            reader = PdfReader(BytesIO(pdf_bytes), strict=False)
+            result["repaired"] = True
+
+        if reader.is_encrypted:
+            result["encrypted"] = True
+            if password and not reader.decrypt(password):
+                raise ValueError("Incorrect password")
+            if not password and not reader.decrypt(""):
+                raise ValueError("Encrypted PDF - password required")
+
+        pages = reader.pages
+        # Pages that will not be merged are never parsed
+        for page_idx in range(len(pages)) if page_indices is None else page_indices:
+            pages[page_idx]  # noqa: B018 - resolves the page dictionary
+        result["pages"] = len(pages)
+
+        if keep_reader:
+            result["reader"] = reader
+        elif result["repaired"] or result["encrypted"]:
+            clean = BytesIO()
+            PdfWriter(clone_from=reader).write(clean)
+            result["pdf_bytes"] = clean.getvalue()
+        result["ok"] = True
+    except Exception as e:
+        result["error"] = str(e) or type(e).__name__
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def preflight_many(inputs, workers=None, progress=None):
+    """Preflight (pdf_bytes, password[, page_indices]) inputs in a bounded process pool
+
+    Results come back in input order. `progress(done, total, index)` is
+    called as each file finishes, in completion order, so callers can show
+    real per-file progress. A single worker, or a small batch when no
+    worker count is given (PDF_PREFLIGHT_WORKERS sets the default), runs
+    everything in-process and keeps each parsed reader for the merge.
+    """
+    min_bytes = POOL_MIN_BYTES if workers is None else 0
+    workers = pool_size(inputs, workers or default_workers("PDF_PREFLIGHT_WORKERS"), min_bytes)
+    if workers == 1:
+        inputs = [(item[0], item[1], item[2] if len(item) > 2 else None, True) for item in inputs]
+    return run_pool(preflight_pdf, inputs, workers, progress)
+
+
+def merge_source(check, pdf_file):
+    """What merge_pdfs should read for a checked input
+
+    The reader kept by an in-process preflight, else the repaired or
+    decrypted copy, else the original `pdf_file`.
+    """
+    if check["reader"] is not None:
+        return check["reader"]
+    if check["pdf_bytes"]:
+        return BytesIO(check["pdf_bytes"])
+    return pdf_file
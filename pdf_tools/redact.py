@@ -0,0 +1,482 @@
+"""Detection and redaction of sensitive numbers and text in PDFs"""
+
+import bisect
+import io
+import os
+import re
+import threading
+from array import array
+from collections import OrderedDict
+try:
+    import fitz  # PyMuPDF for text extraction and redaction
+    PYMUPDF_AVAILABLE = True
+    # Plain-text flags, so extracted characters and whitespace match page.get_text()
+    TEXT_FLAGS = fitz.TEXTFLAGS_TEXT
+except ImportError:
+    PYMUPDF_AVAILABLE = False
+
+from pdf_tools.thumbnail_cache import content_hash
+
+# Detectors that can be switched on for a scan
+REDACTION_PATTERNS = ("tfn", "abn", "email", "phone", "custom")
+
+# ABNs, TFNs and phone numbers only ever match inside a run of digits,
+# whitespace, dashes, brackets and plus signs holding at least nine digits,
+# so one scan for those runs limits where the number patterns have to look.
+# A run is matched from its first digit, which keeps the scan fast.
+NUMBER_RUN = re.compile(r'\d(?:[\s()+-]*\d){8}[\d\s()+-]*')
+
+# ABN patterns: 11 digits in various formats
+ABN_PATTERNS = (
+    re.compile(r'\b\d{2}\s+\d{3}\s+\d{3}\s+\d{3}\b'),  # XX XXX XXX XXX (with spaces)
+    re.compile(r'\b\d{2}[\s-]?\d{3}[\s-]?\d{3}[\s-]?\d{3}\b'),  # XX XXX XXX XXX or XX-XXX-XXX-XXX
+    re.compile(r'\b\d{11}\b'),  # XXXXXXXXXXX
+)
+
+# TFN patterns: 9 digits, not part of a longer number
+TFN_PATTERNS = (
+    re.compile(r'(?<!\d)\d{3}[\s-]?\d{3}[\s-]?\d{3}(?!\d)'),  # XXX XXX XXX or XXX-XXX-XXX
+    re.compile(r'(?<!\d)\d{9}(?!\d)'),  # XXXXXXXXX
+)
+
+# Two digits just before a TFN suggest it is the end of an oddly spaced ABN
+ABN_PREFIX = re.compile(r'\d{2}[\s-]?$')
+
+# Numbers introduced by a label
+ABN_CONTEXT = re.compile(
+    r'(?i)(?:abn|australian\s*business\s*number|a\.b\.n\.)[:\s]*(\d{2}[\s-]?\d{3}[\s-]?\d{3}[\s-]?\d{3}|\d{11})'
+)
+TFN_CONTEXT = re.compile(r'(?i)(?:tfn|tax\s*file\s*number|tax\s*file\s*no)[:\s]*(\d{3}[\s-]?\d{3}[\s-]?\d{3}|\d{9})')
+
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+
+PHONE_PATTERNS = (
+    re.compile(r'(?:\+61|0)[2-9]\d{8}'),  # Australian mobile/landline
+    re.compile(r'\(0[2-9]\)\s*\d{4}[\s-]?\d{4}'),  # (0X) XXXX XXXX
+    re.compile(r'0[2-9][\s-]?\d{4}[\s-]?\d{4}'),  # 0X XXXX XXXX
+)
+
+NON_DIGIT = re.compile(r'\D')
+
+
+def _merge_spans(spans):
+    """Sorted, non-overlapping (starts, ends) covering the given spans"""
+    starts, ends = [], []
+    for start, end in sorted(spans):
+        if ends and start <= ends[-1]:
+            ends[-1] = max(ends[-1], end)
+        else:
+            starts.append(start)
+            ends.append(end)
+    return starts, ends
+
+
+def _overlaps(merged, start, end):
+    """Whether start-end overlaps any span in a _merge_spans result"""
+    starts, ends = merged
+    index = bisect.bisect_left(starts, end) - 1
+    return index >= 0 and ends[index] > start
+
+
+def _item(item_type, match, digits=None):
+    item = {
+        'type': item_type,
+        'text': match.group(),
+        'start': match.start(),
+        'end': match.end()
+    }
+    if digits is not None:
+        item['digits'] = digits  # Normalized digits, the same whatever the format
+    return item
+
+
+def number_windows(text):
+    """(pos, endpos) pairs bounding every place a number pattern can match
+
+    A window starts at a run's first digit, or at the '(' or '+' right
+    before it, and reaches one character past the run so lookaheads see
+    the real text.
+    """
+    windows = []
+    for match in NUMBER_RUN.finditer(text):
+        start = match.start()
+        if start and text[start - 1] in '(+':
+            start -= 1
+        windows.append((start, match.end() + 1))
+    return windows
+
+
+class RedactionDetector:
+    """The enabled detectors, compiled once and run over page text
+
+    `patterns` maps names from REDACTION_PATTERNS to whether they are
+    enabled. Items come back in the same order as running the ABN, TFN,
+    email, phone and custom detectors one after another; an invalid
+    custom pattern finds nothing.
+    """
+
+    def __init__(self, patterns, custom_pattern=None):
+        self.patterns = {name: bool(patterns.get(name)) for name in REDACTION_PATTERNS}
+        self.custom = None
+        if self.patterns['custom'] and custom_pattern:
+            try:
+                self.custom = re.compile(custom_pattern, re.IGNORECASE)
+            except re.error:
+                pass
+
+    def detect(self, text):
+        """Sensitive items in one page's text, with their character offsets"""
+        windows = number_windows(text)
+        found_items = []
+
+        if windows and (self.patterns['abn'] or self.patterns['tfn']):
+            # ABNs are found for TFN detection too, so it can skip their last 9 digits
+            abns = self._find_abns(text, windows)
+            if self.patterns['abn']:
+                found_items.extend(abns)
+            if self.patterns['tfn']:
+                found_items.extend(self._find_tfns(text, windows, abns))
+
+        if self.patterns['email'] and '@' in text:
+            found_items.extend(_item('Email', match) for match in EMAIL_PATTERN.finditer(text))
+
+        if self.patterns['phone']:
+            for pattern in PHONE_PATTERNS:
+                for start, end in windows:
+                    found_items.extend(_item('Phone', match) for match in pattern.finditer(text, start, end))
+
+        if self.custom:
+            found_items.extend(_item('Custom', match) for match in self.custom.finditer(text))
+
+        return found_items
+
+    def _find_abns(self, text, windows):
+        found_items = []
+        seen_positions = set()  # Track positions to avoid duplicates
+        for pattern in ABN_PATTERNS:
+            for start, end in windows:
+                for match in pattern.finditer(text, start, end):
+                    digits = NON_DIGIT.sub('', match.group())
+                    if len(digits) == 11 and match.start() not in seen_positions:
+                        found_items.append(_item('ABN', match, digits))
+                        seen_positions.add(match.start())
+
+        for match in ABN_CONTEXT.finditer(text):
+            if match.start() not in seen_positions:
+                found_items.append(_item('ABN (with context)', match, NON_DIGIT.sub('', match.group())))
+                seen_positions.add(match.start())
+        return found_items
+
+    def _find_tfns(self, text, windows, abns):
+        abn_spans = _merge_spans((item['start'], item['end']) for item in abns)
+        found_items = []
+        seen_positions = set()  # Track positions to avoid duplicates
+        for pattern in TFN_PATTERNS:
+            for start, end in windows:
+                for match in pattern.finditer(text, start, end):
+                    if match.start() in seen_positions or _overlaps(abn_spans, match.start(), match.end()):
+                        continue
+                    # Look for 2 more digits before this position to catch ABNs with different spacing
+                    if ABN_PREFIX.search(text[max(0, match.start() - 10):match.start()]):
+                        continue
+                    found_items.append(_item('TFN', match, NON_DIGIT.sub('', match.group())))
+                    seen_positions.add(match.start())
+
+        for match in TFN_CONTEXT.finditer(text):
+            if match.start() not in seen_positions:
+                found_items.append(_item('TFN (with context)', match, NON_DIGIT.sub('', match.group())))
+                seen_positions.add(match.start())
+        return found_items
+
+
+class PageTextIndex:
+    """A page's text with a box for every character, from one extraction
+
+    `text` is the same as page.get_text(), so offsets found in it map
+    straight to positions on the page. Pass a `textpage` already made
+    with TEXT_FLAGS to reuse its layout.
+    """
+
+    def __init__(self, page, textpage=None):
+        if textpage is None:
+            textpage = page.get_textpage(flags=TEXT_FLAGS)
+        parts = []
+        boxes = array('d')  # x0, y0, x1, y1 for each character
+        lines = array('l')  # line of each character, -1 for line breaks
+        line_number = 0
+        for block in textpage.extractRAWDICT()["blocks"]:
+            for line in block.get("lines", ()):
+                for span in line["spans"]:
+                    for char in span["chars"]:
+                        parts.append(char["c"])
+                        boxes.extend(char["bbox"])
+                        lines.append(line_number)
+                parts.append("\n")
+                boxes.extend((0, 0, 0, 0))
+                lines.append(-1)
+                line_number += 1
+        self.text = "".join(parts)
+        self.boxes = boxes
+        self.lines = lines
+
+    @property
+    def nbytes(self):
+        """Approximate memory held by the text and character boxes"""
+        return len(self.text) + self.boxes.itemsize * len(self.boxes) + self.lines.itemsize * len(self.lines)
+
+    def rects(self, start, end):
+        """One rectangle per line covering the characters from start to end"""
+        rects = []
+        current_line = None
+        for index in range(start, end):
+            line = self.lines[index]
+            if line < 0:
+                continue
+            x0, y0, x1, y1 = self.boxes[4 * index:4 * index + 4]
+            if line != current_line:
+                rects.append([x0, y0, x1, y1])
+                current_line = line
+            else:
+                rect = rects[-1]
+                rect[0], rect[1] = min(rect[0], x0), min(rect[1], y0)
+                rect[2], rect[3] = max(rect[2], x1), max(rect[3], y1)
+        return [fitz.Rect(rect) for rect in rects]
+
+
+def locate_items(items):
+    """Merged (start, end) spans to redact for items on one page
+
+    Uses the offsets the detector found, including those of repeats that
+    the scan folded into the item, so no page text is searched again.
+    """
+    page_spans = []
+    for item in items:
+        page_spans.extend(item.get('spans') or [(item['start'], item['end'])])
+
+    # Overlapping items, such as a TFN and its labelled form, share one
+    # annotation; each annotation added costs more than the last
+    return list(zip(*_merge_spans(page_spans)))
+
+
+class DocumentAnalysis:
+    """One PDF parsed once for both scanning and redaction
+
+    Keeps the open document, every page's text, a PageTextIndex for each
+    page with detections and the detections for each pattern set, so
+    applying redactions only adds annotations and saves. Redacting
+    changes the document; a later scan or redaction reopens it from the
+    original bytes, as does any use after close().
+    """
+
+    def __init__(self, pdf_bytes, key=None):
+        if not PYMUPDF_AVAILABLE:
+            raise RuntimeError("PyMuPDF is required for redaction")
+        self.key = key or content_hash(pdf_bytes)
+        self.pdf_bytes = pdf_bytes
+        self.doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+        self.page_texts = []
+        self.indexes = {}  # page number -> PageTextIndex
+        self.parses = 1
+        self._detections = {}  # pattern set -> deduplicated items
+        self._redacted = False
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self):
+        """Approximate memory held: the upload, page text and character boxes"""
+        return (len(self.pdf_bytes) + sum(len(text) for text in self.page_texts)
+                + sum(index.nbytes for index in list(self.indexes.values())))
+
+    def _document(self):
+        """The document as uploaded, reopened if a redaction changed or closed it"""
+        if self._redacted or self.doc is None:
+            if self.doc is not None:
+                self.doc.close()
+            self.doc = fitz.open(stream=self.pdf_bytes, filetype="pdf")
+            self.parses += 1
+            self._redacted = False
+        return self.doc
+
+    def close(self):
+        """Close the document and drop the extracted text, boxes and detections"""
+        with self._lock:
+            if self.doc is not None:
+                self.doc.close()
+                self.doc = None
+            self.page_texts = []
+            self.indexes = {}
+            self._detections = {}
+
+    def _detect(self, detector):
+        doc = self._document()
+        file_detections = []
+        for page_num, page in enumerate(doc):
+            textpage = None
+            if page_num == len(self.page_texts):
+                textpage = page.get_textpage(flags=TEXT_FLAGS)
+                self.page_texts.append(textpage.extractText())
+            page_detections = detector.detect(self.page_texts[page_num])
+            if page_detections and page_num not in self.indexes:
+                # Character boxes are only needed where something will be redacted
+                self.indexes[page_num] = PageTextIndex(page, textpage)
+            for item in page_detections:
+                item['page'] = page_num
+            file_detections.extend(page_detections)
+
+        # Group by page, type, and normalized text to remove duplicates
+        seen = {}
+        unique_detections = []
+        for item in file_detections:
+            # Normalize the text (remove spaces/dashes for comparison)
+            normalized = re.sub(r'[\s\-]', '', item['text'])
+            key = (item['page'], item['type'].split(' ')[0], normalized)  # Use base type for grouping
+            if key not in seen:
+                item['spans'] = [(item['start'], item['end'])]
+                seen[key] = item
+                unique_detections.append(item)
+            else:
+                # Repeats are not listed, but still redacted at their own offsets
+                seen[key]['spans'].append((item['start'], item['end']))
+        return unique_detections
+
+    def scan(self, patterns, custom_pattern=None, file_name="", file_idx=0):
+        """Find sensitive items on every page
+
+        `patterns` maps names from REDACTION_PATTERNS to whether they are
+        enabled. Each item is tagged with its page, file name and file
+        index; repeats of the same value on a page are reported once.
+        """
+        detector = RedactionDetector(patterns, custom_pattern)
+        key = (tuple(sorted(detector.patterns.items())), custom_pattern if detector.custom else None)
+        with self._lock:
+            if key not in self._detections:
+                self._detections[key] = self._detect(detector)
+            detections = self._detections[key]
+        return [dict(item, file=file_name, file_idx=file_idx) for item in detections]
+
+    def redact(self, redaction_items, pages_to_redact=None):
+        """Create a redacted version of the PDF"""
+        # Group redaction items by page
+        redactions_by_page = {}
+        for item in redaction_items:
+            page_num = item.get('page', 0)
+            if pages_to_redact is None or page_num in pages_to_redact:
+                if page_num not in redactions_by_page:
+                    redactions_by_page[page_num] = []
+                redactions_by_page[page_num].append(item)
+
+        output = io.BytesIO()
+        with self._lock:
+            doc = self._document()
+            for page_num, items in redactions_by_page.items():
+                if page_num < len(doc):
+                    page = doc[page_num]
+                    index = self.indexes.get(page_num)
+                    if index is None:
+                        index = self.indexes[page_num] = PageTextIndex(page)
+
+                    for start, end in locate_items(items):
+                        for rect in index.rects(start, end):
+                            page.add_redact_annot(rect)
+
+                    # Apply the redactions (this makes them permanent)
+                    page.apply_redactions()
+
+            self._redacted = True
+            doc.save(output)
+
+        output.seek(0)
+        return output
+
+
+class AnalysisCache:
+    """Recent DocumentAnalysis objects keyed by content hash, bounded by bytes
+
+    Scanning and redacting the same upload, in any session, share one
+    parsed document. Each entry holds an unredacted document and its
+    text, so entries are closed as soon as they are evicted, and callers
+    discard() them once a redaction is applied or the upload is removed.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # content hash -> DocumentAnalysis
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    @property
+    def nbytes(self):
+        with self._lock:
+            return sum(analysis.nbytes for analysis in self._entries.values())
+
+    def get(self, pdf_bytes, key=None):
+        """The analysis for pdf_bytes, opening the document on first use"""
+        key = key or content_hash(pdf_bytes)
+        with self._lock:
+            analysis = self._entries.get(key)
+            if analysis is not None:
+                self._entries.move_to_end(key)
+                evicted = self._trim()
+        if analysis is None:
+            analysis = DocumentAnalysis(pdf_bytes, key)
+            with self._lock:
+                analysis = self._entries.setdefault(key, analysis)
+                self._entries.move_to_end(key)
+                evicted = self._trim()
+        for old in evicted:
+            old.close()
+        return analysis
+
+    def _trim(self):
+        # Entries grow as they are scanned, so sizes are summed on each lookup
+        evicted = []
+        total = sum(analysis.nbytes for analysis in self._entries.values())
+        while total > self.max_bytes and len(self._entries) > 1:
+            _, analysis = self._entries.popitem(last=False)
+            total -= analysis.nbytes
+            evicted.append(analysis)
+        return evicted
+
+    def discard(self, key):
+        """Close and forget the analysis for key, if it is cached"""
+        with self._lock:
+            analysis = self._entries.pop(key, None)
+        if analysis is not None:
+            analysis.close()
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_analysis_cache():
+    """Process-wide analysis cache; PDF_REDACTION_CACHE_MB sets how much it keeps"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = AnalysisCache(int(os.environ.get("PDF_REDACTION_CACHE_MB", "256")) * 1024 * 1024)
+        return _default_cache
+
+
+def _read_upload(pdf_file):
+    pdf_bytes = pdf_file.read()
+    pdf_file.seek(0)
+    return pdf_bytes
+
+
+def scan_pdf(pdf_file, patterns, custom_pattern=None, file_name=None, file_idx=0):
+    """Find sensitive items on every page of one PDF; see DocumentAnalysis.scan"""
+    if file_name is None:
+        file_name = getattr(pdf_file, "name", "")
+    return DocumentAnalysis(_read_upload(pdf_file)).scan(patterns, custom_pattern, file_name, file_idx)
+
+
+def create_redacted_pdf(pdf_file, redaction_items, pages_to_redact=None):
+    """Create a redacted version of the PDF; see DocumentAnalysis.redact"""
+    return DocumentAnalysis(_read_upload(pdf_file)).redact(redaction_items, pages_to_redact)
@@ -0,0 +1,92 @@
+"""Signature and date stamping for PDF pages"""
+
+import io
+import os
+import tempfile
+from datetime import datetime
+
+from pypdf import PdfReader, PdfWriter
+from reportlab.pdfgen import canvas
+
+
+def create_signature_overlay(signature_image, date_text, position, page_size, add_date=True, sig_width=150, sig_height=50):
+    """Create a PDF overlay with signature and optionally date"""
+    packet = io.BytesIO()
+
+    # Create a new PDF with ReportLab
+    c = canvas.Canvas(packet, pagesize=page_size)
+
+    # Save signature image to temp file
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.png') as tmp_file:
+        signature_image.save(tmp_file.name, 'PNG')
+        tmp_file_path = tmp_file.name
+
+    try:
+        sig_x, sig_y = position
+        c.drawImage(tmp_file_path, sig_x, sig_y, width=sig_width, height=sig_height, preserveAspectRatio=True)
+
+        # Add date below signature if requested
+        if add_date:
+            c.setFont("Helvetica", 10)
+            c.drawString(sig_x + sig_width * 0.3, sig_y - 10, date_text)
+    finally:
+        # Clean up temp file
+        os.unlink(tmp_file_path)
+
+    c.save()
+
+    # Move to the beginning of the BytesIO buffer
+    packet.seek(0)
+    return PdfReader(packet)
+
+
+def add_signature_to_pdf(pdf_file, signature_image, position, selected_page=1, add_date=True, sig_dimensions=(150, 50), password=None):
+    """Add signature and optionally date to specified page of PDF"""
+    # Read the existing PDF
+    reader = PdfReader(pdf_file)
+
+    # Handle encrypted PDFs
+    if reader.is_encrypted and password:
+        if not reader.decrypt(password):
+            raise Exception("Failed to decrypt PDF with provided password")
+
+    writer = PdfWriter()
+
+    # Get current date in dd mm yyyy format
+    date_text = datetime.now().strftime("%d %m %Y")
+
+    # Process each page
+    for page_num in range(len(reader.pages)):
+        page = reader.pages[page_num]
+
+        # Add signature to the selected page (convert from 1-based to 0-based indexing)
+        if page_num == selected_page - 1:
+            # Get page dimensions
+            page_box = page.mediabox
+            page_width = float(page_box.width)
+            page_height = float(page_box.height)
+
+            # Create overlay with signature and optionally date
+            overlay = create_signature_overlay(
+                signature_image, 
+                date_text, 
+                position,
+                (page_width, page_height),
+                add_date,
+                sig_dimensions[0],
+                sig_dimensions[1]
+            )
+
+            # Merge the overlay with the page
+            overlay_page = overlay.pages[0]
+            page.merge_page(overlay_page)
+
+        # Add the page to writer (signed or unsigned)
+        writer.add_page(page)
+
+    # Write to bytes
+    output_bytes = io.BytesIO()
+    writer.write(output_bytes)
+    output_bytes.seek(0)
+
+    return output_bytes
@@ -0,0 +1,237 @@
+"""Shared thumbnail cache keyed by PDF content hash"""
+
+import atexit
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+def content_hash(pdf_bytes):
+    """SHA-256 hex digest identifying a PDF by its bytes"""
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+
+def thumbnail_key(pdf_hash, page_num, zoom, authenticated=False, variant=""):
+    """Cache key for one rendered page
+
+    `variant` identifies the encoding (format, quality, size cap) so the same
+    page rendered with different settings is cached separately.
+    """
+    return (pdf_hash, page_num, float(zoom), bool(authenticated), variant)
+
+
+class ThumbnailCache:
+    """In-memory LRU of encoded page images, bounded by bytes, with a disk tier
+
+    Pages evicted from memory are written to `disk_dir` (when set) and
+    promoted back on the next hit, so re-uploading the same file or
+    re-rendering the same page never rasterizes it again. Renders of
+    password-protected files are never written to disk. The disk tier is
+    trimmed oldest-first once it grows past `max_disk_bytes`.
+
+    The lock only guards the memory tier and the index of files on disk;
+    reads, writes and deletes run outside it, so one session's disk I/O
+    never holds up another session's lookups.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024, disk_dir=None, max_disk_bytes=1024 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.memory_bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> encoded image bytes
+        self._disk_files = OrderedDict()  # path -> size, oldest first
+        self.disk_bytes = 0
+        self._lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, mode=0o700, exist_ok=True)
+            self._index_disk()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries or self._disk_path(key) in self._disk_files
+
+    def _disk_path(self, key):
+        if not self.disk_dir:
+            return None
+        pdf_hash, page_num, zoom, authenticated, variant = key
+        variant = variant.replace(":", "-")
+        name = f"{pdf_hash}_{page_num}_{zoom:g}_{int(authenticated)}_{variant}.thumb"
+        return os.path.join(self.disk_dir, name)
+
+    def get(self, key):
+        """Cached image bytes for `key`, or None on a miss"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            path = self._disk_path(key)
+            if path not in self._disk_files:
+                self.misses += 1
+                return None
+
+        try:
+            with open(path, "rb") as stored:
+                data = stored.read()
+        except OSError:
+            data = None
+
+        with self._lock:
+            if not data:
+                # Trimmed by another thread since the lookup
+                self._forget_disk_file(path)
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            evicted = self._store(key, data)
+        self._spill_all(evicted)
+        return data
+
+    def put(self, key, data):
+        """Add a rendered page to the memory tier"""
+        if not data:
+            return
+        with self._lock:
+            evicted = self._store(key, data)
+        self._spill_all(evicted)
+
+    def _store(self, key, data):
+        """Add to the memory tier; returns the (key, data) pairs evicted to make room"""
+        if key in self._entries:
+            self.memory_bytes -= len(self._entries.pop(key))
+        self._entries[key] = data
+        self.memory_bytes += len(data)
+
+        evicted = []
+        while self.memory_bytes > self.max_bytes and len(self._entries) > 1:
+            old_key, old_data = self._entries.popitem(last=False)
+            self.memory_bytes -= len(old_data)
+            self.evictions += 1
+            evicted.append((old_key, old_data))
+        return evicted
+
+    def _index_disk(self):
+        """Pick up pages left in a configured directory by an earlier run"""
+        files = []
+        for name in os.listdir(self.disk_dir):
+            if not name.endswith(".thumb"):
+                continue
+            path = os.path.join(self.disk_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, path, stat.st_size))
+        for _, path, size in sorted(files):
+            self._disk_files[path] = size
+            self.disk_bytes += size
+
+    def _forget_disk_file(self, path):
+        size = self._disk_files.pop(path, None)
+        if size is not None:
+            self.disk_bytes -= size
+
+    def _spill_all(self, evicted):
+        for key, data in evicted:
+            self._spill(key, data)
+
+    def _spill(self, key, data):
+        if key[3]:
+            return  # decrypted content stays in memory only
+        path = self._disk_path(key)
+        if path is None:
+            return
+        with self._lock:
+            if path in self._disk_files:
+                return
+        try:
+            # Write then rename so readers never see a partial file; the
+            # temporary name is unique so concurrent spills cannot collide
+            fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=self.disk_dir)
+            with os.fdopen(fd, "wb") as stored:
+                stored.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Could not spill thumbnail to disk: {str(e)}")
+            return
+
+        with self._lock:
+            self._forget_disk_file(path)
+            self._disk_files[path] = len(data)
+            self.disk_bytes += len(data)
+            trimmed = self._trim_disk()
+        for old_path in trimmed:
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+
+    def _trim_disk(self):
+        """Drop the oldest files from the index; returns their paths for removal"""
+        trimmed = []
+        while self.disk_bytes > self.max_disk_bytes and self._disk_files:
+            path, size = self._disk_files.popitem(last=False)
+            self.disk_bytes -= size
+            trimmed.append(path)
+        return trimmed
+
+    def clear(self):
+        """Drop the memory tier and reset counters"""
+        with self._lock:
+            self._entries.clear()
+            self.memory_bytes = 0
+            self.hits = self.disk_hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """Hit/miss counters and memory usage"""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "memory_bytes": self.memory_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_bytes": self.disk_bytes,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_thumbnail_cache():
+    """Process-wide cache shared by every page and session
+
+    Limits come from PDF_THUMBNAIL_CACHE_MB (memory), PDF_THUMBNAIL_DISK_MB
+    and PDF_THUMBNAIL_CACHE_DIR. By default the disk tier is a private
+    directory removed when the process exits; set PDF_THUMBNAIL_CACHE_DIR
+    to keep pages across restarts, or to an empty string to disable it.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            disk_dir = os.environ.get("PDF_THUMBNAIL_CACHE_DIR")
+            if disk_dir is None:
+                # mkdtemp creates the directory readable by this user only
+                disk_dir = tempfile.mkdtemp(prefix="tta_pdf_thumbnails_")
+                atexit.register(shutil.rmtree, disk_dir, True)
+            _default_cache = ThumbnailCache(
+                max_bytes=int(os.environ.get("PDF_THUMBNAIL_CACHE_MB", "256")) * 1024 * 1024,
+                disk_dir=disk_dir or None,
+                max_disk_bytes=int(os.environ.get("PDF_THUMBNAIL_DISK_MB", "1024")) * 1024 * 1024,
+            )
+        return _default_cache
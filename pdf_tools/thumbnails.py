@@ -0,0 +1,386 @@
+"""Render page previews from a single open PDF document"""
+
+import time
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+try:
+    import fitz  # PyMuPDF for page rendering
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    PYMUPDF_AVAILABLE = False
+from PIL import Image
+
+from pdf_tools.thumbnail_cache import content_hash, thumbnail_key
+from pdf_tools.workers import default_workers
+
+# Supported encodings for stored previews
+THUMBNAIL_FORMATS = ("JPEG", "WEBP", "PNG")
+
+
+def encode_image(img, image_format="JPEG", quality=80):
+    """Compress a PIL image to JPEG/WebP/PNG bytes"""
+    output = BytesIO()
+    if image_format == "PNG":
+        img.save(output, format="PNG", optimize=False)
+    else:
+        img.save(output, format=image_format, quality=quality)
+    return output.getvalue()
+
+
+def decode_thumbnail(data):
+    """Decode stored preview bytes back into a PIL image"""
+    if data is None:
+        return None
+    img = Image.open(BytesIO(data))
+    img.load()
+    return img
+
+
+# Clockwise page rotation -> PIL transpose of the rendered preview
+_ROTATE_TRANSPOSE = {
+    90: Image.Transpose.ROTATE_270,
+    180: Image.Transpose.ROTATE_180,
+    270: Image.Transpose.ROTATE_90,
+}
+
+
+def transform_thumbnail(data, rotation=0, crop=None, image_format="JPEG", quality=80):
+    """Crop and rotate an already rendered preview instead of re-rendering the page
+
+    `crop` is (left, top, right, bottom) margins as fractions of the preview
+    and `rotation` is clockwise degrees, matching the Page Manager edits.
+    """
+    if data is None or (not rotation and not crop):
+        return data
+    img = decode_thumbnail(data)
+    if crop:
+        left, top, right, bottom = crop
+        img = img.crop((
+            round(left * img.width),
+            round(top * img.height),
+            round((1 - right) * img.width),
+            round((1 - bottom) * img.height),
+        ))
+    if rotation % 360:
+        img = img.transpose(_ROTATE_TRANSPOSE[rotation % 360])
+    return encode_image(img, image_format, quality)
+
+
+class ThumbnailRenderer:
+    """Open a PDF once and render any of its pages from that handle
+
+    Opening the document is the expensive part for large uploads, so every
+    page is rendered from the same `fitz.Document` instead of re-reading the
+    bytes per page. Per-page render times are kept in `timings`.
+
+    Pages come back as compressed `image_format` bytes rather than decoded
+    images, which is 20-50x smaller than the raw RGB pixmap. `max_dimension`
+    caps the longest side in pixels by lowering the zoom for that page.
+
+    When a `ThumbnailCache` is given, pages are looked up by content hash
+    first and only rasterized on a miss.
+    """
+
+    def __init__(self, pdf_bytes, password=None, zoom=1.5, cache=None,
+                 image_format="JPEG", quality=80, max_dimension=None):
+        if not PYMUPDF_AVAILABLE:
+            raise RuntimeError("PyMuPDF is required for page previews")
+        if image_format not in THUMBNAIL_FORMATS:
+            raise ValueError(f"Unsupported thumbnail format: {image_format}")
+
+        self.zoom = zoom
+        self.image_format = image_format
+        self.quality = quality
+        self.max_dimension = max_dimension
+        self.cache = cache
+        self.timings = {}  # page index -> seconds spent rendering
+        self.doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+
+        # Handle password if needed
+        self.authenticated = False
+        if self.doc.is_encrypted:
+            if not password or not self.doc.authenticate(password):
+                self.doc.close()
+                raise ValueError("Failed to decrypt PDF with provided password")
+            self.authenticated = True
+
+        self.pdf_hash = content_hash(pdf_bytes) if cache is not None else None
+
+    def __len__(self):
+        return len(self.doc)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Release the underlying document"""
+        if not self.doc.is_closed:
+            self.doc.close()
+
+    @property
+    def variant(self):
+        """Encoding settings that distinguish otherwise identical renders"""
+        return f"{self.image_format}:{self.quality}:{self.max_dimension or 0}"
+
+    def cache_key(self, page_num):
+        return thumbnail_key(self.pdf_hash, page_num, self.zoom, self.authenticated, self.variant)
+
+    def _page_zoom(self, page):
+        if not self.max_dimension:
+            return self.zoom
+        longest = max(page.rect.width, page.rect.height)
+        return min(self.zoom, self.max_dimension / longest)
+
+    def render(self, page_num):
+        """Render one page (0-indexed) to encoded image bytes, or None on failure"""
+        if page_num < 0 or page_num >= len(self.doc):
+            return None
+
+        if self.cache is not None:
+            data = self.cache.get(self.cache_key(page_num))
+            if data is not None:
+                return data
+
+        start = time.perf_counter()
+        try:
+            page = self.doc[page_num]
+            zoom = self._page_zoom(page)
+            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+            img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+            data = encode_image(img, self.image_format, self.quality)
+        except Exception as e:
+            # Don't fail the whole document for one bad page
+            print(f"Could not convert page {page_num + 1}: {str(e)}")
+            data = None
+        self.timings[page_num] = time.perf_counter() - start
+
+        if self.cache is not None:
+            self.cache.put(self.cache_key(page_num), data)
+        return data
+
+    def render_image(self, page_num):
+        """Render one page and decode it, for callers that draw on the preview"""
+        return decode_thumbnail(self.render(page_num))
+
+    def iter_pages(self, page_nums=None):
+        """Yield (page index, encoded image) for the given pages, or all pages"""
+        if page_nums is None:
+            page_nums = range(len(self.doc))
+        for page_num in page_nums:
+            yield page_num, self.render(page_num)
+
+    def timing_summary(self):
+        """Summarise render times recorded so far"""
+        return summarize_timings(self.timings)
+
+
+def summarize_timings(timings):
+    """Summarise a page index -> seconds mapping of render times"""
+    times = list(timings.values())
+    total = sum(times)
+    return {
+        "pages": len(times),
+        "total_seconds": total,
+        "mean_ms": (total / len(times) * 1000) if times else 0.0,
+        "max_ms": (max(times) * 1000) if times else 0.0,
+    }
+
+
+def render_thumbnails(pdf_bytes, password=None, zoom=1.5, **encoding):
+    """Render every page of a PDF, returning (encoded images, timing summary)"""
+    with ThumbnailRenderer(pdf_bytes, password, zoom, **encoding) as renderer:
+        images = [img for _, img in renderer.iter_pages()]
+        return images, renderer.timing_summary()
+
+
+class LazyThumbnails:
+    """Render previews on demand, keeping only a bounded window in memory
+
+    Pages are rendered the first time they are requested and held in an LRU
+    of at most `max_cached` encoded images, so memory does not grow with the
+    size of the document. `prefetch` warms the cache for the next window on a
+    background thread while the current one is on screen.
+    """
+
+    def __init__(self, pdf_bytes, password=None, zoom=1.5, max_cached=72, cache=None, **encoding):
+        self.max_cached = max_cached
+        self._renderer = ThumbnailRenderer(pdf_bytes, password, zoom, cache, **encoding)
+        self._cache = OrderedDict()  # page index -> encoded image
+        # A fitz document must not be used from two threads at once
+        self._lock = threading.Lock()
+        self._prefetch_thread = None
+
+    def __len__(self):
+        return len(self._renderer)
+
+    @property
+    def timings(self):
+        return self._renderer.timings
+
+    @property
+    def variant(self):
+        return self._renderer.variant
+
+    def memory_bytes(self):
+        """Bytes held by this document's preview window"""
+        with self._lock:
+            return sum(len(data) for data in self._cache.values() if data)
+
+    def close(self):
+        """Wait for any prefetch to finish and release the document"""
+        if self._prefetch_thread is not None:
+            self._prefetch_thread.join()
+        with self._lock:
+            self._renderer.close()
+            self._cache.clear()
+
+    def _get(self, page_num):
+        with self._lock:
+            if page_num in self._cache:
+                self._cache.move_to_end(page_num)
+                return self._cache[page_num]
+            if self._renderer.doc.is_closed:
+                return None
+            img = self._renderer.render(page_num)
+            self._cache[page_num] = img
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+            return img
+
+    def get(self, page_num):
+        """Preview for one page (0-indexed), rendering it if needed"""
+        return self._get(page_num)
+
+    def get_many(self, page_nums):
+        """Previews for a window of pages as a page index -> encoded image dict"""
+        return {page_num: self._get(page_num) for page_num in page_nums}
+
+    def get_transformed(self, page_num, rotation=0, crop=None):
+        """Preview with a rotation/crop edit applied to the cached render"""
+        if not rotation and not crop:
+            return self._get(page_num)
+        key = (page_num, rotation, crop)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        data = transform_thumbnail(
+            self._get(page_num), rotation, crop,
+            self._renderer.image_format, self._renderer.quality
+        )
+        with self._lock:
+            self._cache[key] = data
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+        return data
+
+    def is_cached(self, page_num):
+        with self._lock:
+            return page_num in self._cache
+
+    def prefetch(self, page_nums):
+        """Render the given pages on a background thread if not already busy"""
+        if self._prefetch_thread is not None and self._prefetch_thread.is_alive():
+            return
+        # Never prefetch more than the cache can hold alongside the visible window
+        page_nums = [p for p in page_nums if not self.is_cached(p)][:self.max_cached // 2]
+        if not page_nums:
+            return
+        self._prefetch_thread = threading.Thread(
+            target=lambda: [self._get(p) for p in page_nums],
+            daemon=True,
+        )
+        self._prefetch_thread.start()
+
+
+def default_render_workers():
+    """Worker count for parallel rendering, overridable via PDF_RENDER_WORKERS"""
+    return default_workers("PDF_RENDER_WORKERS", limit=8)
+
+
+# Each pool worker keeps its own open document between chunks
+_worker_renderer = None
+
+
+def _init_render_worker(pdf_bytes, password, zoom, encoding):
+    global _worker_renderer
+    _worker_renderer = ThumbnailRenderer(pdf_bytes, password, zoom, **encoding)
+
+
+def _render_chunk(page_nums):
+    results = []
+    for page_num, img in _worker_renderer.iter_pages(page_nums):
+        results.append((page_num, img, _worker_renderer.timings[page_num]))
+    return results
+
+
+def _render_in_pool(pdf_bytes, password, zoom, encoding, workers, page_nums, chunk_size):
+    """Yield (page index, image, seconds) for page_nums from a process pool, in order"""
+    # Several chunks per worker keeps the pool busy when some pages are slower
+    if chunk_size is None:
+        chunk_size = max(1, min(16, len(page_nums) // (workers * 4) or 1))
+    chunks = [page_nums[i:i + chunk_size] for i in range(0, len(page_nums), chunk_size)]
+
+    # Spawned workers avoid forking the threads of a running Streamlit server
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_render_worker,
+        initargs=(pdf_bytes, password, zoom, encoding),
+    ) as pool:
+        # Futures are consumed in submission order so pages stream back in order
+        futures = [pool.submit(_render_chunk, chunk) for chunk in chunks]
+        for future in futures:
+            yield from future.result()
+
+
+def render_pages_parallel(pdf_bytes, password=None, zoom=1.5, workers=None,
+                          page_nums=None, chunk_size=None, timings=None, cache=None, **encoding):
+    """Render pages across a process pool, yielding (page index, encoded image) in page order
+
+    Used for bulk rendering such as the `previews` CLI command. Page ranges
+    are split into contiguous chunks and handed to a bounded pool
+    (PDF_RENDER_WORKERS) where each worker opens the document once. With a
+    single worker (or a tiny document) everything is rendered in-process to
+    skip pool start-up cost. Pages already in `cache` are served from it and
+    never sent to the pool. Per-page render times are written into
+    `timings` when a dict is given.
+    """
+    with ThumbnailRenderer(pdf_bytes, password, zoom, cache, **encoding) as renderer:
+        if page_nums is None:
+            page_nums = list(range(len(renderer)))
+        else:
+            page_nums = list(page_nums)
+
+        missing = page_nums
+        if cache is not None:
+            missing = [p for p in page_nums if renderer.cache_key(p) not in cache]
+        workers = min(workers or default_render_workers(), len(missing) or 1)
+
+        if workers <= 1:
+            for page_num, img in renderer.iter_pages(page_nums):
+                if timings is not None and page_num in renderer.timings:
+                    timings[page_num] = renderer.timings[page_num]
+                yield page_num, img
+            return
+
+        rendered = _render_in_pool(pdf_bytes, password, zoom, encoding, workers, missing, chunk_size)
+        missing = set(missing)
+        for page_num in page_nums:
+            if page_num not in missing:
+                yield page_num, renderer.render(page_num)
+                continue
+
+            _, img, seconds = next(rendered)
+            if timings is not None:
+                timings[page_num] = seconds
+            if cache is not None:
+                cache.put(renderer.cache_key(page_num), img)
+            yield page_num, img
@@ -0,0 +1,57 @@
+"""Bounded process pools shared by the batch tools"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Below this much input, starting worker processes costs more than it saves
+POOL_MIN_BYTES = 4 * 1024 * 1024
+
+
+def default_workers(env_var, limit=4):
+    """Worker count from `env_var` when set, otherwise the CPU count capped at `limit`"""
+    configured = os.environ.get(env_var)
+    if configured:
+        return max(1, int(configured))
+    return max(1, min(os.cpu_count() or 1, limit))
+
+
+def pool_size(items, workers, min_bytes=0):
+    """Processes run_pool will use; 1 means the batch runs in-process
+
+    A batch whose leading bytes arguments add up to less than `min_bytes`
+    is not worth starting workers for.
+    """
+    if min_bytes and sum(len(args[0]) for args in items) < min_bytes:
+        return 1
+    return min(max(1, workers), max(1, len(items)))
+
+
+def run_pool(func, items, workers, progress=None, min_bytes=0):
+    """Call func(*args) for every args tuple in `items` in a bounded process pool
+
+    Results come back in input order. `progress(done, total, index)` is
+    called as each item finishes, in completion order, so callers can show
+    real per-item progress. A single worker, or a batch whose leading
+    bytes arguments add up to less than `min_bytes`, runs in-process.
+    """
+    workers = pool_size(items, workers, min_bytes)
+    results = [None] * len(items)
+
+    if workers == 1:
+        for index, args in enumerate(items):
+            results[index] = func(*args)
+            if progress:
+                progress(index + 1, len(items), index)
+        return results
+
+    # Spawned workers avoid forking the threads of a running Streamlit server
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = {pool.submit(func, *args): index for index, args in enumerate(items)}
+        for done, future in enumerate(as_completed(futures), start=1):
+            index = futures[future]
+            results[index] = future.result()
+            if progress:
+                progress(done, len(items), index)
+    return results
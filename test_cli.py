@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""Test the headless batch CLI and the Streamlit-free engine package"""
+
+import csv
+import json
+import os
+import stat
+import subprocess
+import sys
+import tempfile
+from io import BytesIO
+
+from pypdf import PdfReader
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+from pdf_tools.cli import main
+from test_thumbnails import make_pdf
+
+
+def write_inputs(folder, count, pages=3):
+    for index in range(count):
+        with open(os.path.join(folder, f"doc{index}.pdf"), "wb") as f:
+            f.write(make_pdf(pages))
+
+
+def test_engine_does_not_import_streamlit():
+    """Every engine module imports without pulling in Streamlit"""
+    print("🧪 Testing engine imports")
+    package_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pdf_tools")
+    modules = [name[:-3] for name in os.listdir(package_dir) if name.endswith(".py") and name != "__main__.py"]
+    code = (
+        "import importlib, sys\n"
+        f"for name in {modules!r}:\n"
+        "    importlib.import_module('pdf_tools.' + name)\n"
+        "print('streamlit' in sys.modules)\n"
+    )
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "False"
+    print(f"  ✅ {len(modules)} modules imported without Streamlit")
+
+
+def test_encrypt_directory_in_parallel():
+    """Each file gets its own password, listed next to the outputs"""
+    print("🧪 Testing batch encryption")
+    with tempfile.TemporaryDirectory() as folder:
+        write_inputs(folder, 3)
+        out_dir = os.path.join(folder, "out")
+        summary_path = os.path.join(folder, "summary.json")
+
+        assert main(["encrypt", folder, "-o", out_dir, "--workers", "2", "--summary", summary_path]) == 0
+
+        with open(summary_path) as f:
+            summary = json.load(f)
+        assert summary["files"] == summary["succeeded"] == 3
+        assert [os.path.basename(r["input"]) for r in summary["results"]] == ["doc0.pdf", "doc1.pdf", "doc2.pdf"]
+        assert all(r["seconds"] >= 0 for r in summary["results"])
+
+        assert stat.S_IMODE(os.stat(os.path.join(out_dir, "passwords.csv")).st_mode) == 0o600
+        with open(os.path.join(out_dir, "passwords.csv"), newline="") as f:
+            passwords = {row["file"]: row["password"] for row in csv.DictReader(f)}
+        assert len(set(passwords.values())) == 3
+        reader = PdfReader(os.path.join(out_dir, "doc1_encrypted.pdf"))
+        assert reader.is_encrypted and reader.decrypt(passwords["doc1_encrypted.pdf"])
+        assert "password" not in json.dumps(summary)
+    print(f"  ✅ 3 files encrypted in {summary['seconds']:.2f}s")
+
+
+def test_combine_from_manifest():
+    """A manifest picks files and per-file page ranges"""
+    print("🧪 Testing manifest combine")
+    with tempfile.TemporaryDirectory() as folder:
+        write_inputs(folder, 2, pages=4)
+        manifest = os.path.join(folder, "bundle.json")
+        with open(manifest, "w") as f:
+            json.dump(["doc1.pdf", {"input": "doc0.pdf", "pages": "2-3"}], f)
+        output = os.path.join(folder, "bundle.pdf")
+        summary_path = os.path.join(folder, "summary.json")
+
+        assert main(["combine", manifest, "-o", output, "--summary", summary_path]) == 0
+        with open(summary_path) as f:
+            summary = json.load(f)
+        assert summary["merge"]["pages"] == 6
+        texts = [page.extract_text().strip() for page in PdfReader(output).pages]
+        assert texts == ["Page 1", "Page 2", "Page 3", "Page 4", "Page 2", "Page 3"]
+    print("  ✅ 6 pages combined from the manifest")
+
+
+def test_redact_reports_failures():
+    """A broken input is reported in the summary without stopping the batch"""
+    print("🧪 Testing batch redaction")
+    with tempfile.TemporaryDirectory() as folder:
+        buffer = BytesIO()
+        c = canvas.Canvas(buffer, pagesize=letter)
+        c.drawString(100, 700, "TFN: 123 456 789")
+        c.save()
+        with open(os.path.join(folder, "a.pdf"), "wb") as f:
+            f.write(buffer.getvalue())
+        with open(os.path.join(folder, "b.pdf"), "wb") as f:
+            f.write(b"not a pdf")
+        out_dir = os.path.join(folder, "out")
+        summary_path = os.path.join(folder, "summary.json")
+
+        assert main(["redact", folder, "-o", out_dir, "--summary", summary_path]) == 1
+        with open(summary_path) as f:
+            results = json.load(f)["results"]
+        assert results[0]["ok"] and results[0]["items"] >= 1
+        assert not results[1]["ok"] and results[1]["error"]
+        assert "123 456 789" not in PdfReader(os.path.join(out_dir, "a_REDACTED.pdf")).pages[0].extract_text()
+    print("  ✅ Redacted one file, reported the broken one")
+
+
+def test_split_every_rejects_zero():
+    """--every 0 is reported as an error instead of falling back to bookmarks"""
+    print("🧪 Testing split --every")
+    with tempfile.TemporaryDirectory() as folder:
+        write_inputs(folder, 1, pages=5)
+        out_dir = os.path.join(folder, "out")
+        summary_path = os.path.join(folder, "summary.json")
+
+        assert main(["split", folder, "-o", out_dir, "--every", "0", "--summary", summary_path]) == 1
+        with open(summary_path) as f:
+            result = json.load(f)["results"][0]
+        assert result["error"] == "Pages per part must be at least 1"
+
+        assert main(["split", folder, "-o", out_dir, "--every", "2", "--summary", summary_path]) == 0
+        with open(summary_path) as f:
+            assert json.load(f)["results"][0]["parts"] == 3
+    print("  ✅ Zero pages per part rejected, 2 pages per part gives 3 parts")
+
+
+def test_previews_split_pages_across_workers():
+    """Every page of each input is written as an image, in page order"""
+    print("🧪 Testing bulk previews")
+    with tempfile.TemporaryDirectory() as folder:
+        write_inputs(folder, 2, pages=5)
+        out_dir = os.path.join(folder, "out")
+        summary_path = os.path.join(folder, "summary.json")
+        assert main(["previews", folder, "-o", out_dir, "--zoom", "0.5", "-w", "2", "--summary", summary_path]) == 0
+
+        with open(summary_path) as f:
+            summary = json.load(f)
+        assert summary["workers"] == 2 and [r["pages"] for r in summary["results"]] == [5, 5]
+        names = sorted(os.listdir(os.path.join(out_dir, "doc1_previews")))
+        assert names == [f"page_{page:04d}.jpg" for page in range(1, 6)]
+    print("  ✅ 2 files x 5 pages rendered by 2 workers")
+
+
+if __name__ == "__main__":
+    test_engine_does_not_import_streamlit()
+    test_encrypt_directory_in_parallel()
+    test_combine_from_manifest()
+    test_redact_reports_failures()
+    test_split_every_rejects_zero()
+    test_previews_split_pages_across_workers()
+    print("✅ All CLI tests passed!")
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""Test the batch encryption engine used by the Encryptor"""
+
+import os
+import tempfile
+import zipfile
+from io import BytesIO
+
+from pypdf import PdfReader, PdfWriter
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+from pdf_tools.encrypt import ENCRYPTION_ALGORITHMS, crypto_backend, encrypt_many, encrypt_pdf, generate_secure_password, write_zip
+from test_thumbnails import make_pdf
+
+
+def test_encrypt_many_in_pool():
+    """Files come back in input order, each opening with its own password"""
+    print("🧪 Testing pooled encryption")
+    passwords = [generate_secure_password(12) for _ in range(4)]
+    inputs = [(make_pdf(index + 1), password) for index, password in enumerate(passwords)]
+    inputs.append((b"not a pdf", "unused"))
+    finished = []
+
+    results = encrypt_many(inputs, workers=2, progress=lambda done, total, index: finished.append(index))
+
+    assert sorted(finished) == list(range(5))
+    for index, (result, password) in enumerate(zip(results, passwords)):
+        assert result["ok"] and result["seconds"] >= 0
+        reader = PdfReader(BytesIO(result["data"]))
+        assert reader.is_encrypted and reader.decrypt(password)
+        assert len(reader.pages) == index + 1
+    assert not results[4]["ok"] and results[4]["error"]
+    print("  ✅ 4 files encrypted in order, broken file reported")
+
+
+def test_small_batch_runs_in_process():
+    """A single worker gives the same results without starting a pool"""
+    results = encrypt_many([(make_pdf(1), "secret")], workers=1)
+    assert PdfReader(BytesIO(results[0]["data"])).decrypt("secret")
+    assert generate_secure_password(20, include_symbols=False).isalnum()
+    print("  ✅ In-process encryption")
+
+
+def test_algorithms():
+    """Every offered algorithm round-trips; AES-256 writes a revision 6 handler"""
+    print("🧪 Testing encryption algorithms")
+    assert crypto_backend()[0] in ("pycryptodome", "cryptography")  # not the pure-Python fallback
+    for algorithm in ENCRYPTION_ALGORITHMS:
+        reader = PdfReader(BytesIO(encrypt_pdf(BytesIO(make_pdf(2)), "secret", algorithm)))
+        assert reader.decrypt("secret")
+        assert reader.pages[1].extract_text().strip() == "Page 2"
+        if algorithm == "AES-256":
+            encrypt_dict = reader.trailer["/Encrypt"]
+            assert (encrypt_dict["/V"], encrypt_dict["/R"]) == (5, 6)
+    try:
+        encrypt_pdf(BytesIO(make_pdf(1)), "secret", "RC4-40")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Weak algorithms should be refused")
+    print(f"  ✅ {', '.join(ENCRYPTION_ALGORITHMS)} via {crypto_backend()[0]}")
+
+
+def make_form():
+    """Two pages with a bookmark, a named destination and a form field"""
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter)
+    c.drawString(72, 720, "Cover")
+    c.showPage()
+    c.bookmarkPage("details")
+    c.addOutlineEntry("Details", "details")
+    c.drawString(72, 720, "Details")
+    c.acroForm.textfield(name="employee_id", x=72, y=600, width=200, height=20)
+    c.showPage()
+    c.save()
+
+    writer = PdfWriter(clone_from=PdfReader(buffer))
+    writer.add_named_destination("details", 1)
+    output = BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+def test_document_structure_is_kept():
+    """Outlines, named destinations and form fields survive encryption"""
+    print("🧪 Testing whole-document encryption")
+    reader = PdfReader(BytesIO(encrypt_pdf(BytesIO(make_form()), "secret")))
+    assert reader.decrypt("secret")
+
+    assert [item.title for item in reader.outline] == ["Details"]
+    assert reader.get_destination_page_number(reader.outline[0]) == 1
+    assert "details" in reader.named_destinations
+    assert "employee_id" in reader.get_fields()
+    print("  ✅ Bookmark, destination and form field kept")
+
+
+def test_output_dir_and_zip():
+    """Files written to disk as they finish stream into a ZIP, stored or deflated"""
+    print("🧪 Testing encryption to disk and ZIP bundling")
+    with tempfile.TemporaryDirectory() as folder:
+        results = encrypt_many([(make_pdf(2), "a"), (make_pdf(3), "b")], workers=2, output_dir=folder)
+        assert all(result["ok"] and result["data"] is None for result in results)
+        assert [os.path.getsize(result["path"]) for result in results] == [result["bytes"] for result in results]
+
+        entries = [("one.pdf", results[0]["path"]), ("two.pdf", results[1]["path"]), ("passwords.txt", b"a\nb\n")]
+        for compression in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            with zipfile.ZipFile(write_zip(entries, compression=compression)) as zip_file:
+                assert {info.compress_type for info in zip_file.infolist()} == {compression}
+                assert zip_file.read("passwords.txt") == b"a\nb\n"
+                reader = PdfReader(BytesIO(zip_file.read("two.pdf")))
+                assert reader.decrypt("b") and len(reader.pages) == 3
+    print("  ✅ 2 files written to disk and zipped")
+
+
+if __name__ == "__main__":
+    test_encrypt_many_in_pool()
+    test_small_batch_runs_in_process()
+    test_algorithms()
+    test_document_structure_is_kept()
+    test_output_dir_and_zip()
+    print("✅ All encryption engine tests passed!")
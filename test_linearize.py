@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Test the optional fast web view output stage"""
+
+import re
+
+from pypdf import PdfReader
+
+from pdf_tools import linearize
+from pdf_tools.linearize import is_linearized, linearization_backend, linearize_pdf
+from test_thumbnails import make_pdf
+
+
+def linearization_dict(data):
+    """Integer entries of the linearization dictionary at the start of the file"""
+    match = re.search(rb"<<\s*/Linearized(.*?)>>", data[:1024], re.S)
+    assert match, "no linearization dictionary"
+    return {key.decode(): int(value) for key, value in re.findall(rb"/(\w+) (\d+)", match.group(1))}
+
+
+def test_plain_output_is_not_linearized():
+    """Ordinary writer output has no linearization dictionary"""
+    assert not is_linearized(make_pdf(3))
+    assert is_linearized(b"%PDF-1.7\n%\xe2\xe3\n1 0 obj\n<< /Linearized 1 /L 1234 >>\nendobj\n")
+    print("  ✅ Linearization dictionary detected only when present")
+
+
+def test_linearize_pdf():
+    """Output carries a linearization dictionary that matches the file"""
+    print(f"🧪 Testing linearization (backend: {linearization_backend()})")
+    assert linearization_backend() is not None, "pikepdf from requirements.txt is not installed"
+    pdf_bytes = make_pdf(3)
+
+    output, stats = linearize_pdf(pdf_bytes)
+    data = output.read()
+    assert is_linearized(data)
+    header = linearization_dict(data)
+    # /L is the file length and /N the page count; /O is the first page object
+    assert header["L"] == len(data)
+    assert header["N"] == 3
+    reader = PdfReader(output)
+    assert reader.pages[0].indirect_reference.idnum == header["O"]
+    assert [page.extract_text().strip() for page in reader.pages] == ["Page 1", "Page 2", "Page 3"]
+    assert stats["input_bytes"] == len(pdf_bytes)
+    assert stats["output_bytes"] == len(data)
+    print(f"  ✅ {stats['input_bytes']} -> {stats['output_bytes']} bytes in {stats['seconds'] * 1000:.1f} ms")
+
+
+def test_linearize_without_backend():
+    """Without a linearizer the request is refused rather than ignored"""
+    saved = list(linearize._backend)
+    linearize._backend[:] = [None]
+    try:
+        linearize_pdf(make_pdf(1))
+    except RuntimeError:
+        print("  ✅ No linearizer installed, request refused")
+    else:
+        raise AssertionError("Linearization should fail without a backend")
+    finally:
+        linearize._backend[:] = saved
+
+if __name__ == "__main__":
+    test_plain_output_is_not_linearized()
+    test_linearize_pdf()
+    test_linearize_without_backend()
+    print("✅ All linearization tests passed!")
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""Test the single-pass Combiner merge"""
+
+from io import BytesIO
+
+from PIL import Image
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import DictionaryObject, NameObject, TextStringObject
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+from pdf_tools.buffers import new_output_buffer
+from pdf_tools.merge import merge_pdfs, select_pages
+from test_thumbnails import make_pdf
+
+
+def test_merge_reports_pages_from_plan():
+    """All pages are merged in order and the count comes from the plan"""
+    print("🧪 Testing merge")
+    calls = []
+    output, stats = merge_pdfs(
+        [(BytesIO(make_pdf(2)), None), (BytesIO(make_pdf(3)), [2, 0])],
+        progress=lambda index, total: calls.append((index, total))
+    )
+    assert stats["bytes"] == len(output.read())
+    reader = PdfReader(output)
+
+    assert stats["pages"] == len(reader.pages) == 4
+    assert [page.extract_text().strip() for page in reader.pages] == ["Page 1", "Page 2", "Page 3", "Page 1"]
+    assert calls == [(0, 2), (1, 2)]
+    print(f"  ✅ {stats['pages']} pages, {stats['bytes']} bytes written once")
+
+
+def test_large_output_spills_to_disk():
+    """Output past the spool threshold moves to a temp file"""
+    output, stats = merge_pdfs([(BytesIO(make_pdf(5)), None)], output=new_output_buffer(max_size=1024))
+    assert stats["bytes"] > 1024
+    assert output._rolled
+    assert PdfReader(output).pages
+    output.close()
+    print("  ✅ Spooled output rolled over to disk")
+
+
+def test_page_selection_plan():
+    """Per-file range expressions become the page lists of the merge plan"""
+    print("🧪 Testing per-file page selection")
+    assert select_pages("", 5) is None
+    assert select_pages("1-3", 5) == [0, 1, 2]
+    assert select_pages("last", 4) == [3]
+
+    output, stats = merge_pdfs([
+        (BytesIO(make_pdf(5)), select_pages("1-3", 5)),
+        (BytesIO(make_pdf(2)), select_pages("", 2)),
+        (BytesIO(make_pdf(4)), select_pages("last", 4)),
+    ])
+    labels = [page.extract_text().strip() for page in PdfReader(output).pages]
+    assert stats["pages"] == 6
+    assert labels == ["Page 1", "Page 2", "Page 3", "Page 1", "Page 2", "Page 4"]
+    print("  ✅ Pages 1-3 of A, all of B, last of C")
+
+
+def outline_tree(reader, items=None):
+    """(title, page) pairs with nested lists for children"""
+    tree = []
+    for item in reader.outline if items is None else items:
+        if isinstance(item, list):
+            tree.append(outline_tree(reader, item))
+        else:
+            tree.append((item.title, reader.get_destination_page_number(item)))
+    return tree
+
+
+def test_merged_outline():
+    """Each input gets a top-level bookmark with its own bookmarks remapped"""
+    print("🧪 Testing merged bookmarks")
+    writer = PdfWriter(clone_from=PdfReader(BytesIO(make_pdf(4))))
+    intro = writer.add_outline_item("Intro", 0)
+    writer.add_outline_item("Details", 1, parent=intro)
+    writer.add_outline_item("Summary", 3)
+    bookmarked = BytesIO()
+    writer.write(bookmarked)
+
+    output, stats = merge_pdfs(
+        [(BytesIO(make_pdf(2)), None), (bookmarked, [1, 2, 3])],
+        outlines=True,
+        titles=["Cover letter", "Report"]
+    )
+    # "Intro" pointed at a page that was left out, so "Details" moves up
+    assert outline_tree(PdfReader(output)) == [
+        ("Cover letter", 0),
+        ("Report", 2),
+        [("Details", 2), ("Summary", 4)],
+    ]
+    assert stats["outline_seconds"] < stats["seconds"]
+    print("  ✅ Bookmarks merged and remapped")
+
+
+def test_named_destination_outline():
+    """Bookmarks that point at named destinations land on the merged pages"""
+    print("🧪 Testing bookmarks with named destinations")
+    writer = PdfWriter(clone_from=PdfReader(BytesIO(make_pdf(3))))
+    root = writer.get_outline_root()
+    for name, page in (("summary", 2), ("intro", 0), ("missing", 5)):
+        if page < 3:
+            writer.add_named_destination(name, page)
+        writer.add_outline_item_dict(DictionaryObject({
+            NameObject("/Title"): TextStringObject(name.title()),
+            NameObject("/Dest"): TextStringObject(name),
+        }), root)
+    named = BytesIO()
+    writer.write(named)
+
+    output, _ = merge_pdfs([(BytesIO(make_pdf(1)), None), (named, None)], outlines=True, titles=["A", "B"])
+    assert outline_tree(PdfReader(output)) == [("A", 0), ("B", 1), [("Summary", 3), ("Intro", 1)]]
+    print("  ✅ Named destinations resolved once per input")
+
+
+def make_statement(client):
+    """A one-page statement with the shared logo and fonts"""
+    logo = Image.linear_gradient("L").convert("RGB")
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter)
+    c.drawImage(ImageReader(logo), 72, 650, width=64, height=64)
+    c.drawString(160, 690, f"Statement for client {client}")
+    c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+
+def test_deduplicate_shared_resources():
+    """The logo and font shared by every input are written once"""
+    print("🧪 Testing resource deduplication")
+    sources = [make_statement(client) for client in range(4)]
+    plain, plain_stats = merge_pdfs([(BytesIO(data), None) for data in sources])
+    deduped, stats = merge_pdfs([(BytesIO(data), None) for data in sources], deduplicate=True)
+
+    # One logo and one font kept, three copies of each dropped
+    assert stats["duplicates_removed"] >= 6
+    assert stats["bytes_saved"] > 0
+    assert stats["bytes"] < plain_stats["bytes"]
+    assert stats["dedupe_seconds"] + stats["write_seconds"] <= stats["seconds"]
+
+    reader = PdfReader(deduped)
+    images = set()
+    for page in reader.pages:
+        xobjects = page["/Resources"]["/XObject"]
+        images.update(xobjects.raw_get(name).idnum for name in xobjects)
+    assert len(images) == 1
+    # Content streams of the same length but different text stay separate
+    assert [page.extract_text().strip() for page in reader.pages] == [f"Statement for client {i}" for i in range(4)]
+    print(f"  ✅ {plain_stats['bytes']} -> {stats['bytes']} bytes ({stats['duplicates_removed']} objects removed)")
+
+
+if __name__ == "__main__":
+    test_merge_reports_pages_from_plan()
+    test_large_output_spills_to_disk()
+    test_page_selection_plan()
+    test_merged_outline()
+    test_named_destination_outline()
+    test_deduplicate_shared_resources()
+    print("✅ All merge tests passed!")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Test the shared output optimization pass"""
+
+from io import BytesIO
+
+from PIL import Image
+from pypdf import PdfReader
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+from pdf_tools.optimize import describe_savings, optimize_pdf
+
+
+def make_report(num_pages):
+    """Text-heavy pages with uncompressed content streams"""
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter, pageCompression=0)
+    for page in range(num_pages):
+        c.drawString(72, 740, f"Report page {page + 1}")
+        for line in range(60):
+            c.drawString(72, 720 - line * 11, f"Line {line}: quarterly figures carried forward from the ledger")
+        c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+
+def make_scan(num_pages):
+    """Pages each holding a 1200x1200 image shown at 2x2 inches (600 dpi)"""
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter, pageCompression=0)
+    scan = Image.radial_gradient("L").resize((1200, 1200)).convert("RGB")
+    for page in range(num_pages):
+        c.drawImage(ImageReader(scan), 72, 500, width=144, height=144)
+        c.drawString(72, 450, f"Scanned page {page + 1}")
+        c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+
+def test_optimize_shrinks_output():
+    """Recompression and object streams make the file smaller and keep the pages"""
+    print("🧪 Testing optimization")
+    pdf_bytes = make_report(3)
+    output, stats = optimize_pdf(BytesIO(pdf_bytes))
+    data = output.read()
+
+    assert not stats["kept_original"]
+    assert stats["input_bytes"] == len(pdf_bytes)
+    assert stats["output_bytes"] == len(data) < len(pdf_bytes)
+    reader = PdfReader(BytesIO(data))
+    assert [page.extract_text().splitlines()[0] for page in reader.pages] == [f"Report page {i}" for i in (1, 2, 3)]
+    print(f"  ✅ {describe_savings(stats)}")
+
+
+def test_image_downsampling():
+    """Images above the target resolution are resampled down to it"""
+    print("🧪 Testing image downsampling")
+    pdf_bytes = make_scan(1)
+    lossless, _ = optimize_pdf(pdf_bytes)
+    output, stats = optimize_pdf(pdf_bytes, image_dpi=150)
+
+    image = PdfReader(output).pages[0].images[0].image
+    assert image.width < 1200
+    assert stats["output_bytes"] < len(lossless.read())
+    print(f"  ✅ Image resampled to {image.width}x{image.height}")
+
+
+def test_compact_input_is_kept():
+    """An already optimized file is returned unchanged rather than grown"""
+    first, _ = optimize_pdf(make_report(1))
+    optimized = first.read()
+    output, stats = optimize_pdf(optimized)
+    if stats["kept_original"]:
+        assert output.read() == optimized
+    assert stats["output_bytes"] <= len(optimized)
+    print("  ✅ Output never larger than input")
+
+
+if __name__ == "__main__":
+    test_optimize_shrinks_output()
+    test_image_downsampling()
+    test_compact_input_is_kept()
+    print("✅ All optimization tests passed!")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Test the Page Manager page model"""
+
+from pdf_tools.page_model import PageModel
+
+
+def test_swap_and_lookup():
+    """Swaps keep the reverse index in sync"""
+    print("🧪 Testing swaps and lookups")
+    model = PageModel(5)
+    model.swap(0, 1)
+    model.swap(3, 4)
+
+    assert list(model.order) == [1, 0, 2, 4, 3]
+    assert model.position_of(4) == 3
+    assert model.page_at(0) == 1
+    print("  ✅ Order and positions agree")
+
+
+def test_move_shifts_pages_between():
+    """Moving a page shifts the pages between its old and new position"""
+    model = PageModel(6)
+    model.move(4, 1)
+
+    assert list(model.order) == [0, 4, 1, 2, 3, 5]
+    assert [model.position_of(p) for p in range(6)] == [0, 2, 3, 4, 1, 5]
+    print("  ✅ Move keeps positions consistent")
+
+
+def test_delete_restore_and_counts():
+    """Deleted pages stay in the order but are skipped in the output"""
+    print("🧪 Testing deletion")
+    model = PageModel(10)
+    model.delete_range(5, 8)
+    model.delete(5)  # deleting twice is harmless
+    model.restore(6)
+
+    assert model.deleted_count == 3
+    assert model.active_count == 7
+    assert model.active_order() == [0, 1, 2, 3, 4, 6, 9]
+    assert model.deleted_pages() == {5, 7, 8}
+    print("  ✅ Active pages counted correctly")
+
+
+def test_extract_range():
+    """Extract keeps only the range and marks everything else deleted"""
+    model = PageModel(10)
+    model.extract_range(3, 5)
+
+    assert list(model.order) == [3, 4, 5]
+    assert model.position_of(0) == -1
+    assert model.deleted_count == 7
+    assert model.active_order() == [3, 4, 5]
+    print("  ✅ Extract range keeps pages 4-6")
+
+
+def test_reverse_drops_deleted_pages():
+    """Reverse works on the active pages only, as the UI always did"""
+    model = PageModel(5)
+    model.delete(2)
+    model.reverse()
+
+    assert list(model.order) == [4, 3, 1, 0]
+    assert model.position_of(2) == -1
+    model.reset()
+    assert list(model.order) == [0, 1, 2, 3, 4]
+    assert model.deleted_count == 0
+    print("  ✅ Reverse and reset")
+
+
+if __name__ == "__main__":
+    test_swap_and_lookup()
+    test_move_shifts_pages_between()
+    test_delete_restore_and_counts()
+    test_extract_range()
+    test_reverse_drops_deleted_pages()
+    print("✅ All page model tests passed!")
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Test the Page Manager operation log"""
+
+from io import BytesIO
+
+from pypdf import PdfReader
+
+from pdf_tools.page_ops import PageEditLog, replay_to_pdf
+from test_thumbnails import make_pdf
+
+
+def page_labels(pdf):
+    """First line of text on every page of an output PDF"""
+    reader = PdfReader(pdf)
+    return [page.extract_text().strip() for page in reader.pages]
+
+
+def test_undo_and_redo():
+    """Undo replays the log up to the cursor and redo re-applies the next op"""
+    print("🧪 Testing undo/redo")
+    log = PageEditLog(5)
+    log.apply({"op": "delete", "page": 0})
+    log.apply({"op": "move", "from": 4, "to": 1})
+    assert log.compact() == [(4, 0, None), (1, 0, None), (2, 0, None), (3, 0, None)]
+
+    log.undo()
+    assert log.compact() == [(1, 0, None), (2, 0, None), (3, 0, None), (4, 0, None)]
+    log.redo()
+    assert log.compact() == [(4, 0, None), (1, 0, None), (2, 0, None), (3, 0, None)]
+
+    # A new edit after undo drops the redo history
+    log.undo()
+    log.apply({"op": "rotate", "page": 2, "degrees": 90})
+    assert not log.can_redo
+    assert log.compact() == [(1, 0, None), (2, 90, None), (3, 0, None), (4, 0, None)]
+    print("  ✅ Undo, redo and branching behave")
+
+
+def test_unknown_operation_rejected():
+    """Malformed operations are rejected before touching the model"""
+    log = PageEditLog(3)
+    for op in ({"op": "explode"}, {"op": "move", "from": 0}):
+        try:
+            log.apply(op)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"{op} should be rejected")
+    assert len(log) == 0
+    print("  ✅ Invalid operations rejected")
+
+
+def test_headless_replay():
+    """A serialised log replays to the same single-pass output"""
+    print("🧪 Testing headless replay")
+    log = PageEditLog(4)
+    log.apply({"op": "extract_range", "first": 1, "last": 3})
+    log.apply({"op": "reverse"})
+    log.apply({"op": "rotate", "page": 3, "degrees": 270})
+
+    restored = PageEditLog.from_json(log.to_json())
+    assert restored.compact() == log.compact() == [(3, 270, None), (2, 0, None), (1, 0, None)]
+
+    output = replay_to_pdf(BytesIO(make_pdf(4)), restored.ops)
+    assert page_labels(output) == ["Page 4", "Page 3", "Page 2"]
+    assert PdfReader(output).pages[0].rotation == 270
+    print("  ✅ Replayed log produced pages 4, 3, 2")
+
+
+def test_rotate_and_crop_are_page_metadata():
+    """Rotation and crop only change /Rotate and /CropBox"""
+    print("🧪 Testing rotate and crop")
+    pdf_bytes = make_pdf(3)
+    source = PdfReader(BytesIO(pdf_bytes))
+    output = replay_to_pdf(BytesIO(pdf_bytes), [
+        {"op": "rotate_range", "first": 0, "last": 2, "degrees": 90},
+        {"op": "crop_range", "first": 1, "last": 1, "margins": [0.1, 0.25, 0, 0]},
+    ])
+    reader = PdfReader(output)
+
+    assert [page.rotation for page in reader.pages] == [90, 90, 90]
+    # Letter is 612x792; 10% off the left and 25% off the top
+    assert [round(float(v)) for v in reader.pages[1].cropbox] == [61, 0, 612, 594]
+    assert reader.pages[0].cropbox == reader.pages[0].mediabox
+    assert reader.pages[1].get_contents().get_data() == source.pages[1].get_contents().get_data()
+    print("  ✅ Page dictionaries updated, content streams untouched")
+
+
+def test_invalid_crop_rejected():
+    """Margins that would hide the whole page are rejected"""
+    log = PageEditLog(2)
+    try:
+        log.apply({"op": "crop_range", "first": 0, "last": 1, "margins": [0.6, 0, 0.5, 0]})
+    except ValueError:
+        print("  ✅ Invalid crop rejected")
+    else:
+        raise AssertionError("Crop hiding the whole page should be rejected")
+
+
+if __name__ == "__main__":
+    test_undo_and_redo()
+    test_unknown_operation_rejected()
+    test_headless_replay()
+    test_rotate_and_crop_are_page_metadata()
+    test_invalid_crop_rejected()
+    print("✅ All page operation tests passed!")
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Test the Combiner's cached upload metadata"""
+
+from pdf_tools.pdf_info import PdfInfoCache, describe_page_sizes, read_pdf_info
+from test_thumbnails import make_pdf
+
+
+def test_info_fields():
+    """Page count, preview text, page sizes and encryption are extracted"""
+    print("🧪 Testing PDF info")
+    info = read_pdf_info(make_pdf(3))
+    assert info["pages"] == 3
+    assert info["preview_text"] == "Page 1"
+    assert info["page_sizes"] == [(612, 792)] * 3
+    assert info["encrypted"] is False
+    assert describe_page_sizes(info["page_sizes"]) == "216 × 279 mm"
+
+    locked = read_pdf_info(make_pdf(2, password="secret"))
+    assert locked["encrypted"] is True and locked["pages"] == "Unknown"
+
+    broken = read_pdf_info(b"not a pdf")
+    assert broken["pages"] == "Unknown"
+    assert broken["preview_text"].startswith("Error reading PDF")
+    print("  ✅ Metadata extracted, encrypted and broken files handled")
+
+
+def test_same_bytes_parsed_once():
+    """Re-submitting the same content is a cache hit with no parsing"""
+    print("🧪 Testing info cache")
+    cache = PdfInfoCache(workers=2)
+    pdf_bytes = make_pdf(2)
+    keys = [cache.submit(pdf_bytes) for _ in range(10)]
+    other = cache.submit(make_pdf(4))
+
+    assert len(set(keys)) == 1
+    assert cache.get(keys[0])["pages"] == 2
+    assert cache.get(other)["pages"] == 4
+    assert cache.parses == 2
+    assert cache.get("missing") is None
+    print("  ✅ 11 submissions, 2 parses")
+
+
+def test_evicted_key_is_parsed_again():
+    """A key pushed out by other uploads is re-parsed when its bytes are given"""
+    print("🧪 Testing info cache eviction")
+    cache = PdfInfoCache(max_entries=2, workers=1)
+    pdf_bytes = make_pdf(3)
+    key = cache.submit(pdf_bytes)
+    cache.submit(make_pdf(1))
+    cache.submit(make_pdf(2))
+
+    assert key not in cache
+    assert cache.get(key) is None
+    assert cache.get(key, pdf_bytes=pdf_bytes)["pages"] == 3
+    assert key in cache and cache.parses == 4
+    print("  ✅ Evicted key re-parsed instead of returning None")
+
+
+if __name__ == "__main__":
+    test_info_fields()
+    test_same_bytes_parsed_once()
+    test_evicted_key_is_parsed_again()
+    print("✅ All PDF info tests passed!")
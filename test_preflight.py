@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Test concurrent validation of Combiner inputs"""
+
+from io import BytesIO
+
+from pypdf import PdfReader
+
+from pdf_tools.merge import merge_pdfs
+from pdf_tools.preflight import merge_source, preflight_many, preflight_pdf
+from test_thumbnails import make_pdf
+
+
+def break_xref(pdf_bytes):
+    """Point startxref somewhere invalid"""
+    return pdf_bytes[:pdf_bytes.rfind(b"startxref")] + b"startxref\n999999\n%%EOF\n"
+
+
+def test_preflight_single_file():
+    """Valid, damaged, encrypted and junk inputs are classified"""
+    print("🧪 Testing input preflight")
+    ok = preflight_pdf(make_pdf(3))
+    assert ok["ok"] and ok["pages"] == 3 and ok["pdf_bytes"] is None
+
+    repaired = preflight_pdf(break_xref(make_pdf(3)))
+    assert repaired["ok"] and repaired["repaired"]
+    assert len(PdfReader(BytesIO(repaired["pdf_bytes"]), strict=True).pages) == 3
+
+    locked = preflight_pdf(make_pdf(2, password="secret"))
+    assert not locked["ok"] and locked["encrypted"]
+    unlocked = preflight_pdf(make_pdf(2, password="secret"), "secret")
+    assert unlocked["ok"] and not PdfReader(BytesIO(unlocked["pdf_bytes"])).is_encrypted
+
+    assert not preflight_pdf(b"not a pdf")["ok"]
+    print("  ✅ Valid, repaired, encrypted and broken inputs handled")
+
+
+def test_pool_keeps_input_order():
+    """Results from the pool line up with the inputs and progress reaches the total"""
+    print("🧪 Testing preflight pool")
+    inputs = [(make_pdf(n), None) for n in (1, 4, 2, 3)]
+    calls = []
+    results = preflight_many(inputs, workers=2, progress=lambda done, total, index: calls.append((done, index)))
+
+    assert [result["pages"] for result in results] == [1, 4, 2, 3]
+    assert [done for done, _ in calls] == [1, 2, 3, 4]
+    assert sorted(index for _, index in calls) == [0, 1, 2, 3]
+    assert all(result["reader"] is None for result in results)
+    print("  ✅ 4 files validated by 2 workers, in order")
+
+
+def test_in_process_readers_feed_the_merge():
+    """A small batch keeps its parsed readers and the merge uses them as they are"""
+    print("🧪 Testing in-process preflight readers")
+    inputs = [(make_pdf(3), None, [0, 2]), (make_pdf(2, password="secret"), "secret")]
+    checks = preflight_many(inputs)
+
+    assert all(isinstance(check["reader"], PdfReader) for check in checks)
+    assert all(check["pdf_bytes"] is None for check in checks)
+    sources = [(merge_source(check, BytesIO(item[0])), item[2] if len(item) > 2 else None)
+               for item, check in zip(inputs, checks)]
+    output, stats = merge_pdfs(sources)
+    assert stats["pages"] == 4 and len(PdfReader(output).pages) == 4
+    print("  ✅ Decrypted and partial inputs merged from their preflight readers")
+
+
+if __name__ == "__main__":
+    test_preflight_single_file()
+    test_pool_keeps_input_order()
+    test_in_process_readers_feed_the_merge()
+    print("✅ All preflight tests passed!")
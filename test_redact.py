@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""Test sensitive data detection and redaction used by the Redaction tool"""
+
+from io import BytesIO
+
+import fitz
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+from pdf_tools.redact import AnalysisCache, PageTextIndex, RedactionDetector, create_redacted_pdf, scan_pdf
+from test_thumbnails import make_pdf
+
+ALL_PATTERNS = {"tfn": True, "abn": True, "email": True, "phone": True}
+
+
+def found(text, patterns=ALL_PATTERNS, custom_pattern=None):
+    return [(item["type"], item["text"]) for item in RedactionDetector(patterns, custom_pattern).detect(text)]
+
+
+def test_abn_tfn_overlap():
+    """The last 9 digits of an ABN are never reported as a TFN"""
+    print("🧪 Testing ABN and TFN overlap")
+    assert found("ABN: 65 762 770 637") == [("ABN", "65 762 770 637"), ("ABN (with context)", "ABN: 65 762 770 637")]
+    assert found("ABN: 65 762 770 637", {"tfn": True}) == []
+    assert found("Company ABN 65762770637 and TFN 987654321", {"tfn": True}) == [
+        ("TFN", "987654321"), ("TFN (with context)", "TFN 987654321")
+    ]
+    assert found("ABN: 12-345-678-901", {"tfn": True}) == []
+    assert found("Just numbers: 762 770 637") == [("TFN", "762 770 637")]
+    print("  ✅ ABNs kept out of TFN results")
+
+
+def test_other_detectors():
+    """Emails, phone numbers and custom patterns, in detector order"""
+    print("🧪 Testing email, phone and custom detection")
+    text = "Call (02) 9876 5432 or 0412345678, mail jane.doe@example.com.au, staff ID EMP-0042"
+    # Phone patterns overlap, so a number can come back twice; scan_pdf drops repeats
+    assert found(text, dict(ALL_PATTERNS, custom=True), r"EMP-\d{4}") == [
+        ("Email", "jane.doe@example.com.au"),
+        ("Phone", "0412345678"),
+        ("Phone", "(02) 9876 5432"),
+        ("Phone", "0412345678"),
+        ("Custom", "EMP-0042"),
+    ]
+    assert found(text, {"custom": True}, custom_pattern="(unclosed") == []
+    assert found("Invoice 12345.00, due 01/02/2024, page 3 of 10") == []
+    print("  ✅ 4 detector types found")
+
+
+def test_scan_pdf():
+    """Items are tagged with their page and repeats on a page are reported once"""
+    print("🧪 Testing PDF scan")
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter)
+    c.drawString(100, 700, "Employee TFN: 123 456 789")
+    c.drawString(100, 680, "Again: 123-456-789")
+    c.showPage()
+    c.drawString(100, 700, "Employer ABN: 65 762 770 637")
+    c.save()
+    buffer.seek(0)
+    buffer.name = "payroll.pdf"
+
+    items = scan_pdf(buffer, {"tfn": True, "abn": True})
+    assert [(item["page"], item["type"]) for item in items] == [
+        (0, "TFN"), (0, "TFN (with context)"), (1, "ABN"), (1, "ABN (with context)")
+    ]
+    assert all(item["file"] == "payroll.pdf" for item in items)
+    assert items[0]["digits"] == "123456789"
+    print(f"  ✅ {len(items)} items across 2 pages")
+
+
+def test_redaction_uses_text_index():
+    """Boxes come from one extraction and every detected repeat of a value is redacted"""
+    print("🧪 Testing redaction from the page text index")
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter)
+    c.drawString(100, 700, "Employee TFN: 123 456 789")
+    c.drawString(100, 680, "Payslip reference 123 456 789, hours 38")
+    c.drawString(100, 660, "Contact payroll@example.com")
+    c.save()
+    buffer.seek(0)
+
+    page = fitz.open(stream=buffer.getvalue(), filetype="pdf")[0]
+    index = PageTextIndex(page)
+    assert index.text == page.get_text()
+    start = index.text.index("payroll@example.com")
+    assert index.rects(start, start + len("payroll@example.com")) == page.search_for("payroll@example.com")
+
+    items = scan_pdf(buffer, {"tfn": True})
+    # The repeat is folded into the first TFN, with both offsets kept
+    assert [len(item["spans"]) for item in items] == [2, 1]
+    redacted = fitz.open(stream=create_redacted_pdf(buffer, items).read(), filetype="pdf")[0].get_text()
+    assert "123" not in redacted and "789" not in redacted
+    assert "Payslip reference" in redacted and "hours 38" in redacted and "payroll@example.com" in redacted
+    print(f"  ✅ {len(items)} items redacted at their detected offsets, both occurrences removed")
+
+
+def test_document_analysis_is_reused():
+    """Scan and redaction share one parse; a changed document is reopened from its bytes"""
+    print("🧪 Testing the per-document analysis cache")
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter)
+    c.drawString(100, 700, "Employee TFN: 123 456 789")
+    c.showPage()
+    c.drawString(100, 700, "Contact payroll@example.com")
+    c.save()
+    pdf_bytes = buffer.getvalue()
+
+    cache = AnalysisCache()
+    analysis = cache.get(pdf_bytes)
+    assert cache.get(pdf_bytes) is analysis
+    items = analysis.scan({"tfn": True}, file_name="a.pdf")
+    assert analysis.scan({"tfn": True}, file_name="b.pdf")[0]["file"] == "b.pdf"
+    assert list(analysis.indexes) == [0]  # only the page with detections
+
+    redacted = fitz.open(stream=analysis.redact(items).read(), filetype="pdf")
+    assert "123 456 789" not in redacted[0].get_text()
+    assert analysis.parses == 1
+
+    # A new scan after redacting still sees the original text
+    items = analysis.scan({"tfn": True, "email": True})
+    assert [item["type"] for item in items] == ["TFN", "TFN (with context)", "Email"]
+    assert analysis.parses == 2
+
+    cache.discard(analysis.key)
+    assert analysis.key not in cache and analysis.doc is None and analysis.page_texts == []
+    print("  ✅ One parse for scan and redaction")
+
+
+def test_analysis_cache_is_bounded_by_bytes():
+    """Old entries are closed once the cache holds more than its byte limit"""
+    print("🧪 Testing analysis cache eviction")
+    documents = [make_pdf(n) for n in (2, 3, 4)]
+    cache = AnalysisCache(max_bytes=len(documents[0]) + len(documents[1]) + 100)
+    first = cache.get(documents[0])
+    first.scan({"tfn": True})
+    cache.get(documents[1])
+    assert len(cache) == 2 and cache.nbytes <= cache.max_bytes
+
+    cache.get(documents[2])
+    assert first.key not in cache and first.doc is None
+    assert cache.nbytes <= cache.max_bytes
+
+    # A caller still holding an evicted analysis reopens it from its bytes
+    assert first.scan({"tfn": True}) == [] and first.parses == 2
+    print(f"  ✅ {len(cache)} documents kept in {cache.nbytes} bytes")
+
+
+if __name__ == "__main__":
+    test_abn_tfn_overlap()
+    test_other_detectors()
+    test_scan_pdf()
+    test_redaction_uses_text_index()
+    test_document_analysis_is_reused()
+    test_analysis_cache_is_bounded_by_bytes()
+    print("✅ All redaction tests passed!")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Test page-range parsing and split-to-many output"""
+
+import zipfile
+from io import BytesIO
+
+from pypdf import PdfReader, PdfWriter
+
+from pdf_tools.page_ops import PageEditLog
+from pdf_tools.page_ranges import pages_in_ranges, parse_page_ranges
+from pdf_tools.split import bookmark_ranges, ranges_every, write_split_zip
+from test_thumbnails import make_pdf
+
+
+def test_parse_page_ranges():
+    """Ranges are 1-based in, 0-based inclusive out, in the order written"""
+    print("🧪 Testing page-range parsing")
+    assert parse_page_ranges("1-3, 5; 8-last", 10) == [(0, 2), (4, 4), (7, 9)]
+    assert parse_page_ranges("-2, 9-", 10) == [(0, 1), (8, 9)]
+    assert pages_in_ranges(parse_page_ranges("4-2, end", 5)) == [3, 2, 1, 4]
+
+    for expression in ("0", "1-11", "abc", "3 4", " , "):
+        try:
+            parse_page_ranges(expression, 10)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"'{expression}' should be rejected")
+    print("  ✅ Ranges parsed and invalid input rejected")
+
+
+def test_split_every_n_pages_to_zip():
+    """Each part lands in the ZIP with the pages of its range"""
+    print("🧪 Testing split to ZIP")
+    reader = PdfReader(BytesIO(make_pdf(10)))
+    plan = PageEditLog(10).compact()
+    output = BytesIO()
+    stats = write_split_zip(reader, plan, ranges_every(10, 4), output, base_name="doc")
+
+    assert stats["parts"] == 3 and stats["pages"] == 10
+    with zipfile.ZipFile(output) as archive:
+        names = archive.namelist()
+        last_part = PdfReader(BytesIO(archive.read(names[-1])))
+    assert names == ["doc_001_pages_1-4.pdf", "doc_002_pages_5-8.pdf", "doc_003_pages_9-10.pdf"]
+    assert [page.extract_text().strip() for page in last_part.pages] == ["Page 9", "Page 10"]
+    print(f"  ✅ {names}")
+
+
+def test_split_at_bookmarks_follows_edits():
+    """Bookmark parts use their titles and skip deleted pages"""
+    writer = PdfWriter(clone_from=PdfReader(BytesIO(make_pdf(6))))
+    writer.add_outline_item("Client A", 0)
+    writer.add_outline_item("Client B", 2)
+    writer.add_outline_item("Client C", 4)
+    source = BytesIO()
+    writer.write(source)
+    reader = PdfReader(source)
+
+    log = PageEditLog(6)
+    log.apply({"op": "delete", "page": 1})
+    parts = bookmark_ranges(reader, log.compact())
+    assert parts == [(0, 0, "Client A"), (1, 2, "Client B"), (3, 4, "Client C")]
+
+    output = BytesIO()
+    write_split_zip(reader, log.compact(), parts, output, base_name="bundle")
+    with zipfile.ZipFile(output) as archive:
+        assert archive.namelist()[1] == "bundle_002_Client_B.pdf"
+    print("  ✅ Split at bookmarks")
+
+
+if __name__ == "__main__":
+    test_parse_page_ranges()
+    test_split_every_n_pages_to_zip()
+    test_split_at_bookmarks_follows_edits()
+    print("✅ All split tests passed!")
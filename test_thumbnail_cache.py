@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Test the content-hash keyed thumbnail cache"""
+
+import os
+import stat
+import tempfile
+import threading
+
+from pdf_tools.thumbnail_cache import ThumbnailCache, content_hash, thumbnail_key
+from pdf_tools.thumbnails import ThumbnailRenderer
+from test_thumbnails import make_pdf
+
+
+def test_lru_is_bounded_by_bytes():
+    """The memory tier evicts least recently used pages past its byte limit"""
+    print("🧪 Testing LRU eviction")
+    page_bytes = 300
+    cache = ThumbnailCache(max_bytes=page_bytes * 2)
+
+    keys = [thumbnail_key("abc", i, 1.5) for i in range(3)]
+    cache.put(keys[0], b"0" * page_bytes)
+    cache.put(keys[1], b"1" * page_bytes)
+    cache.get(keys[0])  # page 0 is now most recently used
+    cache.put(keys[2], b"2" * page_bytes)
+
+    assert cache.memory_bytes <= page_bytes * 2
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+    assert cache.stats()["evictions"] == 1
+    print("  ✅ Least recently used page evicted")
+
+
+def test_evicted_pages_spill_to_disk():
+    """Pages evicted from memory come back from the disk tier"""
+    print("🧪 Testing disk tier")
+    with tempfile.TemporaryDirectory() as disk_dir:
+        cache = ThumbnailCache(max_bytes=300, disk_dir=disk_dir)
+        first = thumbnail_key("abc", 0, 1.5, variant="JPEG:80:0")
+        cache.put(first, b"first page")
+        cache.put(thumbnail_key("abc", 1, 1.5, variant="JPEG:80:0"), b"x" * 300)
+
+        assert cache.get(first) == b"first page"
+        assert cache.stats()["disk_hits"] == 1
+    print("  ✅ Evicted page promoted back from disk")
+
+
+def test_decrypted_pages_stay_off_disk():
+    """Renders of password-protected files are dropped on eviction, never spilled"""
+    print("🧪 Testing that authenticated renders are not written to disk")
+    with tempfile.TemporaryDirectory() as parent:
+        disk_dir = os.path.join(parent, "thumbs")
+        cache = ThumbnailCache(max_bytes=300, disk_dir=disk_dir)
+        assert stat.S_IMODE(os.stat(disk_dir).st_mode) == 0o700
+
+        secret = thumbnail_key("abc", 0, 1.5, authenticated=True)
+        cache.put(secret, b"decrypted page")
+        cache.put(thumbnail_key("abc", 1, 1.5), b"x" * 300)
+
+        assert os.listdir(disk_dir) == []
+        assert cache.get(secret) is None
+    print("  ✅ Decrypted page evicted without touching disk")
+
+
+def test_disk_tier_is_trimmed_oldest_first():
+    """The disk tier stays under its limit, tracked without rescanning the directory"""
+    print("🧪 Testing disk tier trimming")
+    with tempfile.TemporaryDirectory() as disk_dir:
+        cache = ThumbnailCache(max_bytes=100, disk_dir=disk_dir, max_disk_bytes=250)
+        keys = [thumbnail_key("abc", i, 1.5) for i in range(5)]
+        for key in keys:
+            cache.put(key, b"x" * 100)
+
+        # Four pages were evicted to disk; only the two newest fit under 250 bytes
+        assert cache.disk_bytes == 200
+        assert sorted(os.listdir(disk_dir)) == sorted(os.path.basename(cache._disk_path(k)) for k in keys[2:4])
+
+        # A new cache on the same directory picks up what is already there
+        assert ThumbnailCache(disk_dir=disk_dir).disk_bytes == 200
+    print("  ✅ Oldest spilled pages removed first")
+
+
+def test_disk_writes_do_not_hold_the_lock():
+    """Another thread's lookup completes while a page is being spilled"""
+    print("🧪 Testing that spills run outside the cache lock")
+    with tempfile.TemporaryDirectory() as disk_dir:
+        cache = ThumbnailCache(max_bytes=150, disk_dir=disk_dir)
+        keys = [thumbnail_key("abc", i, 1.5) for i in range(2)]
+        cache.put(keys[0], b"0" * 100)
+
+        seen = []
+        real_replace = os.replace
+
+        def replace_during_lookup(src, dst):
+            lookup = threading.Thread(target=lambda: seen.append(cache.get(keys[1])))
+            lookup.start()
+            lookup.join(timeout=5)
+            real_replace(src, dst)
+
+        os.replace = replace_during_lookup
+        try:
+            cache.put(keys[1], b"1" * 100)  # evicts and spills page 0
+        finally:
+            os.replace = real_replace
+
+        assert seen == [b"1" * 100]
+        assert cache.get(keys[0]) == b"0" * 100
+    print("  ✅ Memory hit served while the spill was writing")
+
+
+def test_renderer_reuses_cached_pages():
+    """Opening the same bytes again never re-rasterizes a cached page"""
+    print("🧪 Testing renderer cache hits")
+    pdf_bytes = make_pdf(3)
+    cache = ThumbnailCache()
+
+    with ThumbnailRenderer(pdf_bytes, zoom=0.5, cache=cache) as renderer:
+        renderer.render(1)
+        assert len(renderer.timings) == 1
+
+    # Simulates a re-upload of the same file
+    with ThumbnailRenderer(pdf_bytes, zoom=0.5, cache=cache) as renderer:
+        assert renderer.render(1) is not None
+        assert renderer.timings == {}
+
+    assert thumbnail_key(content_hash(pdf_bytes), 1, 0.5, variant="JPEG:80:0") in cache
+    assert cache.stats()["hits"] == 1
+    print("  ✅ Second render served from cache")
+
+
+if __name__ == "__main__":
+    test_lru_is_bounded_by_bytes()
+    test_evicted_pages_spill_to_disk()
+    test_decrypted_pages_stay_off_disk()
+    test_disk_tier_is_trimmed_oldest_first()
+    test_disk_writes_do_not_hold_the_lock()
+    test_renderer_reuses_cached_pages()
+    print("✅ All thumbnail cache tests passed!")
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""Test the shared thumbnail renderer used by the Page Manager"""
+
+from io import BytesIO
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+from pypdf import PdfReader, PdfWriter
+
+from pdf_tools.thumbnails import (
+    LazyThumbnails,
+    ThumbnailRenderer,
+    decode_thumbnail,
+    render_pages_parallel,
+    render_thumbnails,
+    transform_thumbnail,
+)
+
+
+def make_pdf(num_pages, password=None):
+    """Create a small in-memory PDF, optionally encrypted"""
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter)
+    for page in range(num_pages):
+        c.drawString(100, 700, f"Page {page + 1}")
+        c.showPage()
+    c.save()
+
+    if password is None:
+        return buffer.getvalue()
+
+    writer = PdfWriter(clone_from=PdfReader(BytesIO(buffer.getvalue())))
+    writer.encrypt(password, password)
+    output = BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+def test_render_all_pages():
+    """Every page renders from one handle and gets a timing entry"""
+    print("🧪 Testing thumbnail rendering")
+    images, stats = render_thumbnails(make_pdf(5), zoom=1.0)
+
+    assert len(images) == 5
+    assert all(img is not None for img in images)
+    # Letter page at 1x zoom is 612x792 points
+    assert decode_thumbnail(images[0]).size == (612, 792)
+    assert stats["pages"] == 5
+    print(f"  ✅ Rendered {stats['pages']} pages, {stats['mean_ms']:.1f} ms/page")
+
+
+def test_previews_are_compressed():
+    """Previews are stored as encoded bytes far smaller than the raw pixmap"""
+    print("🧪 Testing compressed previews")
+    pdf_bytes = make_pdf(1)
+    with ThumbnailRenderer(pdf_bytes, zoom=1.5, image_format="WEBP", quality=60) as renderer:
+        data = renderer.render(0)
+    img = decode_thumbnail(data)
+    raw_size = img.width * img.height * 3
+
+    assert data[8:12] == b"WEBP"
+    assert len(data) * 20 < raw_size
+    print(f"  ✅ {len(data) / 1024:.0f} KB instead of {raw_size / 1024:.0f} KB raw")
+
+
+def test_max_dimension_caps_preview_size():
+    """The longest side never exceeds max_dimension"""
+    with ThumbnailRenderer(make_pdf(1), zoom=2, max_dimension=400) as renderer:
+        img = renderer.render_image(0)
+    assert max(img.size) <= 400
+    print(f"  ✅ Preview capped at {img.size}")
+
+
+def test_out_of_range_page():
+    """Rendering a missing page returns None instead of raising"""
+    with ThumbnailRenderer(make_pdf(2)) as renderer:
+        assert renderer.render(5) is None
+        assert renderer.render(-1) is None
+    print("  ✅ Out of range pages return None")
+
+
+def test_encrypted_pdf():
+    """Encrypted files need the right password"""
+    pdf_bytes = make_pdf(2, password="secret")
+
+    with ThumbnailRenderer(pdf_bytes, password="secret") as renderer:
+        assert renderer.render(0) is not None
+
+    try:
+        ThumbnailRenderer(pdf_bytes, password="wrong")
+    except ValueError:
+        print("  ✅ Wrong password rejected")
+    else:
+        raise AssertionError("Wrong password should be rejected")
+
+
+def test_parallel_rendering_keeps_page_order():
+    """Pages rendered by the pool come back in page order with timings"""
+    print("🧪 Testing parallel rendering")
+    timings = {}
+    results = list(render_pages_parallel(make_pdf(7), zoom=0.5, workers=2, chunk_size=2, timings=timings))
+
+    assert [page_num for page_num, _ in results] == list(range(7))
+    assert all(img is not None for _, img in results)
+    assert sorted(timings) == list(range(7))
+    print("  ✅ 7 pages streamed back in order from 2 workers")
+
+
+def test_lazy_thumbnails_stay_bounded():
+    """Only requested pages are rendered and the cache never exceeds its limit"""
+    print("🧪 Testing lazy thumbnails")
+    thumbnails = LazyThumbnails(make_pdf(30), zoom=0.5, max_cached=8)
+    try:
+        assert len(thumbnails) == 30
+        assert not thumbnails.timings  # nothing rendered up front
+
+        window = thumbnails.get_many(range(6))
+        assert sorted(window) == list(range(6))
+        assert len(thumbnails.timings) == 6
+
+        thumbnails.prefetch(range(6, 12))
+        thumbnails._prefetch_thread.join()
+        assert thumbnails.is_cached(6)
+
+        thumbnails.get_many(range(12, 24))
+        assert len(thumbnails._cache) <= 8
+    finally:
+        thumbnails.close()
+    print("  ✅ Rendered on demand with a bounded cache")
+
+
+def test_transform_rotates_cached_preview():
+    """Rotation and crop are applied to the rendered preview, not re-rendered"""
+    print("🧪 Testing preview rotation")
+    thumbnails = LazyThumbnails(make_pdf(1), zoom=1.0)
+    try:
+        rotated = decode_thumbnail(thumbnails.get_transformed(0, rotation=90, crop=(0.5, 0, 0, 0)))
+        assert rotated.size == (792, 306)
+        assert len(thumbnails.timings) == 1  # rendered once, transformed after
+        thumbnails.get_transformed(0, rotation=270)
+        assert len(thumbnails.timings) == 1
+    finally:
+        thumbnails.close()
+    assert transform_thumbnail(b"data") == b"data"
+    print("  ✅ Cached preview cropped and rotated")
+
+
+if __name__ == "__main__":
+    test_render_all_pages()
+    test_previews_are_compressed()
+    test_max_dimension_caps_preview_size()
+    test_out_of_range_page()
+    test_encrypted_pdf()
+    test_parallel_rendering_keeps_page_order()
+    test_lazy_thumbnails_stay_bounded()
+    test_transform_rotates_cached_preview()
+    print("✅ All thumbnail tests passed!")
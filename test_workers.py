@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""Test the shared process pool helpers"""
+
+import os
+
+from pdf_tools.workers import default_workers, run_pool
+
+
+def test_default_workers_reads_environment():
+    """The environment variable wins, otherwise the CPU count is capped"""
+    print("🧪 Testing default worker count")
+    os.environ["PDF_TEST_WORKERS"] = "3"
+    try:
+        assert default_workers("PDF_TEST_WORKERS") == 3
+    finally:
+        del os.environ["PDF_TEST_WORKERS"]
+    assert default_workers("PDF_TEST_WORKERS", limit=2) == max(1, min(os.cpu_count() or 1, 2))
+    print("  ✅ PDF_TEST_WORKERS=3 gives 3 workers")
+
+
+def test_small_batch_runs_in_process():
+    """Below min_bytes nothing is sent to a pool, so local functions work"""
+    print("🧪 Testing in-process small batches")
+    calls = []
+    results = run_pool(
+        lambda data, tag: (len(data), tag), [(b"abc", "a"), (b"de", "b")], workers=4,
+        progress=lambda done, total, index: calls.append((done, index)), min_bytes=1024
+    )
+    assert results == [(3, "a"), (2, "b")]
+    assert calls == [(1, 0), (2, 1)]
+    print("  ✅ 2 items ran in order without a pool")
+
+
+def test_pool_keeps_input_order():
+    """Results from worker processes come back in input order"""
+    print("🧪 Testing pooled batches")
+    results = run_pool(divmod, [(7, 2), (9, 4), (5, 5)], workers=2)
+    assert results == [(3, 1), (2, 1), (1, 0)]
+    print("  ✅ 3 items from 2 workers, in order")
+
+
+if __name__ == "__main__":
+    test_default_workers_reads_environment()
+    test_small_batch_runs_in_process()
+    test_pool_keeps_input_order()
+    print("✅ All worker pool tests passed!")